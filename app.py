@@ -3,23 +3,45 @@ from flask_cors import CORS
 from flask_migrate import Migrate
 from connectors.config import Config
 from connectors.db import db, jwt  # Connector database
+from connectors.cache import cache  # Cache untuk respons katalog
+from connectors.json_provider import FastJSONProvider  # orjson untuk jsonify
 from flask_mail import Mail  # Mail untuk pengiriman OTP
 from routes import register_all_routes  # Import fungsi untuk mendaftarkan semua routes
+from services.search import init_search
+from middlewares.cache_control import init_cache_control
+from middlewares.compression import init_compression
+from middlewares.replica import init_read_replicas
+from middlewares.idempotency import purge_idempotency_keys_command
+from services.pricing import refresh_prices_command
+from services.background import init_background
+from services.media import init_media, media_retry_command
+from services.suggest import init_suggest
+from services.cart_store import cart_store, flush_carts_command
 
 # Inisialisasi Flask dan Flask-Mail
 mail = Mail()
 
-def create_app():
-    """Factory function untuk membuat instance aplikasi Flask."""
+def create_app(config=None):
+    """Factory function untuk membuat instance aplikasi Flask.
+    :param config: Optional dict overriding values from Config (dipakai oleh test).
+    """
     app = Flask(__name__)
+    app.json = FastJSONProvider(app)
 
     # Menggunakan konfigurasi dari config.py
     app.config.from_object(Config)
+    if config:
+        app.config.update(config)
     
     # Inisialisasi ekstensi
     db.init_app(app)
     mail.init_app(app)
     jwt.init_app(app)
+    cache.init_app(app)
+    init_background(app)
+    init_media(app)
+    init_suggest(app)
+    cart_store.init_app(app)
 
     # Inisialisasi Flask-Migrate
     migrate = Migrate(app, db)
@@ -30,6 +52,21 @@ def create_app():
     # Register semua routes dari folder routes
     register_all_routes(app)
 
+    # Header Cache-Control per blueprint
+    init_cache_control(app)
+
+    # Kompresi gzip/brotli sesuai Accept-Encoding
+    init_compression(app)
+
+    # Read-your-writes untuk routing read replica
+    init_read_replicas(app)
+
+    # CLI: flask refresh-prices (jalankan berkala via cron saat promosi mulai/berakhir)
+    app.cli.add_command(refresh_prices_command)
+    app.cli.add_command(media_retry_command)
+    app.cli.add_command(flush_carts_command)
+    app.cli.add_command(purge_idempotency_keys_command)
+
     # Cek koneksi database
     Config.check_database(app)
 
@@ -37,6 +74,9 @@ def create_app():
     with app.app_context():
         db.create_all()
 
+    # Validasi bucket harga facet dan index full-text untuk pencarian produk (FTS5 saat memakai SQLite)
+    init_search(app)
+
     @app.route('/')
     def home():
         return {"message": "Welcome to Flask!"}
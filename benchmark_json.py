@@ -0,0 +1,66 @@
+"""
+Benchmark jsonify on a listing-sized payload: Flask's default provider vs FastJSONProvider.
+
+    python benchmark_json.py [jumlah_produk] [ulangan]
+
+Tidak butuh database; payload dibuat dengan bentuk yang sama seperti services.catalog.product_payload.
+"""
+import sys
+import timeit
+from datetime import datetime, timedelta
+from flask import Flask
+from flask.json.provider import DefaultJSONProvider
+from connectors.json_provider import FastJSONProvider, orjson
+
+
+def build_payload(count):
+    now = datetime(2026, 10, 18, 12, 0, 0)
+    products = []
+    for i in range(count):
+        products.append({
+            "id": i,
+            "nama_produk": f"Makanan Kucing Premium {i}",
+            "deskripsi": "Makanan kering untuk kucing dewasa dengan kandungan protein tinggi. " * 3,
+            "harga": 125000.0 + i,
+            "effective_price": 112500.0 + i,
+            "stok": i % 50,
+            "images": [{"id": i * 3 + n, "url": f"https://res.cloudinary.com/demo/image/upload/p{i}_{n}.jpg"}
+                       for n in range(3)],
+            "kategori": "Makanan",
+            "jenis_hewan": "Kucing",
+            "berat": 1.5,
+            "ukuran": {"panjang": 20.0, "lebar": 10.0, "tinggi": 30.0},
+            "promotion": {
+                "id": i,
+                "product_id": i,
+                "discount": 10.0,
+                "promotion_period_start": now,
+                "promotion_period_end": now + timedelta(days=7),
+                "created_at": now,
+                "updated_at": None,
+            } if i % 2 else None,
+        })
+    return {"msg": "Products retrieved successfully", "products": products, "next_cursor": None}
+
+
+def run(provider_class, payload, repeat):
+    app = Flask(__name__)
+    app.json = provider_class(app)
+    with app.app_context():
+        size = len(app.json.response(payload).get_data())
+        seconds = min(timeit.repeat(lambda: app.json.response(payload).get_data(), number=1, repeat=repeat))
+    return seconds, size
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    repeat = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    payload = build_payload(count)
+
+    baseline, baseline_size = run(DefaultJSONProvider, payload, repeat)
+    fast, fast_size = run(FastJSONProvider, payload, repeat)
+
+    print(f"{count} products, best of {repeat}")
+    print(f"  DefaultJSONProvider: {baseline * 1000:8.1f} ms  ({baseline_size} bytes)")
+    print(f"  FastJSONProvider:    {fast * 1000:8.1f} ms  ({fast_size} bytes, {'orjson' if orjson else 'stdlib fallback'})")
+    print(f"  Speedup: {baseline / fast:.1f}x")
@@ -0,0 +1,221 @@
+import pickle
+import threading
+import time
+from collections import OrderedDict
+
+
+class MemoryCache:
+    """
+    In-process cache with LRU eviction and per-entry TTL.
+    Each worker process has its own copy, so use RedisCache when running several workers.
+    """
+
+    shared = False  # Tidak terlihat oleh worker lain
+
+    def __init__(self, max_entries=1024, default_ttl=60):
+        self.max_entries = max_entries
+        self.default_ttl = default_ttl
+        self._entries = OrderedDict()  # key -> (expires_at, value)
+        self._tags = {}  # tag -> set(keys)
+        self._key_tags = {}  # key -> set(tags)
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at is not None and expires_at <= time.monotonic():
+                self._remove(key)
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl=None, tags=()):
+        ttl = self.default_ttl if ttl is None else ttl
+        expires_at = time.monotonic() + ttl if ttl else None
+        with self._lock:
+            self._remove(key)
+            self._entries[key] = (expires_at, value)
+            for tag in tags:
+                self._tags.setdefault(tag, set()).add(key)
+            self._key_tags[key] = set(tags)
+            while len(self._entries) > self.max_entries:
+                oldest_key = next(iter(self._entries))
+                self._remove(oldest_key)
+
+    def delete(self, *keys):
+        with self._lock:
+            for key in keys:
+                self._remove(key)
+
+    def invalidate_tags(self, *tags):
+        with self._lock:
+            for tag in tags:
+                for key in self._tags.pop(tag, set()):
+                    self._remove(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._tags.clear()
+            self._key_tags.clear()
+
+    def _remove(self, key):
+        # Dipanggil dengan lock sudah dipegang
+        self._entries.pop(key, None)
+        for tag in self._key_tags.pop(key, set()):
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
+
+
+class RedisCache:
+    """
+    Cache backed by any client speaking the Redis protocol (redis-py or a compatible fake).
+    Tags are stored as Redis sets holding the keys that carry them.
+    """
+
+    shared = True
+
+    def __init__(self, client, default_ttl=60, key_prefix="petshop:"):
+        self.client = client
+        self.default_ttl = default_ttl
+        self.key_prefix = key_prefix
+
+    def _key(self, key):
+        return f"{self.key_prefix}{key}"
+
+    def _tag_key(self, tag):
+        return f"{self.key_prefix}tag:{tag}"
+
+    def get(self, key):
+        raw = self.client.get(self._key(key))
+        return pickle.loads(raw) if raw is not None else None
+
+    def set(self, key, value, ttl=None, tags=()):
+        ttl = self.default_ttl if ttl is None else ttl
+        full_key = self._key(key)
+        self.client.set(full_key, pickle.dumps(value), ex=ttl or None)
+        for tag in tags:
+            self._add_to_tag(self._tag_key(tag), full_key, ttl)
+
+    def _add_to_tag(self, tag_key, full_key, ttl):
+        """
+        Add a key to a tag set. The set must live as long as its longest entry,
+        so its TTL is only ever extended (in a WATCH transaction, so a
+        concurrent write with a shorter TTL cannot shorten it).
+        """
+        def add(pipe):
+            current = pipe.ttl(tag_key)  # -2: belum ada, -1: tanpa kedaluwarsa
+            pipe.multi()
+            pipe.sadd(tag_key, full_key)
+            if not ttl:
+                pipe.persist(tag_key)
+            elif current == -2 or 0 <= current < ttl:
+                pipe.expire(tag_key, ttl)
+
+        self.client.transaction(add, tag_key)
+
+    def delete(self, *keys):
+        if keys:
+            self.client.delete(*[self._key(key) for key in keys])
+
+    def invalidate_tags(self, *tags):
+        for tag in tags:
+            tag_key = self._tag_key(tag)
+            members = self.client.smembers(tag_key)
+            if members:
+                self.client.delete(*members)
+            self.client.delete(tag_key)
+
+    def clear(self):
+        keys = list(self.client.scan_iter(match=f"{self.key_prefix}*"))
+        if keys:
+            self.client.delete(*keys)
+
+
+class NullCache:
+    """Cache that stores nothing, used when CACHE_BACKEND is 'none'."""
+
+    shared = False
+
+    def get(self, key):
+        return None
+
+    def set(self, key, value, ttl=None, tags=()):
+        pass
+
+    def delete(self, *keys):
+        pass
+
+    def invalidate_tags(self, *tags):
+        pass
+
+    def clear(self):
+        pass
+
+
+class Cache:
+    """
+    Flask extension selecting a cache backend from the app config.
+
+    CACHE_BACKEND: 'memory' (default), 'redis' or 'none'.
+    A pre-built Redis client (e.g. a fake for local runs) can be passed
+    through the CACHE_REDIS_CLIENT config key instead of CACHE_REDIS_URL.
+    """
+
+    def __init__(self, app=None):
+        self.backend = NullCache()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        backend = app.config.get("CACHE_BACKEND", "memory")
+        default_ttl = app.config.get("CACHE_DEFAULT_TTL", 60)
+
+        if backend == "redis":
+            client = app.config.get("CACHE_REDIS_CLIENT")
+            if client is None:
+                import redis  # Dependensi opsional, hanya dibutuhkan untuk backend redis
+                client = redis.Redis.from_url(app.config["CACHE_REDIS_URL"])
+            self.backend = RedisCache(
+                client,
+                default_ttl=default_ttl,
+                key_prefix=app.config.get("CACHE_KEY_PREFIX", "petshop:"),
+            )
+        elif backend == "memory":
+            self.backend = MemoryCache(
+                max_entries=app.config.get("CACHE_MAX_ENTRIES", 1024),
+                default_ttl=default_ttl,
+            )
+        else:
+            self.backend = NullCache()
+
+        app.extensions["cache"] = self
+
+    @property
+    def shared(self):
+        """True when every worker process sees the same entries (Redis)."""
+        return self.backend.shared
+
+    def get(self, key):
+        return self.backend.get(key)
+
+    def set(self, key, value, ttl=None, tags=()):
+        self.backend.set(key, value, ttl=ttl, tags=tags)
+
+    def delete(self, *keys):
+        self.backend.delete(*keys)
+
+    def invalidate_tags(self, *tags):
+        self.backend.invalidate_tags(*tags)
+
+    def clear(self):
+        self.backend.clear()
+
+
+cache = Cache()
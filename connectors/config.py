@@ -1,4 +1,5 @@
 import os
+import tempfile
 import psycopg2
 from datetime import timedelta
 from dotenv import load_dotenv
@@ -19,6 +20,79 @@ class Config:
         "pool_recycle": int(os.getenv('SQLALCHEMY_POOL_RECYCLE', 1800)),  # Recycle every 30 minutes
     }
 
+    # Read replica opsional, pisahkan dengan koma; dipakai oleh handler GET bertanda @use_replica
+    SQLALCHEMY_BINDS = {
+        f"replica_{i}": uri.strip()
+        for i, uri in enumerate(os.getenv('SQLALCHEMY_REPLICA_URIS', '').split(','))
+        if uri.strip()
+    }
+    REPLICA_STICKY_SECONDS = int(os.getenv('REPLICA_STICKY_SECONDS', 10))  # Baca dari primary setelah menulis (butuh CACHE_BACKEND=redis)
+
+
+    # Cache configuration ('memory', 'redis' atau 'none')
+    CACHE_BACKEND = os.getenv('CACHE_BACKEND', 'memory')
+    CACHE_REDIS_URL = os.getenv('CACHE_REDIS_URL', 'redis://localhost:6379/0')
+    CACHE_KEY_PREFIX = os.getenv('CACHE_KEY_PREFIX', 'petshop:')
+    CACHE_DEFAULT_TTL = int(os.getenv('CACHE_DEFAULT_TTL', 60))  # Seconds
+    CACHE_MAX_ENTRIES = int(os.getenv('CACHE_MAX_ENTRIES', 1024))  # Only for the memory backend
+    CATALOG_CACHE_TTL = int(os.getenv('CATALOG_CACHE_TTL', 60))  # Public catalog responses
+
+    FACET_CACHE_TTL = int(os.getenv('FACET_CACHE_TTL', 15))  # Short-lived facet counts
+    FACET_PRICE_BUCKETS = [
+        float(bound) for bound in os.getenv('FACET_PRICE_BUCKETS', '50000,100000,250000,500000').split(',')
+        if bound.strip()
+    ]  # Batas rentang harga (Rupiah), divalidasi dan diurutkan saat startup
+    CATALOG_EXPORT_BATCH_SIZE = int(os.getenv('CATALOG_EXPORT_BATCH_SIZE', 500))  # Rows per streamed batch
+    PRODUCT_BATCH_MAX_IDS = int(os.getenv('PRODUCT_BATCH_MAX_IDS', 500))  # Max ids per /products/batch request
+
+    CART_BATCH_MAX_OPERATIONS = int(os.getenv('CART_BATCH_MAX_OPERATIONS', 100))  # Operasi per /cart/batch
+
+    # Penyimpanan keranjang ('database', 'memory' atau 'redis'); memory/redis ditulis ke tabel carts secara batch
+    CART_STORE_BACKEND = os.getenv('CART_STORE_BACKEND', 'database')
+    CART_REDIS_URL = os.getenv('CART_REDIS_URL', os.getenv('CACHE_REDIS_URL', 'redis://localhost:6379/0'))
+    CART_KEY_PREFIX = os.getenv('CART_KEY_PREFIX', 'petshop:cart:')
+    CART_FLUSH_INTERVAL = int(os.getenv('CART_FLUSH_INTERVAL', 5))  # Seconds between write-behind flushes
+    CART_FLUSH_BATCH_SIZE = int(os.getenv('CART_FLUSH_BATCH_SIZE', 200))  # Carts per flush transaction
+    CART_IDLE_SECONDS = int(os.getenv('CART_IDLE_SECONDS', 300))  # Backend memory: buang keranjang yang sudah di-flush
+
+    # Header Idempotency-Key untuk checkout dan perubahan status pesanan
+    IDEMPOTENCY_TTL = int(os.getenv('IDEMPOTENCY_TTL', 86400))  # Seconds a stored response can be replayed
+    IDEMPOTENCY_LOCK_TIMEOUT = int(os.getenv('IDEMPOTENCY_LOCK_TIMEOUT', 60))  # Stale in-progress claims can be taken over after this
+    IDEMPOTENCY_WAIT_TIMEOUT = float(os.getenv('IDEMPOTENCY_WAIT_TIMEOUT', 10))  # How long a duplicate waits before 409
+    IDEMPOTENCY_POLL_INTERVAL = float(os.getenv('IDEMPOTENCY_POLL_INTERVAL', 0.1))
+
+    # Autocomplete /products/suggest (index in-memory per proses)
+    SUGGEST_REBUILD_INTERVAL = int(os.getenv('SUGGEST_REBUILD_INTERVAL', 600))  # Seconds between full rebuilds
+    SUGGEST_MAX_SCAN = int(os.getenv('SUGGEST_MAX_SCAN', 1000))  # Index entries read per query
+
+    PRODUCT_IMPORT_MAX_ROWS = int(os.getenv('PRODUCT_IMPORT_MAX_ROWS', 5000))
+    PRODUCT_IMPORT_BATCH_SIZE = int(os.getenv('PRODUCT_IMPORT_BATCH_SIZE', 500))  # Rows per executemany
+
+    # Background thread pool (image fetch setelah import, dsb.)
+    BACKGROUND_WORKERS = int(os.getenv('BACKGROUND_WORKERS', 4))
+
+    # Upload gambar produk ('cloudinary', 'local', atau 'fake' untuk test)
+    IMAGE_UPLOADER = os.getenv('IMAGE_UPLOADER', 'cloudinary')
+    UPLOAD_MAX_WORKERS = int(os.getenv('UPLOAD_MAX_WORKERS', 4))  # Concurrent uploads per process
+    UPLOAD_TIMEOUT = int(os.getenv('UPLOAD_TIMEOUT', 30))  # Seconds per upload
+    MEDIA_FETCH_MAX_BYTES = int(os.getenv('MEDIA_FETCH_MAX_BYTES', 10 * 1024 * 1024))  # Image URLs dari import
+    MEDIA_LOCAL_ROOT = os.getenv('MEDIA_LOCAL_ROOT', os.path.join(os.getcwd(), 'media'))  # Backend 'local'
+    MEDIA_SPOOL_DIR = os.getenv('MEDIA_SPOOL_DIR', os.path.join(tempfile.gettempdir(), 'petshop-media-spool'))
+    MEDIA_MAX_ATTEMPTS = int(os.getenv('MEDIA_MAX_ATTEMPTS', 5))  # Upload asinkron
+    MEDIA_RETRY_BACKOFF = float(os.getenv('MEDIA_RETRY_BACKOFF', 2))  # Seconds, doubled per retry
+
+    # Kompresi respons (gzip, brotli jika paket brotli terpasang)
+    COMPRESS_ENABLED = os.getenv('COMPRESS_ENABLED', 'True').lower() == 'true'
+    COMPRESS_MIN_SIZE = int(os.getenv('COMPRESS_MIN_SIZE', 1024))  # Bytes; body lebih kecil dikirim apa adanya
+    COMPRESS_LEVEL = int(os.getenv('COMPRESS_LEVEL', 6))  # gzip 1-9
+    COMPRESS_BROTLI_QUALITY = int(os.getenv('COMPRESS_BROTLI_QUALITY', 5))  # brotli 0-11
+
+    # Cache-Control header per blueprint untuk GET yang sukses
+    CACHE_CONTROL_POLICIES = {
+        "products": os.getenv('CACHE_CONTROL_PRODUCTS', 'public, max-age=30'),
+        "seller": os.getenv('CACHE_CONTROL_SELLER', 'private, no-cache'),
+    }
+
 
     # Email configuration
     MAIL_SERVER = os.getenv('MAIL_SERVER', 'smtp.gmail.com')
@@ -1,5 +1,41 @@
+import random
+from flask import g, has_app_context
 from flask_sqlalchemy import SQLAlchemy
+from flask_sqlalchemy.session import Session
 from flask_jwt_extended import JWTManager
 
-db = SQLAlchemy()
+# Bind key replika di SQLALCHEMY_BINDS: replica_0, replica_1, ...
+REPLICA_BIND_PREFIX = "replica_"
+
+
+class RoutingSession(Session):
+    """
+    Session that sends reads to a read replica while the current request is
+    marked read-only (see middlewares.replica.use_replica). The replica is
+    picked once per request, so one response never mixes replicas.
+
+    Flushes and DML statements always go to the primary, and once a request
+    has written anything (or called middlewares.replica.read_from_primary),
+    the rest of it stays on the primary too.
+    Without replicas configured this behaves like the default session.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and has_app_context():
+            if self._flushing or getattr(clause, "is_dml", False):
+                g.db_wrote = True
+            elif g.get("db_use_replica") and not g.get("db_wrote") and not g.get("db_primary_only"):
+                if "db_replica" not in g:
+                    # Satu replika per request, agar semua query melihat snapshot dengan lag yang sama
+                    replicas = [
+                        engine for key, engine in self._db.engines.items()
+                        if key and key.startswith(REPLICA_BIND_PREFIX)
+                    ]
+                    g.db_replica = random.choice(replicas) if replicas else None
+                if g.db_replica is not None:
+                    return g.db_replica
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+db = SQLAlchemy(session_options={"class_": RoutingSession})
 jwt = JWTManager() 
@@ -1,10 +1,27 @@
-from flask import request, jsonify
+from flask import request, jsonify, current_app
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from connectors.db import db
 from models.cart import Cart
 from models.product import Product  # Untuk validasi produk
+from services.cart import build_cart_view, apply_cart_operations, parse_id, CartBatchError
+from services.cart_store import cart_store
 import json
 
+
+def _resolve_cart_line(user_id, product_id, cart_id):
+    """
+    Cari product_id untuk item keranjang. Gunakan product_id; cart_id (id baris
+    di tabel carts) masih diterima untuk client lama. Keduanya sudah lewat parse_id.
+    :return: product_id, atau None jika item tidak ada di keranjang.
+    """
+    if product_id:
+        return product_id if product_id in cart_store.items(user_id) else None
+
+    # Baris baru mungkin belum ditulis ke tabel carts (write-behind)
+    cart_store.flush_user(user_id)
+    row = db.session.query(Cart.product_id).filter_by(id=cart_id, user_id=user_id).first()
+    return row.product_id if row else None
+
 # Tambah produk ke keranjang
 @jwt_required()
 def add_to_cart():
@@ -25,30 +42,22 @@ def add_to_cart():
         return jsonify({"msg": "User ID tidak valid."}), 400
 
     # Ambil data dari request
-    data = request.get_json()
-    product_id = data.get("product_id")
+    data = request.get_json(silent=True)
+    data = data if isinstance(data, dict) else {}  # Body selain object diperlakukan sebagai kosong
+    product_id = parse_id(data.get("product_id"))
     quantity = data.get("quantity", 1)
 
     # Validasi input
     if not product_id or not isinstance(quantity, int) or quantity <= 0:
         return jsonify({"msg": "Produk ID dan jumlah harus valid."}), 400
 
-    # Cek apakah produk ada
-    product = Product.query.get(product_id)
+    # Cek apakah produk ada (cukup id, tanpa memuat kolom lain)
+    product = db.session.query(Product.id).filter_by(id=product_id).first()
     if not product:
         return jsonify({"msg": "Produk tidak ditemukan."}), 404
 
-    # Cek apakah produk sudah ada di keranjang
-    cart_item = Cart.query.filter_by(user_id=user_id, product_id=product_id).first()
-    if cart_item:
-        cart_item.quantity += quantity  # Tambahkan jumlah jika sudah ada
-    else:
-        # Tambahkan produk baru ke keranjang
-        cart_item = Cart(user_id=user_id, product_id=product_id, quantity=quantity)
-        db.session.add(cart_item)
-
-    # Commit perubahan ke database
-    db.session.commit()
+    # Tambahkan ke keranjang (atau tambah jumlah jika produk sudah ada) lewat cart store
+    cart_store.add(user_id, product_id, quantity)
 
     return jsonify({"msg": "Produk berhasil ditambahkan ke keranjang."}), 201
 
@@ -57,7 +66,8 @@ def add_to_cart():
 @jwt_required()
 def get_cart_items():
     """
-    Ambil semua item di keranjang pengguna.
+    Ambil semua item di keranjang pengguna, lengkap dengan harga setelah promosi,
+    total per baris, status stok dan ringkasan keranjang.
     """
     # Ambil user_id dari JWT
     current_user = get_jwt_identity()
@@ -72,28 +82,13 @@ def get_cart_items():
     if not user_id:
         return jsonify({"msg": "User ID tidak valid."}), 400
 
-    # Query untuk mendapatkan item di keranjang
-    cart_items = Cart.query.filter_by(user_id=user_id).all()
+    # Satu query: produk, gambar pertama, promosi aktif, harga per baris + ringkasan
+    cart_data, summary = build_cart_view(user_id)
 
-    if not cart_items:
-        return jsonify({"msg": "Keranjang kosong.", "cart": []}), 200
+    if not cart_data:
+        return jsonify({"msg": "Keranjang kosong.", "cart": [], "summary": summary}), 200
 
-    # Format data keranjang
-    cart_data = [
-        {
-            "id": item.id,
-            "product_id": item.product_id,
-            "quantity": item.quantity,
-            "product_details": {
-                "name": item.product.nama_produk,
-                "price": item.product.harga,
-                "image_url": item.product.images[0].image_url if item.product.images else None
-            }
-        }
-        for item in cart_items
-    ]
-
-    return jsonify({"msg": "Berhasil mendapatkan item di keranjang.", "cart": cart_data}), 200
+    return jsonify({"msg": "Berhasil mendapatkan item di keranjang.", "cart": cart_data, "summary": summary}), 200
 
 
 # Update jumlah produk di keranjang
@@ -116,22 +111,22 @@ def update_cart_item():
         return jsonify({"msg": "User ID tidak valid."}), 400
 
     # Ambil data dari request
-    data = request.get_json()
-    cart_id = data.get("cart_id")
+    data = request.get_json(silent=True)
+    data = data if isinstance(data, dict) else {}
     quantity = data.get("quantity")
+    product_id, cart_id = parse_id(data.get("product_id")), parse_id(data.get("cart_id"))
 
     # Validasi input
-    if not cart_id or not isinstance(quantity, int) or quantity <= 0:
-        return jsonify({"msg": "Keranjang ID dan jumlah harus valid."}), 400
+    if not (product_id or cart_id) or not isinstance(quantity, int) or quantity <= 0:
+        return jsonify({"msg": "Produk ID (atau keranjang ID) dan jumlah harus valid."}), 400
 
-    # Query untuk item di keranjang
-    cart_item = Cart.query.filter_by(id=cart_id, user_id=user_id).first()
-    if not cart_item:
+    # Cari item di keranjang
+    product_id = _resolve_cart_line(user_id, product_id, cart_id)
+    if not product_id:
         return jsonify({"msg": "Item tidak ditemukan di keranjang."}), 404
 
     # Update jumlah item
-    cart_item.quantity = quantity
-    db.session.commit()
+    cart_store.set_many(user_id, {product_id: quantity})
 
     return jsonify({"msg": "Jumlah item berhasil diperbarui."}), 200
 
@@ -156,20 +151,59 @@ def remove_from_cart():
         return jsonify({"msg": "User ID tidak valid."}), 400
 
     # Ambil data dari request
-    data = request.get_json()
-    cart_id = data.get("cart_id")
+    data = request.get_json(silent=True)
+    data = data if isinstance(data, dict) else {}
+    product_id, cart_id = parse_id(data.get("product_id")), parse_id(data.get("cart_id"))
 
     # Validasi input
-    if not cart_id:
-        return jsonify({"msg": "Keranjang ID harus diberikan."}), 400
+    if not (product_id or cart_id):
+        return jsonify({"msg": "Produk ID (atau keranjang ID) harus diberikan."}), 400
 
-    # Query untuk item di keranjang
-    cart_item = Cart.query.filter_by(id=cart_id, user_id=user_id).first()
-    if not cart_item:
+    # Cari item di keranjang
+    product_id = _resolve_cart_line(user_id, product_id, cart_id)
+    if not product_id:
         return jsonify({"msg": "Item tidak ditemukan di keranjang."}), 404
 
     # Hapus item dari keranjang
-    db.session.delete(cart_item)
-    db.session.commit()
+    cart_store.set_many(user_id, {product_id: 0})
+
+    return jsonify({"msg": "Item berhasil dihapus dari keranjang."}), 200
+
+
+# Banyak perubahan keranjang sekaligus
+@jwt_required()
+def batch_update_cart():
+    """
+    Terapkan banyak operasi keranjang dalam satu transaksi.
+    Body: {"operations": [{"op": "add"|"set"|"remove", "product_id": 1, "quantity": 2}, ...]}
+    Mengembalikan isi keranjang setelah perubahan.
+    """
+    # Ambil user_id dari JWT
+    current_user = get_jwt_identity()
+
+    # Decode 'sub' jika diperlukan
+    try:
+        user_data = json.loads(current_user) if isinstance(current_user, str) else current_user
+        user_id = user_data.get("id")
+    except (ValueError, AttributeError):
+        return jsonify({"msg": "User ID tidak valid."}), 400
+
+    if not user_id:
+        return jsonify({"msg": "User ID tidak valid."}), 400
+
+    data = request.get_json(silent=True) or {}
+    operations = data.get("operations") if isinstance(data, dict) else None
+    if not isinstance(operations, list) or not operations:
+        return jsonify({"msg": "operations harus berupa list yang tidak kosong."}), 400
+
+    max_operations = current_app.config.get("CART_BATCH_MAX_OPERATIONS", 100)
+    if len(operations) > max_operations:
+        return jsonify({"msg": f"Maksimal {max_operations} operasi per request."}), 400
+
+    try:
+        apply_cart_operations(user_id, operations)
+    except CartBatchError as e:
+        return jsonify({"msg": "Operasi keranjang tidak valid.", "errors": e.errors}), 400
 
-    return jsonify({"msg": "Item berhasil dihapus dari keranjang."}), 200
\ No newline at end of file
+    cart_data, summary = build_cart_view(user_id)
+    return jsonify({"msg": "Keranjang berhasil diperbarui.", "cart": cart_data, "summary": summary}), 200
@@ -1,60 +1,163 @@
 from flask import Flask, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
+from sqlalchemy import case, update
 from sqlalchemy.exc import SQLAlchemyError
 from connectors.db import db
 from models.cart import Cart
 from models.order import Order
 from models.order_item import OrderItem
-from models.product import Product
+from models.product import Product, product_load_options
 from models.user import User
+from middlewares.replica import use_replica
+from middlewares.idempotency import idempotent
+from services.cart import parse_id
+from services.cart_store import cart_store
+from services.catalog_cache import invalidate_product
 from models.order import Order
 import json
 
+def _insufficient_lines(quantities, stock):
+    return [
+        {"product_id": product_id, "requested": quantity, "available": stock.get(product_id, 0)}
+        for product_id, quantity in quantities.items()
+        if stock.get(product_id, 0) < quantity
+    ]
+
+
+def _merge_lines(products):
+    """
+    Validate the checkout lines and merge lines for the same product.
+    product_id may be an int or a digit string, quantity a positive int.
+    :return: Tuple ({product_id: quantity}, errors); errors lists each bad line by index.
+    """
+    if not isinstance(products, list):
+        return {}, [{"index": None, "message": "products must be a list"}]
+
+    quantities, errors = {}, []
+    for index, item in enumerate(products):
+        if not isinstance(item, dict):
+            errors.append({"index": index, "message": "Each item must be an object"})
+            continue
+        product_id, quantity = parse_id(item.get('product_id')), item.get('quantity')
+        if not product_id:
+            errors.append({"index": index, "message": "product_id must be a positive integer"})
+        elif not isinstance(quantity, int) or isinstance(quantity, bool) or quantity <= 0:
+            errors.append({"index": index, "message": "quantity must be a positive integer"})
+        else:
+            quantities[product_id] = quantities.get(product_id, 0) + quantity
+    return quantities, errors
+
+
+def _decrement_stock(quantities):
+    """
+    UPDATE products SET stok = stok - q WHERE id IN (...) AND stok >= q, for
+    all lines in one statement (q per row via CASE). The stok >= q guard
+    keeps stock from going negative even on databases without row locks.
+    :return: True if every row was updated.
+    """
+    quantity = case(quantities, value=Product.id)
+    result = db.session.execute(
+        update(Product)
+        .where(Product.id.in_(list(quantities)), Product.stok >= quantity)
+        .values(stok=Product.stok - quantity)
+        .execution_options(synchronize_session=False)
+    )
+    return result.rowcount == len(quantities)
+
+
+def _restore_stock(quantities):
+    """
+    UPDATE products SET stok = stok + q for all lines in one statement, so a
+    checkout running at the same time cannot have its decrement overwritten.
+    """
+    quantity = case(quantities, value=Product.id)
+    db.session.execute(
+        update(Product)
+        .where(Product.id.in_(list(quantities)))
+        .values(stok=Product.stok + quantity)
+        .execution_options(synchronize_session=False)
+    )
+
+
 # 1. Checkout Endpoint
 @jwt_required()
+@idempotent
 def checkout():
     try:
-        data = request.get_json()
+        data = request.get_json(silent=True) or {}
+        if not isinstance(data, dict):
+            return jsonify({"message": "Request body must be a JSON object"}), 400
         products = data.get('products')
 
-        if not products:
-            return jsonify({"message": "Products are required"}), 400
-
         # Parse JSON string dari get_jwt_identity()
         user_identity = json.loads(get_jwt_identity())
         user_id = user_identity["id"]
 
+        # Tanpa daftar produk: checkout seluruh keranjang dari satu snapshot cart store
+        from_cart = not products
+        if from_cart:
+            snapshot = cart_store.items(user_id)
+            products = [{"product_id": pid, "quantity": qty} for pid, qty in snapshot.items()]
+            if not products:
+                return jsonify({"message": "Products are required"}), 400
+
+        # Validasi struktur sebelum mengunci apa pun; gabungkan baris dengan produk yang sama
+        quantities, errors = _merge_lines(products)
+        if errors:
+            return jsonify({"message": "Each item must have product_id and quantity", "errors": errors}), 400
+
+        # Kunci semua produk sekaligus, urut id, agar checkout paralel tidak deadlock
+        locked = (
+            Product.query.options(*product_load_options("write"))
+            .filter(Product.id.in_(list(quantities)))
+            .order_by(Product.id)
+            .with_for_update(of=Product)
+            .all()
+        )
+        products_by_id = {product.id: product for product in locked}
+
+        missing = [product_id for product_id in quantities if product_id not in products_by_id]
+        if missing:
+            db.session.rollback()
+            return jsonify({
+                "message": f"Product ID {', '.join(str(pid) for pid in missing)} not found",
+                "missing": missing
+            }), 404
+
+        # Validasi apakah produk dijual oleh toko pengguna
+        own = [product for product in locked if product.store.user_id == user_id]
+        if own:
+            db.session.rollback()
+            return jsonify({
+                "message": f"You cannot purchase your own product: {', '.join(p.nama_produk for p in own)}"
+            }), 400
+
+        # Validasi stok: laporkan semua baris yang kurang sekaligus
+        insufficient = _insufficient_lines(quantities, {p.id: p.stok for p in locked})
+        if insufficient:
+            db.session.rollback()
+            return jsonify({
+                "message": "Some products are not available or have insufficient stock",
+                "insufficient": insufficient
+            }), 400
+
+        # Kurangi stok semua produk dalam satu UPDATE bersyarat (stok >= jumlah)
+        if not _decrement_stock(quantities):
+            db.session.rollback()
+            stock = dict(db.session.query(Product.id, Product.stok).filter(Product.id.in_(list(quantities))).all())
+            return jsonify({
+                "message": "Stock changed during checkout, please try again",
+                "insufficient": _insufficient_lines(quantities, stock)
+            }), 409
+
+        # Harga setelah promosi aktif, sama dengan yang ditampilkan di keranjang
         total_price = 0
         order_items = []
-
-        for item in products:
-            if not item.get('product_id') or not item.get('quantity'):
-                return jsonify({"message": "Each item must have product_id and quantity"}), 400
-
-            product = Product.query.get(item['product_id'])
-            if not product:
-                return jsonify({"message": f"Product ID {item['product_id']} not found"}), 404
-
-            # Validasi apakah produk dijual oleh toko pengguna
-            if product.store.owner.id == user_id:  # Validasi pemilik toko
-                return jsonify({
-                    "message": f"You cannot purchase your own product: {product.nama_produk}"
-                }), 400
-
-            # Validasi stok produk
-            if product.stok < item['quantity']:
-                return jsonify({
-                    "message": f"Product ID {item['product_id']} is not available or insufficient stock"
-                }), 400
-
-            # Kurangi stok produk
-            product.stok -= item['quantity']
-            total_price += product.harga * item['quantity']
-            order_items.append(OrderItem(
-                product_id=item['product_id'],
-                quantity=item['quantity'],
-                price=product.harga * item['quantity']
-            ))
+        for product_id, quantity in quantities.items():
+            line_price = round(products_by_id[product_id].effective_price * quantity, 2)
+            total_price += line_price
+            order_items.append(OrderItem(product_id=product_id, quantity=quantity, price=line_price))
+        total_price = round(total_price, 2)
 
         # Simpan pesanan
         order = Order(user_id=user_id, total_price=total_price, status='Pending')
@@ -68,6 +171,13 @@ def checkout():
 
         db.session.commit()
 
+        # Stok berubah: buang detail dan halaman listing yang memuat produk ini
+        invalidate_product(*quantities)
+
+        if from_cart:
+            # Kurangi (bukan hapus) agar item yang ditambahkan setelah snapshot tetap ada
+            cart_store.deduct(user_id, quantities)
+
         return jsonify({
             "message": "Order placed successfully",
             "order_id": order.id,
@@ -82,6 +192,7 @@ def checkout():
 
 # 2. Daftar Pesanan Endpoint
 @jwt_required()
+@use_replica
 def get_orders():
     try:
         # Parsing JSON string dari get_jwt_identity()
@@ -106,7 +217,7 @@ def get_orders():
         return jsonify({"message": "Error retrieving orders", "error": str(e)}), 500
 
 
-# 3. Detail Pesanan Endpoint
+# 3. Detail Pesanan Endpoint (tetap di primary: biasanya dibuka tepat setelah checkout)
 @jwt_required()
 def get_order(order_id):
     try:
@@ -147,6 +258,7 @@ def get_order(order_id):
 
 # 4. Update Status Pesanan Endpoint
 @jwt_required()
+@idempotent
 def update_order_status(order_id):
     try:
         data = request.get_json()
@@ -179,6 +291,7 @@ def update_order_status(order_id):
 
 # 5. Seller cek Order
 @jwt_required()
+@use_replica
 def seller_get_orders():
     try:
         # Parsing JSON string dari `get_jwt_identity()`
@@ -232,6 +345,7 @@ def seller_get_orders():
         return jsonify({"message": "Error retrieving seller orders", "error": str(e)}), 500
 
 @jwt_required()
+@idempotent
 def cancel_order(order_id):
     """
     Cancel an order if it is still in Pending or Processing status.
@@ -254,20 +368,31 @@ def cancel_order(order_id):
         if order.status == 'Cancelled':
             return jsonify({"message": "Order is already cancelled"}), 400
 
-        # Rollback stok produk dalam pesanan
+        # Ubah status secara bersyarat: dari dua pembatalan paralel hanya satu yang mengembalikan stok
+        claimed = db.session.execute(
+            update(Order)
+            .where(Order.id == order.id, Order.status == order.status)
+            .values(status='Cancelled')
+            .execution_options(synchronize_session=False)
+        ).rowcount
+        if claimed != 1:
+            db.session.rollback()
+            return jsonify({"message": "Order status changed, please try again"}), 409
+
+        # Kembalikan stok produk dalam pesanan (satu UPDATE atomik untuk semua produk)
+        quantities = {}
         for item in order.order_items:
-            product = Product.query.get(item.product_id)
-            if product:
-                product.stok += item.quantity
-
-        # Perbarui status pesanan
-        order.status = 'Cancelled'
+            quantities[item.product_id] = quantities.get(item.product_id, 0) + item.quantity
+        if quantities:
+            _restore_stock(quantities)
         db.session.commit()
 
+        invalidate_product(*quantities)
+
         return jsonify({
             "message": "Order cancelled successfully",
-            "order_id": order.id,
-            "status": order.status
+            "order_id": order_id,
+            "status": "Cancelled"
         }), 200
 
     except SQLAlchemyError as e:
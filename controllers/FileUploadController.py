@@ -1,9 +1,17 @@
-from flask import request, jsonify
-import cloudinary.uploader
+from flask import request, jsonify, current_app, send_from_directory
+from flask_jwt_extended import jwt_required, get_jwt_identity, verify_jwt_in_request
+from connectors.db import db
+from models.product import Product
+from models.product_image import ProductImage
+from models.store import Store
+from services.media import upload_images, spool_images, enqueue_pending_images
+import json
 
 def upload_image():
     """
-    Upload an image to Cloudinary.
+    Upload an image to the configured storage backend (Cloudinary by default).
+    With ?async=1 and a product_id form field, the file is spooled and a pending
+    ProductImage is returned immediately; poll /files/images/<id> for its status.
     """
     if 'file' not in request.files:
         return jsonify({"msg": "No file part in the request"}), 400
@@ -12,12 +20,87 @@ def upload_image():
     if file.filename == '':
         return jsonify({"msg": "No selected file"}), 400
 
+    if request.args.get("async") == "1" or request.form.get("async") == "1":
+        return _upload_image_async(file)
+
     try:
-        # Upload file ke Cloudinary
-        result = cloudinary.uploader.upload(file, folder="ecommerce/uploads")
+        # Upload file ke storage backend; isi yang sudah pernah di-upload dipakai ulang
+        result = upload_images([file], folder="ecommerce/uploads")[0]
+        db.session.commit()
         return jsonify({
             "msg": "File uploaded successfully",
-            "url": result['secure_url']
+            "url": result['url']
         }), 200
     except Exception as e:
         return jsonify({"msg": f"Failed to upload image: {str(e)}"}), 500
+
+
+def _upload_image_async(file):
+    """
+    Spool the file for a product owned by the logged-in seller and queue the transfer.
+    """
+    verify_jwt_in_request()
+    current_user = get_jwt_identity()
+    if isinstance(current_user, str):
+        current_user = json.loads(current_user)
+
+    product_id = request.form.get("product_id", type=int)
+    if not product_id:
+        return jsonify({"msg": "product_id is required for asynchronous uploads"}), 400
+
+    store = Store.query.filter_by(user_id=current_user.get("id")).first()
+    product = db.session.query(Product.id, Product.store_id).filter_by(id=product_id).first()
+    if not store or not product or product.store_id != store.id:
+        return jsonify({"msg": "Unauthorized to upload images for this product"}), 403
+
+    image = spool_images([file], product_id)[0]
+    db.session.commit()
+    if image.status == "pending":
+        enqueue_pending_images([image.id])
+
+    return jsonify({
+        "msg": "File accepted for upload",
+        "image": image.to_dict()
+    }), 202
+
+
+@jwt_required()
+def get_image_status(image_id):
+    """
+    Poll the upload status of an image ('pending', 'ready' or 'failed').
+    Only the seller whose store owns the product can see it.
+    """
+    current_user = get_jwt_identity()
+    if isinstance(current_user, str):
+        current_user = json.loads(current_user)
+
+    image = ProductImage.query.get(image_id)
+    if not image:
+        return jsonify({"msg": "Image not found"}), 404
+
+    owner_id = (
+        db.session.query(Store.user_id)
+        .join(Product, Product.store_id == Store.id)
+        .filter(Product.id == image.product_id)
+        .scalar()
+    )
+    if owner_id != current_user.get("id"):
+        return jsonify({"msg": "Unauthorized to view this image"}), 403
+
+    return jsonify({
+        "id": image.id,
+        "product_id": image.product_id,
+        "status": image.status,
+        "url": image.image_url,
+        "attempts": image.attempts,
+        "last_error": image.last_error
+    }), 200
+
+
+def serve_local_media(filename):
+    """
+    Serve files stored by the local filesystem backend (IMAGE_UPLOADER=local).
+    """
+    if current_app.config.get("IMAGE_UPLOADER") != "local":
+        return jsonify({"msg": "Not found"}), 404
+    return send_from_directory(current_app.config["MEDIA_LOCAL_ROOT"], filename)
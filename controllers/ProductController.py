@@ -1,88 +1,88 @@
-from flask import request, jsonify, current_app
+from flask import request, jsonify, current_app, Response, stream_with_context
 from flask_jwt_extended import jwt_required, get_jwt_identity, verify_jwt_in_request
+from sqlalchemy.exc import SQLAlchemyError
 from connectors.db import db
-from models.product import Product
+from models.product import Product, product_load_options
 from models.product_image import ProductImage
 from models.store import Store
-from models.promotion import Promotion
+from services.catalog import (
+    serialize_products, serialize_product, iter_catalog, parse_fields, fieldset_load_options, FieldsetError
+)
+from services.pagination import paginate_products, CursorError
+from services.search import apply_product_filters, compute_facets
+from services.catalog_cache import (
+    cached_response, catalog_cache_key, fill_from_primary, invalidate_product, invalidate_listings, listing_fields,
+    LISTINGS_TAG
+)
+from connectors.cache import cache
+from services.pricing import refresh_effective_prices
+from services.product_validation import validate_product_data
+from services.product_import import read_rows, import_products, fetch_product_images, ImportFormatError
+from services.background import submit
+from services.media import upload_images, UploadError, spool_images, enqueue_pending_images, sync_product_images
+from services.suggest import suggest_products, index_product, unindex_product
+from services.etag import product_versions, compute_etag, etag_matches, not_modified, conditional_response
+from middlewares.replica import use_replica
 from datetime import datetime
-import cloudinary.uploader
 import json
-from sqlalchemy import or_
+import csv
 
 
-def search_and_filter_products():
+def wants_async_upload():
     """
-    Search and filter products based on query parameters, including associated promotions.
+    Images are spooled and uploaded in the background when ?async=1 (or form field async=1) is sent.
     """
-    search = request.args.get('search', '')
-    category = request.args.get('category', '')
-    animal_type = request.args.get('jenis_hewan', '')
-    min_price = request.args.get('min_price', type=float)
-    max_price = request.args.get('max_price', type=float)
-    sort_by = request.args.get('sort_by', 'nama_produk')
-    order = request.args.get('order', 'asc')
-
-    query = Product.query
-
-    if search:
-        query = query.filter(
-            or_(
-                Product.nama_produk.ilike(f"%{search}%"),
-                Product.deskripsi.ilike(f"%{search}%")
-            )
-        )
+    return request.args.get("async") == "1" or request.form.get("async") == "1"
 
-    if category:
-        query = query.filter(Product.kategori == category)
 
-    if animal_type:
-        query = query.filter(Product.jenis_hewan == animal_type)
+def requested_fields():
+    """
+    Sparse fieldset from ?fields=nama_produk,harga,images (None = full shape).
+    """
+    return parse_fields(request.args.get("fields"))
 
-    if min_price is not None:
-        query = query.filter(Product.harga >= min_price)
-    if max_price is not None:
-        query = query.filter(Product.harga <= max_price)
 
-    if sort_by in ['harga', 'nama_produk']:
-        query = query.order_by(
-            getattr(Product, sort_by).desc() if order == 'desc' else getattr(Product, sort_by).asc()
-        )
+def listing_response(msg, products, next_cursor, include_dimensions=True, fields=None):
+    """
+    Build a paginated listing response with a strong ETag.
+    The ETag is computed from version markers only, so a 304 skips loading images and promotions.
+    """
+    versions = product_versions(product.id for product in products)
+    etag = compute_etag(next_cursor, [(product.id, versions.get(product.id)) for product in products])
 
-    products = query.all()
+    return conditional_response(etag, lambda: jsonify({
+        "msg": msg,
+        "products": serialize_products(products, include_dimensions=include_dimensions, fields=fields),
+        "next_cursor": next_cursor
+    }))
 
-    if not products:
-        return jsonify({"msg": "No products found"}), 404
 
-    products_list = []
-    for product in products:
-        promotion = (
-            Promotion.query.filter_by(product_id=product.id)
-            .order_by(Promotion.id.desc())
-            .first()
+@use_replica
+def search_and_filter_products():
+    """
+    Search and filter products based on query parameters, including associated promotions.
+    Results are paginated with a cursor (see services.pagination). When a search
+    term is given and no sort_by is requested, results are ranked by relevance.
+    """
+    query, relevance = apply_product_filters(Product.query, request.args)
+    extra_sorts = {'relevance': relevance} if relevance is not None else {}
+
+    try:
+        fields = requested_fields()
+        default_sort = 'relevance' if extra_sorts else 'nama_produk'
+        products, next_cursor = paginate_products(
+            query, request.args, default_sort=default_sort, extra_sorts=extra_sorts, fields=fields
         )
-        product_data = {
-            "id": product.id,
-            "nama_produk": product.nama_produk,
-            "deskripsi": product.deskripsi,
-            "harga": product.harga,
-            "stok": product.stok,
-            "images": [{"id": img.id, "url": img.image_url} for img in product.images],
-            "kategori": product.kategori,
-            "jenis_hewan": product.jenis_hewan,
-            "berat": product.berat,
-            "ukuran": {
-                "panjang": product.panjang,
-                "lebar": product.lebar,
-                "tinggi": product.tinggi,
-            },
-            "promotion": promotion.to_dict() if promotion else None,
-        }
-        products_list.append(product_data)
+    except (CursorError, FieldsetError) as e:
+        return jsonify({"msg": str(e)}), 400
+
+    if not products and not request.args.get('cursor'):
+        return jsonify({"msg": "No products found"}), 404
 
-    return jsonify({"msg": "Products retrieved successfully", "products": products_list}), 200
+    return listing_response("Products retrieved successfully", products, next_cursor, fields=fields)
 
 
+@use_replica
 def get_products_by_category():
     """
     Get products by category, including associated promotions.
@@ -92,34 +92,19 @@ def get_products_by_category():
     if not category:
         return jsonify({"msg": "Category parameter is required"}), 400
 
-    products = Product.query.filter_by(kategori=category).all()
+    try:
+        fields = requested_fields()
+        products, next_cursor = paginate_products(Product.query.filter_by(kategori=category), request.args, fields=fields)
+    except (CursorError, FieldsetError) as e:
+        return jsonify({"msg": str(e)}), 400
 
-    if not products:
+    if not products and not request.args.get('cursor'):
         return jsonify({"msg": f"No products found for category '{category}'"}), 404
 
-    products_list = []
-    for product in products:
-        promotion = (
-            Promotion.query.filter_by(product_id=product.id)
-            .order_by(Promotion.id.desc())
-            .first()
-        )
-        product_data = {
-            "id": product.id,
-            "nama_produk": product.nama_produk,
-            "deskripsi": product.deskripsi,
-            "harga": product.harga,
-            "stok": product.stok,
-            "images": [{"id": img.id, "url": img.image_url} for img in product.images],
-            "kategori": product.kategori,
-            "jenis_hewan": product.jenis_hewan,
-            "promotion": promotion.to_dict() if promotion else None,
-        }
-        products_list.append(product_data)
-
-    return jsonify({"msg": "Products by category retrieved successfully", "products": products_list}), 200
+    return listing_response("Products by category retrieved successfully", products, next_cursor, include_dimensions=False, fields=fields)
 
 
+@use_replica
 def get_products_by_animal_type():
     """
     Get products by animal type, including associated promotions.
@@ -129,77 +114,96 @@ def get_products_by_animal_type():
     if not animal_type:
         return jsonify({"msg": "Animal type parameter is required"}), 400
 
-    products = Product.query.filter_by(jenis_hewan=animal_type).all()
+    try:
+        fields = requested_fields()
+        products, next_cursor = paginate_products(Product.query.filter_by(jenis_hewan=animal_type), request.args, fields=fields)
+    except (CursorError, FieldsetError) as e:
+        return jsonify({"msg": str(e)}), 400
 
-    if not products:
+    if not products and not request.args.get('cursor'):
         return jsonify({"msg": f"No products found for animal type '{animal_type}'"}), 404
 
-    products_list = []
-    for product in products:
-        promotion = (
-            Promotion.query.filter_by(product_id=product.id)
-            .order_by(Promotion.id.desc())
-            .first()
-        )
-        product_data = {
-            "id": product.id,
-            "nama_produk": product.nama_produk,
-            "deskripsi": product.deskripsi,
-            "harga": product.harga,
-            "stok": product.stok,
-            "images": [{"id": img.id, "url": img.image_url} for img in product.images],
-            "kategori": product.kategori,
-            "jenis_hewan": product.jenis_hewan,
-            "promotion": promotion.to_dict() if promotion else None,
-        }
-        products_list.append(product_data)
-
-    return jsonify({"msg": "Products by animal type retrieved successfully", "products": products_list}), 200
+    return listing_response("Products by animal type retrieved successfully", products, next_cursor, include_dimensions=False, fields=fields)
 
 
+@cached_response("listing")
+@use_replica
 def get_public_products():
     """
-    Retrieve all products, including associated promotions.
+    Retrieve all products, including associated promotions, one cursor page at a time.
     """
     try:
-        products = Product.query.all()
-        if not products:
+        fields = requested_fields()
+        products, next_cursor = paginate_products(Product.query, request.args, fields=fields)
+        if not products and not request.args.get('cursor'):
             return jsonify({"msg": "No products found"}), 404
 
-        products_list = []
-        for product in products:
-            promotion = (
-                Promotion.query.filter_by(product_id=product.id)
-                .order_by(Promotion.id.desc())
-                .first()
-            )
-            product_data = {
-                "id": product.id,
-                "nama_produk": product.nama_produk,
-                "deskripsi": product.deskripsi,
-                "harga": product.harga,
-                "stok": product.stok,
-                "images": [{"id": img.id, "url": img.image_url} for img in product.images],
-                "kategori": product.kategori,
-                "jenis_hewan": product.jenis_hewan,
-                "berat": product.berat,
-                "ukuran": {
-                    "panjang": product.panjang,
-                    "lebar": product.lebar,
-                    "tinggi": product.tinggi,
-                },
-                "promotion": promotion.to_dict() if promotion else None,
-            }
-            products_list.append(product_data)
-
-        return jsonify({"msg": "Products retrieved successfully", "products": products_list}), 200
+        return listing_response("Products retrieved successfully", products, next_cursor, fields=fields)
 
+    except (CursorError, FieldsetError) as e:
+        return jsonify({"msg": str(e)}), 400
     except Exception as e:
         return jsonify({"msg": f"Error retrieving products: {str(e)}"}), 500
 
 
+@use_replica
+def export_products():
+    """
+    Stream the full catalog for feed exports.
+    Use ?format=ndjson (default) for one product per line or ?format=json for a single array.
+    """
+    fmt = request.args.get('format', 'ndjson')
+    if fmt not in ('ndjson', 'json'):
+        return jsonify({"msg": "Invalid format. Valid options: ndjson, json"}), 400
+
+    try:
+        fields = requested_fields()
+    except FieldsetError as e:
+        return jsonify({"msg": str(e)}), 400
+
+    batch_size = current_app.config.get("CATALOG_EXPORT_BATCH_SIZE", 500)
+    mimetype = "application/x-ndjson" if fmt == "ndjson" else "application/json"
+    return Response(
+        stream_with_context(iter_catalog(batch_size=batch_size, fmt=fmt, fields=fields)), mimetype=mimetype
+    )
+
+
+def suggest_product_names():
+    """
+    Autocomplete product names for the search box, best sellers first.
+    Answered from an in-memory prefix index, without a database query.
+    """
+    query = request.args.get('q', '')
+    try:
+        limit = min(max(int(request.args.get('limit', 10)), 1), 20)
+    except ValueError:
+        return jsonify({"msg": "Limit must be an integer"}), 400
+
+    suggestions = [
+        {"id": product_id, "nama_produk": name} for product_id, name in suggest_products(query, limit)
+    ]
+    return jsonify({"msg": "Suggestions retrieved successfully", "suggestions": suggestions}), 200
+
+
+@use_replica
+def get_product_facets():
+    """
+    Facet counts (kategori, jenis_hewan, price buckets) for the same filters as the search route.
+    """
+    key = catalog_cache_key("facets")
+    facets = cache.get(key)
+    if facets is None:
+        fill_from_primary()
+        facets = compute_facets(request.args, current_app.config.get("FACET_PRICE_BUCKETS", []))
+        cache.set(key, facets, ttl=current_app.config.get("FACET_CACHE_TTL"), tags=[LISTINGS_TAG])
+
+    return jsonify({"msg": "Product facets retrieved successfully", "facets": facets}), 200
+
+
 # Public or seller-specific endpoint to retrieve a product by ID
 @jwt_required(optional=True)
+@cached_response("detail")
+@use_replica
 def get_product_by_id(product_id):
     """
     Retrieve a specific product by its ID, including associated promotion if available.
@@ -213,38 +217,94 @@ def get_product_by_id(product_id):
     except Exception as e:
         current_app.logger.info(f"No token provided or invalid token: {str(e)}")
 
-    # Ambil data produk berdasarkan ID
-    product = Product.query.get(product_id)
-    if not product:
+    try:
+        fields = requested_fields()
+    except FieldsetError as e:
+        return jsonify({"msg": str(e)}), 400
+
+    # Cek versi produk dulu; jika client sudah punya versi ini, cukup balas 304
+    version = product_versions([product_id]).get(product_id)
+    if version is None:
         return jsonify({"msg": "Product not found"}), 404
 
-    # Ambil promosi terkait berdasarkan product_id
-    promotion = (
-        Promotion.query.filter_by(product_id=product.id)
-        .order_by(Promotion.id.desc())  # Jika ada beberapa promosi, ambil yang terakhir
-        .first()
+    etag = compute_etag(version)
+    if etag_matches(etag):
+        return not_modified(etag)
+
+    # Ambil data produk berdasarkan ID (gambar & promosi dimuat oleh serializer)
+    product = (
+        Product.query.options(*product_load_options("listing"), *fieldset_load_options(fields)).get(product_id)
     )
+    if not product:
+        return jsonify({"msg": "Product not found"}), 404
+
+    # Format data produk untuk respons, termasuk promosi terbaru jika ada
+    product_data = serialize_product(product, fields=fields)
 
-    # Format data produk untuk respons
-    product_data = {
-        "id": product.id,
-        "nama_produk": product.nama_produk,
-        "deskripsi": product.deskripsi,
-        "harga": product.harga,
-        "stok": product.stok,
-        "images": [{"id": img.id, "url": img.image_url} for img in product.images],
-        "kategori": product.kategori,
-        "jenis_hewan": product.jenis_hewan,
-        "berat": product.berat,
-        "ukuran": {
-            "panjang": product.panjang,
-            "lebar": product.lebar,
-            "tinggi": product.tinggi,
-        },
-        "promotion": promotion.to_dict() if promotion else None,  # Sertakan data promosi jika ada
-    }
-
-    return jsonify({"msg": "Product retrieved successfully", "product": product_data}), 200
+    response = jsonify({"msg": "Product retrieved successfully", "product": product_data})
+    response.set_etag(etag)
+    return response, 200
+
+
+def _parse_batch_ids():
+    """
+    Read product ids from ?ids=1,2,3 (GET) or a JSON body {"ids": [...]} (POST).
+    Duplicates are dropped, request order is kept.
+    """
+    if request.method == "POST":
+        raw = (request.get_json(silent=True) or {}).get("ids")
+        if not isinstance(raw, list):
+            raise ValueError("Body must be a JSON object with an 'ids' list")
+    else:
+        raw = [part for part in request.args.get("ids", "").split(",") if part.strip()]
+
+    try:
+        ids = list(dict.fromkeys(int(value) for value in raw))
+    except (TypeError, ValueError):
+        raise ValueError("ids must be integers")
+
+    if not ids:
+        raise ValueError("At least one id is required")
+    max_ids = current_app.config.get("PRODUCT_BATCH_MAX_IDS", 500)
+    if len(ids) > max_ids:
+        raise ValueError(f"At most {max_ids} ids per request")
+    return ids
+
+
+@use_replica
+def get_products_batch():
+    """
+    Retrieve several products by ID in one response, in the detail shape of get_product_by_id.
+    Uses a fixed number of queries regardless of how many ids are requested;
+    ids that don't exist are listed under "missing".
+    """
+    try:
+        ids = _parse_batch_ids()
+        fields = requested_fields()
+    except ValueError as e:
+        return jsonify({"msg": str(e)}), 400
+
+    versions = product_versions(ids)
+    found_ids = [product_id for product_id in ids if product_id in versions]
+    missing = [product_id for product_id in ids if product_id not in versions]
+    etag = compute_etag([(product_id, versions[product_id]) for product_id in found_ids], missing)
+
+    def build():
+        products = (
+            Product.query.options(*product_load_options("listing"), *fieldset_load_options(fields))
+            .filter(Product.id.in_(found_ids))
+            .all()
+        ) if found_ids else []
+        # Kembalikan sesuai urutan id yang diminta
+        position = {product_id: index for index, product_id in enumerate(found_ids)}
+        products.sort(key=lambda product: position[product.id])
+        return jsonify({
+            "msg": "Products retrieved successfully",
+            "products": serialize_products(products, fields=fields),
+            "missing": missing
+        })
+
+    return conditional_response(etag, build)
 
 
 # Create a new product
@@ -265,30 +325,20 @@ def create_product():
     if not store:
         return jsonify({"msg": "You don't have a registered store"}), 403
 
-    data = request.form.to_dict()
-    required_fields = ["nama_produk", "harga", "stok", "kategori", "jenis_hewan", "berat"]
-    missing_fields = [field for field in required_fields if not data.get(field)]
-    if missing_fields:
-        return jsonify({"msg": f"Missing required fields: {', '.join(missing_fields)}"}), 400
-
-    valid_categories = ["makanan", "kesehatan", "mainan", "peralatan"]
-    valid_animals = ["anjing", "kucing", "hamster", "burung", "kelinci"]
-
-    if data["kategori"] not in valid_categories:
-        return jsonify({"msg": f"Invalid category. Valid options: {', '.join(valid_categories)}"}), 400
-    if data["jenis_hewan"] not in valid_animals:
-        return jsonify({"msg": f"Invalid animal type. Valid options: {', '.join(valid_animals)}"}), 400
-
-    # Validate numeric fields
-    try:
-        data["harga"] = float(data["harga"])
-        data["stok"] = int(data["stok"])
-        data["berat"] = float(data["berat"])
-        data["panjang"] = float(data.get("panjang", 0)) if data.get("panjang") else None
-        data["lebar"] = float(data.get("lebar", 0)) if data.get("lebar") else None
-        data["tinggi"] = float(data.get("tinggi", 0)) if data.get("tinggi") else None
-    except ValueError:
-        return jsonify({"msg": "Invalid numeric value for harga, stok, or berat"}), 400
+    data, error = validate_product_data(request.form.to_dict())
+    if error:
+        return jsonify({"msg": error}), 400
+
+    # Upload images secara paralel sebelum menyimpan apa pun; jika satu gagal, tidak ada yang disimpan.
+    # Mode async: file disimpan ke spool dan di-upload oleh background worker.
+    async_upload = wants_async_upload()
+    uploaded = []
+    if not async_upload:
+        try:
+            uploaded = upload_images(request.files.getlist("images"))
+        except UploadError as e:
+            current_app.logger.error(f"Failed to upload image: {e}")
+            return jsonify({"msg": f"Failed to upload image: {str(e)}"}), 500
 
     # Create new product
     new_product = Product(
@@ -305,30 +355,20 @@ def create_product():
         store_id=store.id,
         created_at=datetime.utcnow()
     )
+    new_images = [ProductImage(image_url=item["url"], content_hash=item["content_hash"]) for item in uploaded]
+    new_product.images = new_images
     db.session.add(new_product)
+    if async_upload:
+        db.session.flush()
+        new_images = spool_images(request.files.getlist("images"), new_product.id)
     db.session.commit()
+    if async_upload:
+        enqueue_pending_images([img.id for img in new_images if img.status == "pending"])
+    product_images = [{"id": img.id, "url": img.image_url, "status": img.status} for img in new_images]
 
-    # Upload images
-    product_images = []
-    if "images" in request.files:
-        images = request.files.getlist("images")
-        for image in images:
-            try:
-                result = cloudinary.uploader.upload(image)
-                image_url = result["secure_url"]
-
-                # Save image to database
-                product_image = ProductImage(
-                    product_id=new_product.id,
-                    image_url=image_url
-                )
-                db.session.add(product_image)
-                product_images.append({"id": product_image.id, "url": image_url})
-            except Exception as e:
-                current_app.logger.error(f"Failed to upload image: {e}")
-                return jsonify({"msg": f"Failed to upload image: {str(e)}"}), 500
-
-    db.session.commit()
+    # Produk baru bisa muncul di halaman listing mana pun
+    invalidate_listings()
+    index_product(new_product.id, new_product.nama_produk)
 
     return jsonify({
         "msg": "Product created successfully",
@@ -340,6 +380,62 @@ def create_product():
     }), 201
 
 @jwt_required()
+def bulk_import_products():
+    """
+    Import many products for the logged-in seller's store from a CSV or JSONL file.
+    Rows are validated like create_product; image_urls (separated by '|') are fetched in the background.
+    """
+    current_user = get_jwt_identity()
+    if isinstance(current_user, str):
+        current_user = json.loads(current_user)
+
+    user_id = current_user.get("id")
+    store = Store.query.filter_by(user_id=user_id).first()
+    if not store:
+        return jsonify({"msg": "You don't have a registered store"}), 403
+
+    file = request.files.get("file")
+    if not file or file.filename == '':
+        return jsonify({"msg": "No file part in the request"}), 400
+
+    try:
+        rows = read_rows(file, request.form.get("format"))
+    except (ImportFormatError, UnicodeDecodeError, csv.Error) as e:
+        return jsonify({"msg": f"Invalid import file: {str(e)}"}), 400
+
+    max_rows = current_app.config.get("PRODUCT_IMPORT_MAX_ROWS", 5000)
+    if not rows:
+        return jsonify({"msg": "Import file is empty"}), 400
+    if len(rows) > max_rows:
+        return jsonify({"msg": f"Too many rows, maximum is {max_rows}"}), 400
+
+    try:
+        created, errors, pending_images = import_products(
+            rows, store.id, batch_size=current_app.config.get("PRODUCT_IMPORT_BATCH_SIZE", 500)
+        )
+    except SQLAlchemyError as e:
+        current_app.logger.error(f"Product import failed: {e}")
+        return jsonify({"msg": "Import failed, no products were saved"}), 500
+
+    if created:
+        invalidate_listings()
+        for item in created:
+            index_product(item["id"], str(rows[item["row"] - 1].get("nama_produk", "")).strip())
+    if pending_images:
+        submit(fetch_product_images, pending_images)
+
+    return jsonify({
+        "msg": "Products imported",
+        "imported": len(created),
+        "failed": len(errors),
+        "products": created,
+        "errors": errors,
+        "pending_images": sum(len(urls) for _, urls in pending_images)
+    }), 201 if created else 400
+
+
+@jwt_required()
+@use_replica
 def get_seller_products():
     """
     Retrieve products for the logged-in seller's store, including promotion details.
@@ -353,36 +449,18 @@ def get_seller_products():
     if not store:
         return jsonify({"msg": "You don't have a registered store"}), 403
 
-    products = Product.query.filter_by(store_id=store.id).all()
-    if not products:
-        return jsonify({"msg": "No products found for your store"}), 404
-
-    products_list = []
-    for product in products:
-        promotion = (
-            Promotion.query.filter_by(product_id=product.id)
-            .order_by(Promotion.id.desc())
-            .first()
+    try:
+        fields = requested_fields()
+        products, next_cursor = paginate_products(
+            Product.query.filter_by(store_id=store.id), request.args, fields=fields
         )
-        products_list.append({
-            "id": product.id,
-            "nama_produk": product.nama_produk,
-            "deskripsi": product.deskripsi,
-            "harga": product.harga,
-            "stok": product.stok,
-            "images": [{"id": img.id, "url": img.image_url} for img in product.images],
-            "kategori": product.kategori,
-            "jenis_hewan": product.jenis_hewan,
-            "berat": product.berat,
-            "ukuran": {
-                "panjang": product.panjang,
-                "lebar": product.lebar,
-                "tinggi": product.tinggi,
-            },
-            "promotion": promotion.to_dict() if promotion else None  # Sertakan promosi
-        })
+    except (CursorError, FieldsetError) as e:
+        return jsonify({"msg": str(e)}), 400
+
+    if not products and not request.args.get('cursor'):
+        return jsonify({"msg": "No products found for your store"}), 404
 
-    return jsonify({"msg": "Seller products retrieved successfully", "products": products_list}), 200
+    return listing_response("Seller products retrieved successfully", products, next_cursor, fields=fields)
 
 @jwt_required()
 def update_product(product_id):
@@ -398,11 +476,13 @@ def update_product(product_id):
     if not store:
         return jsonify({"msg": "You don't have a registered store"}), 403
 
-    product = Product.query.get(product_id)
+    product = Product.query.options(*product_load_options("detail")).get(product_id)
     if not product or product.store_id != store.id:
         return jsonify({"msg": "Unauthorized to update this product"}), 403
 
     data = request.form.to_dict()
+    name_before = product.nama_produk
+    listing_before = listing_fields(product)
 
     # Update product attributes
     product.nama_produk = data.get("nama_produk", product.nama_produk)
@@ -416,33 +496,32 @@ def update_product(product_id):
     product.lebar = float(data.get("lebar", product.lebar)) if data.get("lebar") else product.lebar
     product.tinggi = float(data.get("tinggi", product.tinggi)) if data.get("tinggi") else product.tinggi
 
-    # Handle new images if provided
+    # Handle new images if provided: hanya gambar yang isinya berubah yang di-upload/dihapus
+    pending_images = []
     if "images" in request.files:
-        images = request.files.getlist("images")
-        # Delete existing images if new ones are uploaded
-        for img in product.images:
-            db.session.delete(img)
-
-        for image in images:
-            try:
-                # Upload to Cloudinary
-                result = cloudinary.uploader.upload(image)
-                image_url = result["secure_url"]
-
-                # Save the new image to ProductImage
-                product_image = ProductImage(
-                    product_id=product.id,
-                    image_url=image_url
-                )
-                db.session.add(product_image)
-            except Exception as e:
-                current_app.logger.error(f"Failed to upload image: {e}")
-                return jsonify({"msg": f"Failed to upload image: {str(e)}"}), 500
-
+        try:
+            new_images = sync_product_images(product, request.files.getlist("images"), wants_async_upload())
+        except UploadError as e:
+            db.session.rollback()
+            current_app.logger.error(f"Failed to upload image: {e}")
+            return jsonify({"msg": f"Failed to upload image: {str(e)}"}), 500
+        pending_images = [img for img in new_images if img.status == "pending"]
+
+    # Harga dasar bisa berubah, hitung ulang harga setelah promosi
+    refresh_effective_prices([product.id])
     db.session.commit()
+    if pending_images:
+        enqueue_pending_images([img.id for img in pending_images])
+
+    invalidate_product(product.id)
+    if product.nama_produk != name_before:
+        index_product(product.id, product.nama_produk)
+    if listing_fields(product) != listing_before:
+        # Urutan listing, hasil filter atau facet berubah, halaman lain juga bisa terpengaruh
+        invalidate_listings()
 
     # Fetch all updated images for the product
-    product_images = [{"id": img.id, "url": img.image_url} for img in product.images]
+    product_images = [{"id": img.id, "url": img.image_url, "status": img.status} for img in product.images]
 
     return jsonify({
         "msg": "Product updated successfully",
@@ -474,4 +553,9 @@ def delete_product(product_id):
     db.session.delete(product)
     db.session.commit()
 
+    # Produk hilang dari listing dan hitungan facet
+    invalidate_product(product_id)
+    invalidate_listings()
+    unindex_product(product_id)
+
     return jsonify({"msg": "Product deleted successfully"}), 200
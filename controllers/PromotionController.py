@@ -2,9 +2,12 @@ from flask import request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from connectors.db import db
 from models.promotion import Promotion
-from models.product import Product
+from models.product import Product, product_load_options
 from models.store import Store
 from models.user import User
+from services.catalog_cache import invalidate_product, invalidate_listings
+from services.pricing import refresh_effective_prices
+from middlewares.replica import use_replica
 from datetime import datetime
 import json
 
@@ -136,8 +139,13 @@ def update_promotion():
         promotion.max_quantity = int(data["max_quantity"])
         promotion.discount_percent = float(data["discount"])
 
+        price_changed = refresh_effective_prices([promotion.product_id])
         db.session.commit()
 
+        invalidate_product(promotion.product_id)
+        if price_changed:
+            invalidate_listings()
+
         return jsonify({
             "msg": "Promotion updated successfully",
             "promotion": promotion.to_dict()
@@ -149,6 +157,7 @@ def update_promotion():
 
 
 @jwt_required()
+@use_replica
 def get_all_promotions():
     """Retrieve all promotions created by the current user's store."""
     try:
@@ -226,7 +235,7 @@ def assign_promotion_to_product():
             return jsonify({"msg": "Unauthorized to assign this promotion"}), 403
 
         # Get Product
-        product = Product.query.get(product_id)
+        product = Product.query.options(*product_load_options("write")).get(product_id)
         if not product:
             return jsonify({"msg": "Product not found"}), 404
 
@@ -235,9 +244,15 @@ def assign_promotion_to_product():
             return jsonify({"msg": "Unauthorized to assign promotion to this product"}), 403
 
         # Assign Promotion to Product
+        previous_product_id = promotion.product_id
         promotion.product_id = product.id  # Update promotion_id in promotions table
+        price_changed = refresh_effective_prices([previous_product_id, product.id])
         db.session.commit()
 
+        invalidate_product(previous_product_id, product.id)
+        if price_changed:
+            invalidate_listings()
+
         return jsonify({
             "msg": "Promotion assigned to product successfully",
             "product_id": product.id,
@@ -258,8 +273,14 @@ def delete_promotion(promotion_id):
         if not promotion:
             return jsonify({"msg": "Promotion not found"}), 404
 
+        product_id = promotion.product_id
         db.session.delete(promotion)
+        price_changed = refresh_effective_prices([product_id])
         db.session.commit()
+
+        invalidate_product(product_id)
+        if price_changed:
+            invalidate_listings()
         return jsonify({"msg": "Promotion deleted successfully"}), 200
 
     except Exception as e:
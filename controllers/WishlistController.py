@@ -1,8 +1,11 @@
 from flask import jsonify, request
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from models.wishlist import Wishlist
-from models.product import Product
+from models.product import Product, product_load_options
 from connectors.db import db
+from middlewares.replica import use_replica
+from services.upsert import upsert
+from sqlalchemy.exc import IntegrityError
 import json
 
 @jwt_required()
@@ -23,24 +26,26 @@ def add_to_wishlist():
     if not product_id:
         return jsonify({"msg": "Product ID is required"}), 400
 
-    # Cek apakah produk ada
-    product = Product.query.get(product_id)
+    # Cek apakah produk ada (cukup id, tanpa memuat kolom lain)
+    product = db.session.query(Product.id).filter_by(id=product_id).first()
     if not product:
         return jsonify({"msg": "Product not found"}), 404
 
-    # Cek apakah produk sudah ada di wishlist
-    existing_wishlist = Wishlist.query.filter_by(user_id=user_id, product_id=product_id).first()
-    if existing_wishlist:
+    # Tambahkan ke wishlist dalam satu statement; unique (user_id, product_id) mencegah duplikat
+    try:
+        result = upsert(Wishlist, {"user_id": user_id, "product_id": product_id}, conflict_columns=["user_id", "product_id"])
+    except IntegrityError:
+        db.session.rollback()
+        return jsonify({"msg": "Product is already in the wishlist"}), 400
+    if result.rowcount == 0:
+        db.session.rollback()
         return jsonify({"msg": "Product is already in the wishlist"}), 400
-
-    # Tambahkan ke wishlist
-    wishlist = Wishlist(user_id=user_id, product_id=product_id)
-    db.session.add(wishlist)
     db.session.commit()
 
     return jsonify({"msg": "Product added to wishlist"}), 201
 
 @jwt_required()
+@use_replica
 def get_wishlist():
     # Ambil user_id dari JWT
     raw_user_id = get_jwt_identity()
@@ -54,6 +59,7 @@ def get_wishlist():
     wishlist_items = (
         db.session.query(Wishlist, Product)
         .join(Product, Wishlist.product_id == Product.id)
+        .options(*product_load_options("detail"))
         .filter(Wishlist.user_id == user_id)
         .all()
     )
@@ -68,7 +74,7 @@ def get_wishlist():
             "product_id": item.Product.id,
             "product_name": item.Product.nama_produk,
             "product_price": item.Product.harga,
-            "product_images": [{"url": img.image_url} for img in item.Product.images],
+            "product_images": [{"url": img.image_url} for img in item.Product.images if img.status == "ready"],
         }
         for item in wishlist_items
     ]
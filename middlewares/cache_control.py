@@ -0,0 +1,19 @@
+from flask import request
+
+
+def init_cache_control(app):
+    """
+    Add a Cache-Control header to successful GET responses based on the blueprint.
+    Policies come from CACHE_CONTROL_POLICIES, e.g. {"products": "public, max-age=30"}.
+    """
+    @app.after_request
+    def apply_cache_control(response):
+        if request.method not in ("GET", "HEAD") or response.status_code not in (200, 304):
+            return response
+        if "Cache-Control" in response.headers:
+            return response
+
+        policy = app.config.get("CACHE_CONTROL_POLICIES", {}).get(request.blueprint)
+        if policy:
+            response.headers["Cache-Control"] = policy
+        return response
@@ -0,0 +1,148 @@
+import gzip
+import zlib
+from flask import request
+
+try:
+    import brotli  # Opsional: pip install brotli
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE_MIMETYPES = {
+    "application/json",
+    "application/x-ndjson",
+    "application/javascript",
+    "text/html",
+    "text/plain",
+    "text/css",
+    "text/csv",
+}
+
+
+def available_encodings():
+    return ("br", "gzip") if brotli is not None else ("gzip",)
+
+
+def negotiate_encoding():
+    """
+    Pick the content coding for this request from Accept-Encoding.
+    Brotli wins over gzip when the client accepts both equally.
+    :return: 'br', 'gzip' or None.
+    """
+    best, best_quality = None, 0
+    for encoding in available_encodings():
+        quality = request.accept_encodings.quality(encoding)
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+def compress_body(data, encoding, config):
+    if encoding == "br":
+        return brotli.compress(data, quality=config.get("COMPRESS_BROTLI_QUALITY", 5))
+    return gzip.compress(data, compresslevel=config.get("COMPRESS_LEVEL", 6), mtime=0)
+
+
+def compress_variants(data, config):
+    """
+    Compress a body with every available coding, for callers that cache the result.
+    Bodies below COMPRESS_MIN_SIZE are not worth it and give an empty dict.
+    """
+    if len(data) < config.get("COMPRESS_MIN_SIZE", 1024):
+        return {}
+    return {encoding: compress_body(data, encoding, config) for encoding in available_encodings()}
+
+
+def encoded_etag(etag, encoding):
+    """
+    Each coding is a different representation, so it gets its own strong ETag.
+    """
+    return f"{etag}-{encoding}"
+
+
+def use_encoded_body(response, body, encoding):
+    """
+    Put an already compressed body on the response and set the matching headers.
+    """
+    etag, weak = response.get_etag()
+    response.set_data(body)
+    response.headers["Content-Encoding"] = encoding
+    if etag:
+        response.set_etag(encoded_etag(etag, encoding), weak)
+    return response
+
+
+def _compress_stream(chunks, encoding, config):
+    """
+    Compress a streamed body chunk by chunk, flushing after each one so the
+    client keeps receiving data as it is produced.
+    """
+    if encoding == "br":
+        compressor = brotli.Compressor(quality=config.get("COMPRESS_BROTLI_QUALITY", 5))
+        for chunk in chunks:
+            data = compressor.process(chunk) + compressor.flush()
+            if data:
+                yield data
+        yield compressor.finish()
+        return
+
+    compressor = zlib.compressobj(config.get("COMPRESS_LEVEL", 6), zlib.DEFLATED, 31)  # 31 = format gzip
+    for chunk in chunks:
+        data = compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def init_compression(app):
+    """
+    Compress responses with gzip (or brotli when the package is installed),
+    negotiated through Accept-Encoding.
+
+    Only text-like mimetypes are touched, bodies below COMPRESS_MIN_SIZE are
+    sent as-is, and streamed responses are compressed on the fly. Responses
+    that already carry a Content-Encoding (e.g. precompressed cache hits) are
+    left alone.
+    """
+    @app.after_request
+    def compress_response(response):
+        if not app.config.get("COMPRESS_ENABLED", True):
+            return response
+
+        if response.status_code == 304:
+            # Pertahankan ETag varian terkompresi yang dikirim client
+            etag, weak = response.get_etag()
+            encoding = negotiate_encoding()
+            if etag and encoding and request.if_none_match.contains(encoded_etag(etag, encoding)):
+                response.set_etag(encoded_etag(etag, encoding), weak)
+            return response
+
+        if response.mimetype not in COMPRESSIBLE_MIMETYPES:
+            return response
+        response.vary.add("Accept-Encoding")
+
+        if (
+            request.method == "HEAD"
+            or response.status_code < 200
+            or response.status_code == 204
+            or response.direct_passthrough
+            or "Content-Encoding" in response.headers
+        ):
+            return response
+
+        encoding = negotiate_encoding()
+        if encoding is None:
+            return response
+
+        if response.is_streamed:
+            etag, weak = response.get_etag()
+            response.response = _compress_stream(response.iter_encoded(), encoding, app.config)
+            response.headers.pop("Content-Length", None)
+            response.headers["Content-Encoding"] = encoding
+            if etag:
+                response.set_etag(encoded_etag(etag, encoding), weak)
+            return response
+
+        data = response.get_data()
+        if len(data) < app.config.get("COMPRESS_MIN_SIZE", 1024):
+            return response
+        return use_encoded_body(response, compress_body(data, encoding, app.config), encoding)
@@ -0,0 +1,159 @@
+import hashlib
+import json
+import time
+import click
+from datetime import datetime, timedelta
+from functools import wraps
+from flask import request, jsonify, current_app, make_response
+from flask.cli import with_appcontext
+from flask_jwt_extended import get_jwt_identity
+from sqlalchemy.exc import IntegrityError
+from connectors.db import db
+from models.idempotency_key import IdempotencyKey
+from services.upsert import upsert
+
+HEADER = "Idempotency-Key"
+
+# Respons yang bisa berubah bila dicoba lagi (mis. 409 "Stock changed during checkout"): tidak disimpan
+TRANSIENT_STATUSES = {408, 409, 423, 425, 429}
+
+
+def _request_hash():
+    digest = hashlib.sha256()
+    digest.update(f"{request.method} {request.path}\n".encode())
+    digest.update(request.get_data())
+    return digest.hexdigest()
+
+
+def _claim(user_id, key, request_hash):
+    """
+    Insert an in_progress row for the key in its own transaction.
+    :return: True if this request owns the key, False if a row already exists.
+    """
+    lock_timeout = current_app.config.get("IDEMPOTENCY_LOCK_TIMEOUT", 60)
+    values = {
+        "user_id": user_id,
+        "key": key,
+        "request_hash": request_hash,
+        "status": "in_progress",
+        "created_at": datetime.utcnow(),
+        "expires_at": datetime.utcnow() + timedelta(seconds=lock_timeout),
+    }
+    try:
+        result = upsert(IdempotencyKey, values, conflict_columns=["user_id", "key"])
+        db.session.commit()
+    except IntegrityError:
+        db.session.rollback()
+        return False
+    return result.rowcount == 1
+
+
+def _load(user_id, key):
+    # Transaksi baru agar status terbaru dari request lain terlihat
+    db.session.rollback()
+    return (
+        IdempotencyKey.query
+        .filter_by(user_id=user_id, key=key)
+        .populate_existing()
+        .first()
+    )
+
+
+def _replay(record):
+    response = current_app.response_class(
+        record.response_body, status=record.response_status, mimetype=record.response_mimetype
+    )
+    response.headers["Idempotent-Replayed"] = "true"
+    return response
+
+
+def idempotent(f):
+    """
+    Honour the Idempotency-Key header on a mutating endpoint.
+
+    The first request with a key runs the handler and its response is stored
+    for IDEMPOTENCY_TTL seconds; later requests with the same key get that
+    response replayed without running the handler again. A duplicate that
+    arrives while the first is still running waits for it (up to
+    IDEMPOTENCY_WAIT_TIMEOUT seconds). Keys are scoped per user, and reusing
+    a key for a different request body is rejected with 422. Server errors
+    (5xx) and transient client errors (TRANSIENT_STATUSES, e.g. 409) are not
+    stored, so the client can retry them with the same key.
+    Put it below @jwt_required so the user is known.
+    """
+    @wraps(f)
+    def wrapper(*args, **kwargs):
+        key = request.headers.get(HEADER)
+        if not key:
+            return f(*args, **kwargs)
+        if len(key) > 255:
+            return jsonify({"message": f"{HEADER} must be at most 255 characters"}), 400
+
+        identity = get_jwt_identity()
+        user_id = (json.loads(identity) if isinstance(identity, str) else identity)["id"]
+        request_hash = _request_hash()
+
+        deadline = time.monotonic() + current_app.config.get("IDEMPOTENCY_WAIT_TIMEOUT", 10)
+        while not _claim(user_id, key, request_hash):
+            record = _load(user_id, key)
+            if record is None:
+                continue  # Baru saja dihapus, coba klaim lagi
+            if record.expires_at <= datetime.utcnow():
+                # Kedaluwarsa (atau request pertama mati di tengah jalan): boleh dipakai ulang.
+                # Hapus bersyarat, agar penunggu lain yang sudah menghapus/mengklaim tidak bentrok
+                IdempotencyKey.query.filter_by(id=record.id, expires_at=record.expires_at).delete(
+                    synchronize_session=False
+                )
+                db.session.commit()
+                continue
+            if record.request_hash != request_hash:
+                return jsonify({"message": f"{HEADER} was already used for a different request"}), 422
+            if record.status == "completed":
+                return _replay(record)
+            if time.monotonic() >= deadline:
+                return jsonify({"message": "A request with this Idempotency-Key is still in progress"}), 409
+            time.sleep(current_app.config.get("IDEMPOTENCY_POLL_INTERVAL", 0.1))
+
+        try:
+            response = make_response(f(*args, **kwargs))
+        except Exception:
+            db.session.rollback()
+            _release(user_id, key)
+            raise
+
+        db.session.rollback()  # Handler sudah commit; buang sisa state yang gagal
+        if response.status_code >= 500 or response.status_code in TRANSIENT_STATUSES or response.is_streamed:
+            _release(user_id, key)
+            return response
+
+        record = _load(user_id, key)
+        if record is None or record.status != "in_progress" or record.request_hash != request_hash:
+            # Klaim kita kedaluwarsa dan diambil alih (atau dihapus) selagi handler berjalan
+            current_app.logger.warning(
+                f"{HEADER} {key} of user {user_id} was taken over while its request ran; response not stored"
+            )
+            return response
+        record.status = "completed"
+        record.response_status = response.status_code
+        record.response_body = response.get_data()
+        record.response_mimetype = response.mimetype
+        record.expires_at = datetime.utcnow() + timedelta(seconds=current_app.config.get("IDEMPOTENCY_TTL", 86400))
+        db.session.commit()
+        return response
+    return wrapper
+
+
+def _release(user_id, key):
+    IdempotencyKey.query.filter_by(user_id=user_id, key=key).delete(synchronize_session=False)
+    db.session.commit()
+
+
+@click.command("purge-idempotency-keys")
+@with_appcontext
+def purge_idempotency_keys_command():
+    """Delete expired idempotency keys."""
+    deleted = IdempotencyKey.query.filter(IdempotencyKey.expires_at <= datetime.utcnow()).delete(
+        synchronize_session=False
+    )
+    db.session.commit()
+    click.echo(f"Deleted {deleted} expired idempotency key(s)")
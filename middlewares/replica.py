@@ -0,0 +1,80 @@
+import json
+from functools import wraps
+from flask import g, current_app
+from flask_jwt_extended import get_jwt_identity
+from connectors.cache import cache
+
+
+def _current_user_id():
+    try:
+        identity = get_jwt_identity()
+    except Exception:
+        return None  # Endpoint publik tanpa token
+    if isinstance(identity, str):
+        identity = json.loads(identity)
+    return identity.get("id") if isinstance(identity, dict) else None
+
+
+def _sticky_key(user_id):
+    return f"db:primary:{user_id}"
+
+
+def _wrote_recently(user_id):
+    """
+    Whether the user wrote to the primary in the last REPLICA_STICKY_SECONDS.
+    That is only known when the cache is shared by all workers (Redis); with
+    a per-process or disabled cache the answer is always yes, so logged-in
+    users stay on the primary.
+    """
+    if not cache.shared:
+        return True
+    try:
+        return bool(cache.get(_sticky_key(user_id)))
+    except Exception as e:
+        current_app.logger.warning(f"Replica stickiness lookup failed: {e}")
+        return True
+
+
+def read_from_primary():
+    """
+    Keep the rest of this request on the primary, even inside @use_replica.
+    For results that outlive the request (e.g. cache fills), so replication
+    lag is not stored along with them.
+    """
+    g.db_primary_only = True
+
+
+def use_replica(f):
+    """
+    Serve a read-only handler from a read replica (SQLALCHEMY_BINDS replica_*).
+
+    Users who wrote something in the last REPLICA_STICKY_SECONDS keep reading
+    from the primary, so they see their own changes despite replication lag.
+    This needs a shared cache (CACHE_BACKEND=redis); without one, logged-in
+    users always read from the primary. Put it below @jwt_required so the
+    user is known.
+    """
+    @wraps(f)
+    def wrapper(*args, **kwargs):
+        if not g.get("db_primary_only"):
+            user_id = _current_user_id()
+            if user_id is None or not _wrote_recently(user_id):
+                g.db_use_replica = True
+        return f(*args, **kwargs)
+    return wrapper
+
+
+def init_read_replicas(app):
+    """
+    Remember which users just wrote to the primary (read-your-writes).
+    """
+    @app.after_request
+    def remember_primary_writes(response):
+        if g.get("db_wrote") and cache.shared:
+            user_id = _current_user_id()
+            if user_id is not None:
+                try:
+                    cache.set(_sticky_key(user_id), True, ttl=app.config.get("REPLICA_STICKY_SECONDS", 10))
+                except Exception as e:
+                    app.logger.warning(f"Replica stickiness write failed: {e}")
+        return response
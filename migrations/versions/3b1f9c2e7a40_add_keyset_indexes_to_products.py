@@ -0,0 +1,30 @@
+"""Add keyset pagination indexes to products
+
+Revision ID: 3b1f9c2e7a40
+Revises: a6d57446ffd2
+Create Date: 2026-10-18 09:12:41.502318
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3b1f9c2e7a40'
+down_revision = 'a6d57446ffd2'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('products', schema=None) as batch_op:
+        batch_op.create_index('idx_products_harga_id', ['harga', 'id'], unique=False)
+        batch_op.create_index('idx_products_nama_produk_id', ['nama_produk', 'id'], unique=False)
+        batch_op.create_index('idx_products_store_id_id', ['store_id', 'id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('products', schema=None) as batch_op:
+        batch_op.drop_index('idx_products_store_id_id')
+        batch_op.drop_index('idx_products_nama_produk_id')
+        batch_op.drop_index('idx_products_harga_id')
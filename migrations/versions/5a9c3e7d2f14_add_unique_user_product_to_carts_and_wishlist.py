@@ -0,0 +1,65 @@
+"""Add unique (user_id, product_id) to carts and wishlist
+
+Revision ID: 5a9c3e7d2f14
+Revises: e8b3d6a2c915
+Create Date: 2026-10-18 16:21:09.402517
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5a9c3e7d2f14'
+down_revision = 'e8b3d6a2c915'
+branch_labels = None
+depends_on = None
+
+
+def _duplicate_groups(bind, table):
+    return bind.execute(
+        sa.text(
+            f'SELECT user_id, product_id FROM {table} '
+            'GROUP BY user_id, product_id HAVING COUNT(*) > 1'
+        )
+    ).fetchall()
+
+
+def upgrade():
+    bind = op.get_bind()
+
+    # Gabungkan baris ganda dulu: quantity dijumlahkan ke baris dengan id terkecil
+    for group in _duplicate_groups(bind, 'carts'):
+        rows = bind.execute(
+            sa.text('SELECT id, quantity FROM carts WHERE user_id = :user_id AND product_id = :product_id ORDER BY id'),
+            {'user_id': group.user_id, 'product_id': group.product_id},
+        ).fetchall()
+        keep, extra = rows[0], rows[1:]
+        bind.execute(
+            sa.text('UPDATE carts SET quantity = :quantity WHERE id = :id'),
+            {'quantity': sum(row.quantity for row in rows), 'id': keep.id},
+        )
+        for row in extra:
+            bind.execute(sa.text('DELETE FROM carts WHERE id = :id'), {'id': row.id})
+
+    for group in _duplicate_groups(bind, 'wishlist'):
+        rows = bind.execute(
+            sa.text('SELECT id FROM wishlist WHERE user_id = :user_id AND product_id = :product_id ORDER BY id'),
+            {'user_id': group.user_id, 'product_id': group.product_id},
+        ).fetchall()
+        for row in rows[1:]:
+            bind.execute(sa.text('DELETE FROM wishlist WHERE id = :id'), {'id': row.id})
+
+    with op.batch_alter_table('carts', schema=None) as batch_op:
+        batch_op.create_unique_constraint('uq_carts_user_product', ['user_id', 'product_id'])
+
+    with op.batch_alter_table('wishlist', schema=None) as batch_op:
+        batch_op.create_unique_constraint('uq_wishlist_user_product', ['user_id', 'product_id'])
+
+
+def downgrade():
+    with op.batch_alter_table('wishlist', schema=None) as batch_op:
+        batch_op.drop_constraint('uq_wishlist_user_product', type_='unique')
+
+    with op.batch_alter_table('carts', schema=None) as batch_op:
+        batch_op.drop_constraint('uq_carts_user_product', type_='unique')
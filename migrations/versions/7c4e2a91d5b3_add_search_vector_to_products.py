@@ -0,0 +1,43 @@
+"""Add full-text search vector and trigram index to products
+
+Revision ID: 7c4e2a91d5b3
+Revises: 3b1f9c2e7a40
+Create Date: 2026-10-18 10:04:18.227930
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '7c4e2a91d5b3'
+down_revision = '3b1f9c2e7a40'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Hanya untuk Postgres; SQLite memakai tabel FTS5 yang dibuat saat aplikasi start
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    op.execute(
+        """
+        ALTER TABLE products ADD COLUMN search_vector tsvector
+        GENERATED ALWAYS AS (
+            setweight(to_tsvector('simple', coalesce(nama_produk, '')), 'A') ||
+            setweight(to_tsvector('simple', coalesce(deskripsi, '')), 'B')
+        ) STORED
+        """
+    )
+    op.execute('CREATE INDEX idx_products_search_vector ON products USING GIN (search_vector)')
+    op.execute('CREATE INDEX idx_products_nama_produk_trgm ON products USING GIN (nama_produk gin_trgm_ops)')
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+
+    op.execute('DROP INDEX IF EXISTS idx_products_nama_produk_trgm')
+    op.execute('DROP INDEX IF EXISTS idx_products_search_vector')
+    op.execute('ALTER TABLE products DROP COLUMN IF EXISTS search_vector')
@@ -0,0 +1,63 @@
+"""Add effective_price and active_promotion_id to products
+
+Revision ID: 9e5d1c3b8f27
+Revises: 7c4e2a91d5b3
+Create Date: 2026-10-18 11:37:52.610284
+
+"""
+from datetime import datetime
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9e5d1c3b8f27'
+down_revision = '7c4e2a91d5b3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('products', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('effective_price', sa.Float(), nullable=True))
+        batch_op.add_column(sa.Column('active_promotion_id', sa.Integer(), nullable=True))
+
+    # Isi harga efektif untuk data lama: harga dasar, lalu diskon promosi yang sedang aktif
+    bind = op.get_bind()
+    bind.execute(sa.text('UPDATE products SET effective_price = harga'))
+
+    now = datetime.utcnow()
+    promotions = bind.execute(
+        sa.text(
+            'SELECT id, product_id, discount_percent FROM promotions '
+            'WHERE product_id IS NOT NULL AND promotion_period_start <= :now '
+            'AND promotion_period_end >= :now ORDER BY id'
+        ),
+        {'now': now},
+    ).fetchall()
+    active = {row.product_id: row for row in promotions}  # Promosi terbaru menang
+    for product_id, promotion in active.items():
+        harga = bind.execute(
+            sa.text('SELECT harga FROM products WHERE id = :id'), {'id': product_id}
+        ).scalar()
+        if harga is None:
+            continue
+        bind.execute(
+            sa.text('UPDATE products SET effective_price = :price, active_promotion_id = :promotion_id WHERE id = :id'),
+            {
+                'price': round(harga * (1 - promotion.discount_percent / 100), 2),
+                'promotion_id': promotion.id,
+                'id': product_id,
+            },
+        )
+
+    with op.batch_alter_table('products', schema=None) as batch_op:
+        batch_op.alter_column('effective_price', existing_type=sa.Float(), nullable=False)
+        batch_op.create_index('idx_products_effective_price_id', ['effective_price', 'id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('products', schema=None) as batch_op:
+        batch_op.drop_index('idx_products_effective_price_id')
+        batch_op.drop_column('active_promotion_id')
+        batch_op.drop_column('effective_price')
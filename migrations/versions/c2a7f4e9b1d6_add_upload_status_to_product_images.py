@@ -0,0 +1,37 @@
+"""Add asynchronous upload status to product_images
+
+Revision ID: c2a7f4e9b1d6
+Revises: 9e5d1c3b8f27
+Create Date: 2026-10-18 13:21:09.774512
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c2a7f4e9b1d6'
+down_revision = '9e5d1c3b8f27'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('product_images', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('status', sa.String(length=20), nullable=False, server_default='ready'))
+        batch_op.add_column(sa.Column('attempts', sa.Integer(), nullable=False, server_default='0'))
+        batch_op.add_column(sa.Column('last_error', sa.Text(), nullable=True))
+        batch_op.add_column(sa.Column('spool_path', sa.String(length=500), nullable=True))
+        batch_op.alter_column('image_url', existing_type=sa.String(length=255), nullable=True)
+        batch_op.create_index(batch_op.f('ix_product_images_status'), ['status'], unique=False)
+
+
+def downgrade():
+    op.execute("DELETE FROM product_images WHERE image_url IS NULL")
+    with op.batch_alter_table('product_images', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_product_images_status'))
+        batch_op.alter_column('image_url', existing_type=sa.String(length=255), nullable=False)
+        batch_op.drop_column('spool_path')
+        batch_op.drop_column('last_error')
+        batch_op.drop_column('attempts')
+        batch_op.drop_column('status')
@@ -11,6 +11,11 @@ class Cart(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
+    # Satu baris per produk per user; add_to_cart menambah quantity lewat upsert
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'product_id', name='uq_carts_user_product'),
+    )
+
     # Relasi dengan tabel Product
     product = db.relationship('Product', back_populates='carts', lazy=True)
 
@@ -0,0 +1,31 @@
+from connectors.db import db
+from datetime import datetime
+
+
+class IdempotencyKey(db.Model):
+    """
+    Stored outcome of a request sent with an Idempotency-Key header,
+    scoped per user. See middlewares.idempotency.
+    """
+    __tablename__ = 'idempotency_keys'
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, nullable=False)
+    key = db.Column(db.String(255), nullable=False)
+    request_hash = db.Column(db.String(64), nullable=False)  # Method, path dan body request pertama
+
+    # 'in_progress' selama request pertama berjalan, lalu 'completed'
+    status = db.Column(db.String(20), nullable=False, default="in_progress")
+    response_status = db.Column(db.Integer, nullable=True)
+    response_body = db.Column(db.LargeBinary, nullable=True)
+    response_mimetype = db.Column(db.String(100), nullable=True)
+
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)
+
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'key', name='uq_idempotency_keys_user_key'),
+    )
+
+    def __repr__(self):
+        return f"<IdempotencyKey {self.user_id}:{self.key} {self.status}>"
@@ -0,0 +1,19 @@
+from connectors.db import db
+from datetime import datetime
+
+
+class MediaBlob(db.Model):
+    """
+    Content-addressed image: one stored asset per SHA-256 of the file bytes,
+    shared by every ProductImage with the same content.
+    """
+    __tablename__ = 'media_blobs'
+
+    id = db.Column(db.Integer, primary_key=True)
+    content_hash = db.Column(db.String(64), nullable=False, unique=True)
+    url = db.Column(db.String(255), nullable=False)
+    public_id = db.Column(db.String(255), nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    def __repr__(self):
+        return f"<MediaBlob {self.content_hash[:12]}>"
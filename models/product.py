@@ -1,6 +1,13 @@
 from connectors.db import db
 from datetime import datetime
+from sqlalchemy.orm import load_only, raiseload, selectinload, joinedload
 from models.product_image import ProductImage
+from models.store import Store
+
+
+def _default_effective_price(context):
+    # Produk baru belum punya promosi aktif, jadi harga efektif = harga
+    return context.get_current_parameters()["harga"]
 
 
 class Product(db.Model):
@@ -19,9 +26,21 @@ class Product(db.Model):
     tinggi = db.Column(db.Float, nullable=True, default=0.0)
     store_id = db.Column(db.Integer, db.ForeignKey("stores.id"), nullable=False)
 
+    # Harga setelah diskon promosi aktif, dihitung ulang oleh services.pricing
+    effective_price = db.Column(db.Float, nullable=False, default=_default_effective_price)
+    active_promotion_id = db.Column(db.Integer, nullable=True)
+
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, onupdate=datetime.utcnow)
 
+    # Index untuk keyset pagination (kolom sort + id)
+    __table_args__ = (
+        db.Index('idx_products_harga_id', 'harga', 'id'),
+        db.Index('idx_products_effective_price_id', 'effective_price', 'id'),
+        db.Index('idx_products_nama_produk_id', 'nama_produk', 'id'),
+        db.Index('idx_products_store_id_id', 'store_id', 'id'),
+    )
+
     # Relasi ke tabel Store
     store = db.relationship("Store", backref="products")
 
@@ -32,12 +51,12 @@ class Product(db.Model):
         cascade='all, delete-orphan'
     )
 
-    # Relasi Promotion
+    # Relasi Promotion (tidak di-join otomatis; pakai product_load_options per call site)
     promotions = db.relationship(
         'Promotion', 
         back_populates="product", 
         cascade="all, delete-orphan", 
-        lazy='joined'  # Menggunakan string untuk opsi lazy loading
+        lazy='select'
     )
     
     # Relationship to Cart (newly added)
@@ -53,20 +72,20 @@ class Product(db.Model):
             raise ValueError("Stok cannot be negative")
 
     def get_images(self):
-        return [img.image_url for img in self.images]
+        return [img.image_url for img in self.images if img.status == "ready"]
 
     def to_dict(self):
-        # Ambil promosi aktif terbaru (opsional: bisa diubah sesuai kebutuhan)
-        latest_promotion = (
-            Promotion.query.filter_by(product_id=self.id)
-            .order_by(Promotion.id.desc())
-            .first()
-        )
+        # Import di sini untuk menghindari circular import dengan services.catalog
+        from services.catalog import load_product_relations
+
+        images_by_product, promotion_by_product = load_product_relations([self.id])
+        latest_promotion = promotion_by_product.get(self.id)
 
         return {
             "id": self.id,
             "nama_produk": self.nama_produk,
             "harga": self.harga,
+            "effective_price": self.effective_price,
             "stok": self.stok,
             "kategori": self.kategori,
             "jenis_hewan": self.jenis_hewan,
@@ -76,10 +95,36 @@ class Product(db.Model):
                 "lebar": self.lebar,
                 "tinggi": self.tinggi,
             },
-            "images": self.get_images(),
+            "images": [img.image_url for img in images_by_product.get(self.id, [])],
             "created_at": self.created_at,
             "updated_at": self.updated_at,
             "promotion": latest_promotion.to_dict() if latest_promotion else None,  # Sertakan data promosi jika ada
         }
 
 
+def product_load_options(profile):
+    """
+    Query options for the ways products are loaded.
+
+    - "listing": columns only; images and promotions come from the bulk
+      loader in services.catalog, so touching a relationship raises.
+    - "detail": all columns plus images, for handlers that walk product.images.
+    - "write": the narrow column set needed by cart, checkout and order
+      writes (price, stock, store owner), nothing else.
+    """
+    if profile == "listing":
+        return [raiseload(Product.images), raiseload(Product.promotions), raiseload(Product.carts)]
+    if profile == "detail":
+        return [selectinload(Product.images), raiseload(Product.promotions), raiseload(Product.carts)]
+    if profile == "write":
+        return [
+            load_only(
+                Product.id, Product.nama_produk, Product.harga, Product.effective_price,
+                Product.active_promotion_id, Product.stok, Product.store_id,
+            ),
+            joinedload(Product.store).load_only(Store.id, Store.user_id),
+            raiseload(Product.images),
+            raiseload(Product.promotions),
+            raiseload(Product.carts),
+        ]
+    raise ValueError(f"Unknown product load profile: {profile}")
@@ -7,7 +7,16 @@ class ProductImage(db.Model):
 
     id = db.Column(db.Integer, primary_key=True)
     product_id = db.Column(db.Integer, db.ForeignKey('products.id'), nullable=False, index=True)
-    image_url = db.Column(db.String(255), nullable=False)
+    image_url = db.Column(db.String(255), nullable=True)  # Kosong selama status masih 'pending'
+
+    # SHA-256 isi file, untuk deduplikasi lewat tabel media_blobs
+    content_hash = db.Column(db.String(64), nullable=True, index=True)
+
+    # Status upload asinkron: 'pending', 'ready' atau 'failed'
+    status = db.Column(db.String(20), nullable=False, default="ready", index=True)
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    last_error = db.Column(db.Text, nullable=True)
+    spool_path = db.Column(db.String(500), nullable=True)
 
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, onupdate=datetime.utcnow)
@@ -23,6 +32,7 @@ class ProductImage(db.Model):
             "id": self.id,
             "product_id": self.product_id,
             "image_url": self.image_url,
+            "status": self.status,
             "created_at": self.created_at,
             "updated_at": self.updated_at,
         }
@@ -8,3 +8,7 @@ class Wishlist(db.Model):
     user_id = db.Column(db.Integer, nullable=False)  # ID pengguna
     product_id = db.Column(db.Integer, nullable=False)  # ID produk
     created_at = db.Column(db.DateTime, default=datetime.utcnow)  # Tanggal ditambahkan
+
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'product_id', name='uq_wishlist_user_product'),
+    )
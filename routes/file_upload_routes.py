@@ -1,7 +1,13 @@
 from flask import Blueprint
-from controllers.FileUploadController import upload_image
+from controllers.FileUploadController import upload_image, get_image_status, serve_local_media
 
 file_upload_bp = Blueprint("file_upload", __name__)
 
 # Route untuk upload image
 file_upload_bp.route("/upload-image", methods=["POST"])(upload_image)
+
+# Route untuk cek status upload asinkron
+file_upload_bp.route("/images/<int:image_id>", methods=["GET"])(get_image_status)
+
+# Route untuk file dari storage lokal
+file_upload_bp.route("/media/<path:filename>", methods=["GET"])(serve_local_media)
@@ -4,7 +4,11 @@ from controllers.ProductController import (
     get_product_by_id, 
     search_and_filter_products,
     get_products_by_category,
-    get_products_by_animal_type
+    get_products_by_animal_type,
+    export_products,
+    get_product_facets,
+    get_products_batch,
+    suggest_product_names
 )
 
 product_bp = Blueprint('products', __name__)
@@ -12,10 +16,18 @@ product_bp = Blueprint('products', __name__)
 # Routes untuk produk publik
 product_bp.route('/', methods=['GET'])(get_public_products)  # Get all public products
 product_bp.route('/<int:product_id>', methods=['GET'])(get_product_by_id)  # Get product by ID
+product_bp.route('/export', methods=['GET'])(export_products)  # Stream seluruh katalog (NDJSON/JSON)
+product_bp.route('/batch', methods=['GET', 'POST'])(get_products_batch)  # Banyak produk sekaligus (?ids=1,2,3)
 
 # Route untuk search dan filter
 product_bp.route('', methods=['GET'])(search_and_filter_products)
 
+# Route untuk autocomplete nama produk (index in-memory)
+product_bp.route('/suggest', methods=['GET'])(suggest_product_names)
+
+# Route untuk jumlah produk per facet (kategori, jenis hewan, rentang harga)
+product_bp.route('/facets', methods=['GET'])(get_product_facets)
+
 # Route untuk menampilkan produk berdasarkan kategori
 product_bp.route('/category', methods=['GET'])(get_products_by_category)
 
@@ -3,7 +3,8 @@ from controllers.ProductController import (
     create_product,
     update_product,
     delete_product,
-    get_seller_products
+    get_seller_products,
+    bulk_import_products
 )
 from controllers.SellerController import register_store
 from controllers.CheckoutOrderController import update_order_status, seller_get_orders
@@ -16,6 +17,7 @@ seller_bp.route('/register', methods=['POST'])(register_store)
 # Routes untuk operasi produk seller
 seller_bp.route('/create-products', methods=['POST'])(create_product)  # Create product
 seller_bp.route('/products', methods=['GET'])(get_seller_products)  # Get seller products
+seller_bp.route('/products/import', methods=['POST'])(bulk_import_products)  # Bulk import (CSV/JSONL)
 seller_bp.route('/products/<int:product_id>', methods=['PUT'])(update_product)  # Update product
 seller_bp.route('/products/<int:product_id>', methods=['DELETE'])(delete_product)  # Delete product
 
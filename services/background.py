@@ -0,0 +1,29 @@
+from concurrent.futures import ThreadPoolExecutor
+from flask import current_app
+
+
+def init_background(app):
+    """
+    Create the thread pool used for work that runs after the response is sent.
+    """
+    app.extensions["background"] = ThreadPoolExecutor(
+        max_workers=app.config.get("BACKGROUND_WORKERS", 4),
+        thread_name_prefix="background",
+    )
+
+
+def submit(fn, *args, **kwargs):
+    """
+    Run fn(*args, **kwargs) on the background pool inside an application context.
+    Errors are logged, never raised to the caller.
+    """
+    app = current_app._get_current_object()
+
+    def run():
+        with app.app_context():
+            try:
+                return fn(*args, **kwargs)
+            except Exception as e:
+                app.logger.exception(f"Background task {getattr(fn, '__name__', fn)} failed: {e}")
+
+    return app.extensions["background"].submit(run)
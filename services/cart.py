@@ -0,0 +1,198 @@
+from sqlalchemy import and_, func
+from connectors.db import db
+from models.cart import Cart
+from models.product import Product
+from models.product_image import ProductImage
+from models.promotion import Promotion
+from services.cart_store import cart_store
+
+
+CART_OPERATIONS = ("add", "set", "remove")
+
+
+class CartBatchError(ValueError):
+    """Raised when a batch has invalid operations; errors lists them per index."""
+
+    def __init__(self, errors):
+        super().__init__("Invalid cart operations")
+        self.errors = errors
+
+
+def parse_id(value):
+    """
+    Coerce a product_id or cart_id from a JSON body to a positive int.
+    Digit strings ("3") are accepted as before; the cart store keys lines by
+    int, so a string id must never reach it.
+    :return: The id, or None if the value is not a valid id.
+    """
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, str) and value.strip().isdigit():
+        value = int(value)
+    return value if isinstance(value, int) and value > 0 else None
+
+
+def _validate_operations(operations):
+    errors = []
+    for index, operation in enumerate(operations):
+        if not isinstance(operation, dict):
+            errors.append({"index": index, "msg": "Operasi harus berupa object."})
+            continue
+        op, product_id, quantity = operation.get("op"), operation.get("product_id"), operation.get("quantity")
+        if op not in CART_OPERATIONS:
+            errors.append({"index": index, "msg": f"op harus salah satu dari: {', '.join(CART_OPERATIONS)}."})
+        elif not isinstance(product_id, int) or isinstance(product_id, bool):
+            errors.append({"index": index, "msg": "product_id harus berupa angka."})
+        elif op == "add" and (not isinstance(quantity, int) or quantity <= 0):
+            errors.append({"index": index, "msg": "quantity untuk add harus lebih dari 0."})
+        elif op == "set" and (not isinstance(quantity, int) or quantity < 0):
+            errors.append({"index": index, "msg": "quantity untuk set tidak boleh negatif."})
+    return errors
+
+
+def apply_cart_operations(user_id, operations):
+    """
+    Apply a list of add/set/remove operations to a user's cart in one write.
+
+    Operations run in order against the cart as it stands, e.g. add 2 then
+    set 5 leaves 5; set with quantity 0 removes the line. Every referenced
+    product is checked in one query, then the final quantities go to the
+    cart store in a single set_many. Nothing is written if any operation is invalid.
+    :raises CartBatchError: With one error per invalid operation.
+    """
+    errors = _validate_operations(operations)
+    if errors:
+        raise CartBatchError(errors)
+
+    product_ids = {operation["product_id"] for operation in operations}
+    existing_ids = {
+        row[0] for row in db.session.query(Product.id).filter(Product.id.in_(product_ids)).all()
+    }
+    errors = [
+        {"index": index, "msg": "Produk tidak ditemukan."}
+        for index, operation in enumerate(operations)
+        if operation["product_id"] not in existing_ids
+    ]
+    if errors:
+        raise CartBatchError(errors)
+
+    current = cart_store.items(user_id)
+    quantities = {}
+    for operation in operations:
+        product_id = operation["product_id"]
+        if operation["op"] == "add":
+            quantities[product_id] = quantities.get(product_id, current.get(product_id, 0)) + operation["quantity"]
+        elif operation["op"] == "set":
+            quantities[product_id] = operation["quantity"]
+        else:
+            quantities[product_id] = 0
+
+    cart_store.set_many(user_id, quantities)
+
+
+def _cart_rows(user_id, quantities):
+    """
+    Product, first ready image, active promotion and the carts row id (if the
+    line has been persisted) for every product in the cart, in one SELECT.
+    """
+    product_ids = list(quantities)
+    first_image = (
+        db.session.query(
+            ProductImage.product_id.label("product_id"),
+            func.min(ProductImage.id).label("image_id"),
+        )
+        .filter(ProductImage.product_id.in_(product_ids), ProductImage.status == "ready")
+        .group_by(ProductImage.product_id)
+        .subquery()
+    )
+
+    return (
+        db.session.query(
+            Cart.id,
+            Product.id.label("product_id"),
+            Product.nama_produk,
+            Product.harga,
+            Product.effective_price,
+            Product.stok,
+            Product.berat,
+            ProductImage.image_url,
+            Promotion.id.label("promotion_id"),
+            Promotion.promotion_name,
+            Promotion.discount_percent,
+            Promotion.promotion_period_end,
+        )
+        .outerjoin(Cart, and_(Cart.product_id == Product.id, Cart.user_id == user_id))
+        .outerjoin(first_image, first_image.c.product_id == Product.id)
+        .outerjoin(ProductImage, ProductImage.id == first_image.c.image_id)
+        .outerjoin(Promotion, Promotion.id == Product.active_promotion_id)
+        .filter(Product.id.in_(product_ids))
+        .all()
+    )
+
+
+def build_cart_view(user_id):
+    """
+    Priced view of a user's cart.
+
+    Quantities come from the cart store snapshot; everything else is read in
+    one query. Unit prices are Product.effective_price, i.e. the promotion
+    price while a promotion is active. The totals match an order only because
+    checkout prices its lines with the same property; keep the two in step.
+    Line ids are the carts row ids and may be None while a new line is not
+    yet persisted; product_id identifies a line in every backend.
+    :return: Tuple (items, summary).
+    """
+    items = []
+    summary = {
+        "item_count": 0,
+        "subtotal": 0.0,
+        "discount": 0.0,
+        "total": 0.0,
+        "total_weight": 0.0,
+        "all_in_stock": True,
+    }
+
+    quantities = cart_store.items(user_id)
+    if not quantities:
+        return items, summary
+
+    rows = sorted(_cart_rows(user_id, quantities), key=lambda row: (row.id is None, row.id or 0, row.product_id))
+    for row in rows:
+        quantity = quantities[row.product_id]
+        line_subtotal = row.harga * quantity
+        line_total = round(row.effective_price * quantity, 2)
+        in_stock = row.stok >= quantity
+        items.append({
+            "id": row.id,
+            "product_id": row.product_id,
+            "quantity": quantity,
+            "product_details": {
+                "name": row.nama_produk,
+                "price": row.harga,
+                "image_url": row.image_url,
+                "stock": row.stok,
+                "weight": row.berat,
+            },
+            "promotion": {
+                "id": row.promotion_id,
+                "name": row.promotion_name,
+                "discount_percent": row.discount_percent,
+                "ends_at": row.promotion_period_end,
+            } if row.promotion_id else None,
+            "unit_price": row.effective_price,
+            "line_total": line_total,
+            "line_discount": round(line_subtotal - line_total, 2),
+            "in_stock": in_stock,
+        })
+
+        summary["item_count"] += quantity
+        summary["subtotal"] += line_subtotal
+        summary["total"] += line_total
+        summary["total_weight"] += row.berat * quantity
+        summary["all_in_stock"] = summary["all_in_stock"] and in_stock
+
+    summary["subtotal"] = round(summary["subtotal"], 2)
+    summary["total"] = round(summary["total"], 2)
+    summary["discount"] = round(summary["subtotal"] - summary["total"], 2)
+    summary["total_weight"] = round(summary["total_weight"], 3)
+    return items, summary
@@ -0,0 +1,384 @@
+import atexit
+import threading
+import time
+import click
+from datetime import datetime
+from flask import current_app
+from flask.cli import with_appcontext
+from connectors.db import db
+from models.cart import Cart
+from models.product import Product
+from services.background import submit
+from services.upsert import upsert
+
+
+def _load_from_database(user_id):
+    rows = db.session.query(Cart.product_id, Cart.quantity).filter(Cart.user_id == user_id).all()
+    return {product_id: quantity for product_id, quantity in rows}
+
+
+class DatabaseCartStore:
+    """
+    Carts kept only in the carts table; every change is committed right away.
+    """
+    write_behind = False
+
+    def is_loaded(self, user_id):
+        return True
+
+    def items(self, user_id):
+        return _load_from_database(user_id)
+
+    def add(self, user_id, product_id, quantity):
+        upsert(
+            Cart,
+            {"user_id": user_id, "product_id": product_id, "quantity": quantity},
+            conflict_columns=["user_id", "product_id"],
+            update=lambda inserted: {
+                "quantity": Cart.quantity + inserted.quantity,
+                "updated_at": datetime.utcnow(),
+            },
+        )
+        db.session.commit()
+
+    def set_many(self, user_id, quantities):
+        rows = {
+            row.product_id: row
+            for row in Cart.query.filter(Cart.user_id == user_id, Cart.product_id.in_(list(quantities))).all()
+        }
+        for product_id, quantity in quantities.items():
+            row = rows.get(product_id)
+            if quantity <= 0:
+                if row is not None:
+                    db.session.delete(row)
+            elif row is not None:
+                row.quantity = quantity
+            else:
+                db.session.add(Cart(user_id=user_id, product_id=product_id, quantity=quantity))
+        db.session.commit()
+
+    def deduct(self, user_id, quantities):
+        for product_id, quantity in quantities.items():
+            Cart.query.filter_by(user_id=user_id, product_id=product_id).update(
+                {"quantity": Cart.quantity - quantity}, synchronize_session=False
+            )
+        Cart.query.filter(Cart.user_id == user_id, Cart.quantity <= 0).delete(synchronize_session=False)
+        db.session.commit()
+
+
+class MemoryCartStore:
+    """
+    Carts in a per-process dict, persisted to the carts table by flush().
+    Carts that are flushed and idle are dropped again by evict_idle().
+    Only suitable for a single worker process; use RedisCartStore otherwise.
+    """
+    write_behind = True
+
+    def __init__(self):
+        self._carts = {}  # user_id -> {product_id: quantity}
+        self._dirty = set()
+        self._used_at = {}  # user_id -> time.monotonic() saat terakhir dipakai
+        self._lock = threading.Lock()
+
+    def is_loaded(self, user_id):
+        with self._lock:
+            if user_id not in self._carts:
+                return False
+            # Tandai dipakai, agar evict_idle tidak membuangnya sebelum add/set_many berikutnya
+            self._used_at[user_id] = time.monotonic()
+            return True
+
+    def load(self, user_id, items):
+        with self._lock:
+            self._carts.setdefault(user_id, dict(items))
+            self._used_at[user_id] = time.monotonic()
+
+    def items(self, user_id):
+        with self._lock:
+            self._used_at[user_id] = time.monotonic()
+            return dict(self._carts.get(user_id, {}))
+
+    def snapshot(self, user_id):
+        with self._lock:
+            cart = self._carts.get(user_id)
+            return dict(cart) if cart is not None else None
+
+    def add(self, user_id, product_id, quantity):
+        with self._lock:
+            cart = self._carts.setdefault(user_id, {})
+            total = cart.get(product_id, 0) + quantity
+            if total > 0:
+                cart[product_id] = total
+            else:
+                cart.pop(product_id, None)
+            self._dirty.add(user_id)
+            self._used_at[user_id] = time.monotonic()
+
+    def set_many(self, user_id, quantities):
+        with self._lock:
+            cart = self._carts.setdefault(user_id, {})
+            for product_id, quantity in quantities.items():
+                if quantity > 0:
+                    cart[product_id] = quantity
+                else:
+                    cart.pop(product_id, None)
+            self._dirty.add(user_id)
+            self._used_at[user_id] = time.monotonic()
+
+    def deduct(self, user_id, quantities):
+        for product_id, quantity in quantities.items():
+            self.add(user_id, product_id, -quantity)
+
+    def take_dirty(self, limit):
+        with self._lock:
+            taken = set(list(self._dirty)[:limit])
+            self._dirty -= taken
+            return taken
+
+    def mark_dirty(self, user_ids):
+        with self._lock:
+            self._dirty.update(user_ids)
+
+    def evict_idle(self, idle_seconds):
+        """
+        Drop carts with no unflushed changes that were not used for idle_seconds;
+        they are loaded from the carts table again on next use.
+        :return: Number of carts dropped.
+        """
+        cutoff = time.monotonic() - idle_seconds
+        with self._lock:
+            idle = [
+                user_id for user_id in self._carts
+                if user_id not in self._dirty and self._used_at.get(user_id, 0) <= cutoff
+            ]
+            for user_id in idle:
+                del self._carts[user_id]
+                self._used_at.pop(user_id, None)
+            return len(idle)
+
+
+class RedisCartStore:
+    """
+    Carts as Redis hashes (one per user, field = product_id), persisted to the
+    carts table by flush(). Works with any client speaking the Redis protocol.
+    """
+    write_behind = True
+    LOADED_FIELD = "_loaded"
+
+    def __init__(self, client, key_prefix="petshop:cart:"):
+        self.client = client
+        self.key_prefix = key_prefix
+        self.dirty_key = f"{key_prefix}dirty"
+
+    def _key(self, user_id):
+        return f"{self.key_prefix}{user_id}"
+
+    def is_loaded(self, user_id):
+        return bool(self.client.hexists(self._key(user_id), self.LOADED_FIELD))
+
+    def load(self, user_id, items):
+        # HSETNX: jangan timpa perubahan yang masuk selagi data dimuat dari database
+        pipe = self.client.pipeline()
+        for product_id, quantity in items.items():
+            pipe.hsetnx(self._key(user_id), product_id, quantity)
+        pipe.hset(self._key(user_id), self.LOADED_FIELD, 1)
+        pipe.execute()
+
+    def items(self, user_id):
+        raw = self.client.hgetall(self._key(user_id))
+        return {
+            int(field): int(value)
+            for field, value in raw.items()
+            if (field.decode() if isinstance(field, bytes) else field) != self.LOADED_FIELD and int(value) > 0
+        }
+
+    def snapshot(self, user_id):
+        return self.items(user_id) if self.is_loaded(user_id) else None
+
+    def add(self, user_id, product_id, quantity):
+        total = self.client.hincrby(self._key(user_id), product_id, quantity)
+        if total <= 0:
+            self.client.hdel(self._key(user_id), product_id)
+        self.client.sadd(self.dirty_key, user_id)
+
+    def set_many(self, user_id, quantities):
+        pipe = self.client.pipeline()
+        for product_id, quantity in quantities.items():
+            if quantity > 0:
+                pipe.hset(self._key(user_id), product_id, quantity)
+            else:
+                pipe.hdel(self._key(user_id), product_id)
+        pipe.sadd(self.dirty_key, user_id)
+        pipe.execute()
+
+    def deduct(self, user_id, quantities):
+        for product_id, quantity in quantities.items():
+            self.add(user_id, product_id, -quantity)
+
+    def take_dirty(self, limit):
+        return {int(user_id) for user_id in (self.client.spop(self.dirty_key, limit) or [])}
+
+    def mark_dirty(self, user_ids):
+        if user_ids:
+            self.client.sadd(self.dirty_key, *user_ids)
+
+    def evict_idle(self, idle_seconds):
+        # Memori Redis diatur oleh Redis sendiri, tidak ada yang perlu dibuang di sini
+        return 0
+
+
+class CartStore:
+    """
+    Flask extension in front of the cart backend.
+
+    CART_STORE_BACKEND: 'database' (default, carts table only), 'memory' or
+    'redis'. The key-value backends load a user's cart from the carts table on
+    first use and write changes back in batches (write-behind) every
+    CART_FLUSH_INTERVAL seconds, on `flask flush-carts` and at shutdown.
+    After a flush the memory backend drops carts idle for CART_IDLE_SECONDS.
+    A Redis client (e.g. a fake for local runs) can be injected through
+    CART_REDIS_CLIENT.
+    """
+
+    def __init__(self, app=None):
+        self.backend = DatabaseCartStore()
+        self._last_flush = time.monotonic()
+        self._flush_lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        backend = app.config.get("CART_STORE_BACKEND", "database")
+        if backend == "redis":
+            client = app.config.get("CART_REDIS_CLIENT")
+            if client is None:
+                import redis  # Dependensi opsional, hanya dibutuhkan untuk backend redis
+                client = redis.Redis.from_url(app.config["CART_REDIS_URL"])
+            self.backend = RedisCartStore(client, key_prefix=app.config.get("CART_KEY_PREFIX", "petshop:cart:"))
+        elif backend == "memory":
+            self.backend = MemoryCartStore()
+        else:
+            self.backend = DatabaseCartStore()
+
+        if self.backend.write_behind:
+            def flush_on_exit():
+                with app.app_context():
+                    self.flush()
+            atexit.register(flush_on_exit)
+
+        app.extensions["cart_store"] = self
+
+    @property
+    def write_behind(self):
+        return self.backend.write_behind
+
+    def _ensure_loaded(self, user_id):
+        if not self.backend.is_loaded(user_id):
+            self.backend.load(user_id, _load_from_database(user_id))
+
+    def items(self, user_id):
+        """
+        Consistent snapshot of a user's cart as {product_id: quantity}.
+        """
+        self._ensure_loaded(user_id)
+        return self.backend.items(user_id)
+
+    def add(self, user_id, product_id, quantity):
+        self._ensure_loaded(user_id)
+        self.backend.add(user_id, product_id, quantity)
+        self._changed()
+
+    def set_many(self, user_id, quantities):
+        """
+        Set several lines at once; a quantity of 0 removes the line.
+        """
+        self._ensure_loaded(user_id)
+        self.backend.set_many(user_id, quantities)
+        self._changed()
+
+    def deduct(self, user_id, quantities):
+        """
+        Subtract purchased quantities, keeping anything added since the snapshot.
+        """
+        self._ensure_loaded(user_id)
+        self.backend.deduct(user_id, quantities)
+        self._changed()
+
+    def _changed(self):
+        interval = current_app.config.get("CART_FLUSH_INTERVAL", 5)
+        if self.write_behind and time.monotonic() - self._last_flush >= interval:
+            self._last_flush = time.monotonic()
+            submit(self.flush)
+
+    def flush(self):
+        """
+        Write every changed cart to the carts table, CART_FLUSH_BATCH_SIZE users per transaction.
+        :return: Number of carts written.
+        """
+        if not self.write_behind:
+            return 0
+        batch_size = current_app.config.get("CART_FLUSH_BATCH_SIZE", 200)
+        written = 0
+        with self._flush_lock:
+            while True:
+                user_ids = self.backend.take_dirty(batch_size)
+                if not user_ids:
+                    self.backend.evict_idle(current_app.config.get("CART_IDLE_SECONDS", 300))
+                    return written
+                try:
+                    written += self._persist(user_ids)
+                except Exception:
+                    db.session.rollback()
+                    self.backend.mark_dirty(user_ids)
+                    raise
+
+    def flush_user(self, user_id):
+        """
+        Persist one user's cart now, e.g. before resolving legacy cart row ids.
+        """
+        if self.write_behind:
+            with self._flush_lock:
+                self._persist([user_id])
+
+    def _persist(self, user_ids):
+        snapshots = {user_id: self.backend.snapshot(user_id) for user_id in user_ids}
+        snapshots = {user_id: items for user_id, items in snapshots.items() if items is not None}
+        if not snapshots:
+            return 0
+
+        product_ids = {product_id for items in snapshots.values() for product_id in items}
+        live_products = {
+            product_id for (product_id,) in
+            db.session.query(Product.id).filter(Product.id.in_(product_ids)).all()
+        } if product_ids else set()
+
+        rows = Cart.query.filter(Cart.user_id.in_(list(snapshots))).all()
+        existing = {(row.user_id, row.product_id): row for row in rows}
+        for user_id, items in snapshots.items():
+            deleted = {product_id: 0 for product_id in items if product_id not in live_products}
+            if deleted:
+                # Produk sudah dihapus; barisnya akan melanggar foreign key, jadi buang dari keranjang
+                self.backend.set_many(user_id, deleted)
+            for product_id, quantity in items.items():
+                if product_id in deleted:
+                    continue
+                row = existing.pop((user_id, product_id), None)
+                if row is None:
+                    db.session.add(Cart(user_id=user_id, product_id=product_id, quantity=quantity))
+                elif row.quantity != quantity:
+                    row.quantity = quantity
+        for row in existing.values():
+            db.session.delete(row)
+        db.session.commit()
+        return len(snapshots)
+
+
+cart_store = CartStore()
+
+
+@click.command("flush-carts")
+@with_appcontext
+def flush_carts_command():
+    """Write carts held in the cart store back to the carts table."""
+    written = cart_store.flush()
+    click.echo(f"Flushed {written} cart(s)")
@@ -0,0 +1,212 @@
+from flask import current_app
+from sqlalchemy import func
+from sqlalchemy.orm import load_only
+from connectors.db import db
+from models.product import Product, product_load_options
+from models.product_image import ProductImage
+from models.promotion import Promotion
+
+
+# Field yang bisa dipilih lewat ?fields=, beserta kolom yang dibutuhkan masing-masing.
+# images dan promotion tidak butuh kolom, tapi butuh query tambahan.
+PRODUCT_FIELDS = {
+    "id": (Product.id,),
+    "nama_produk": (Product.nama_produk,),
+    "deskripsi": (Product.deskripsi,),
+    "harga": (Product.harga,),
+    "effective_price": (Product.effective_price,),
+    "stok": (Product.stok,),
+    "images": (),
+    "kategori": (Product.kategori,),
+    "jenis_hewan": (Product.jenis_hewan,),
+    "berat": (Product.berat,),
+    "ukuran": (Product.panjang, Product.lebar, Product.tinggi),
+    "promotion": (),
+}
+
+
+class FieldsetError(ValueError):
+    """Raised when ?fields= names a field the product endpoints don't have."""
+
+
+def parse_fields(raw):
+    """
+    Parse a comma separated ?fields= value.
+    :return: Frozenset of field names (always including id), or None for the full shape.
+    """
+    if not raw:
+        return None
+    names = {name.strip() for name in raw.split(",") if name.strip()}
+    unknown = names - PRODUCT_FIELDS.keys()
+    if unknown:
+        raise FieldsetError(
+            f"Unknown field(s): {', '.join(sorted(unknown))}. Valid options: {', '.join(PRODUCT_FIELDS)}"
+        )
+    return frozenset(names | {"id"})
+
+
+def fieldset_load_options(fields, *extra_columns):
+    """
+    Loader options that SELECT only the columns behind the requested fields.
+    :param extra_columns: Columns the caller needs as well (e.g. the sort column).
+    """
+    if fields is None:
+        return []
+    columns = {column.key: column for name in fields for column in PRODUCT_FIELDS[name]}
+    for column in extra_columns:
+        columns.setdefault(column.key, column)
+    return [load_only(*columns.values())]
+
+
+def load_product_relations(product_ids, images=True, promotions=True):
+    """
+    Fetch images and the latest promotion for many products at once.
+    Costs at most two queries, no matter how many ids are given.
+    :param product_ids: Iterable of product IDs.
+    :param images: Set to False to skip the image query.
+    :param promotions: Set to False to skip the promotion query.
+    :return: Tuple (images_by_product, promotion_by_product).
+    """
+    product_ids = list({pid for pid in product_ids if pid is not None})
+    images_by_product = {pid: [] for pid in product_ids}
+    promotion_by_product = {}
+    if not product_ids:
+        return images_by_product, promotion_by_product
+
+    if images:
+        images_by_product = _load_images(product_ids, images_by_product)
+    if promotions:
+        promotion_by_product = _load_latest_promotions(product_ids)
+    return images_by_product, promotion_by_product
+
+
+def _load_images(product_ids, images_by_product):
+    images = (
+        ProductImage.query
+        .filter(ProductImage.product_id.in_(product_ids), ProductImage.status == "ready")
+        .order_by(ProductImage.product_id, ProductImage.id)
+        .all()
+    )
+    for image in images:
+        images_by_product[image.product_id].append(image)
+    return images_by_product
+
+
+def _load_latest_promotions(product_ids):
+    promotion_by_product = {}
+    # Promosi terbaru per produk = promotion dengan id terbesar
+    latest_ids = (
+        db.session.query(func.max(Promotion.id).label("id"))
+        .filter(Promotion.product_id.in_(product_ids))
+        .group_by(Promotion.product_id)
+        .subquery()
+    )
+    promotions = Promotion.query.join(latest_ids, Promotion.id == latest_ids.c.id).all()
+    for promotion in promotions:
+        promotion_by_product[promotion.product_id] = promotion
+    return promotion_by_product
+
+
+def product_payload(product, images, promotion, include_dimensions=True, fields=None):
+    """
+    Build the JSON shape used by the product endpoints for a single product.
+    :param fields: Optional set of field names to keep (see parse_fields); columns
+        outside it are never touched, so they may be left unloaded.
+    """
+    def wanted(name):
+        return fields is None or name in fields
+
+    data = {"id": product.id}
+    for name in ("nama_produk", "deskripsi", "harga", "effective_price", "stok"):
+        if wanted(name):
+            data[name] = getattr(product, name)
+    if wanted("images"):
+        data["images"] = [{"id": img.id, "url": img.image_url} for img in images]
+    for name in ("kategori", "jenis_hewan"):
+        if wanted(name):
+            data[name] = getattr(product, name)
+    if include_dimensions:
+        if wanted("berat"):
+            data["berat"] = product.berat
+        if wanted("ukuran"):
+            data["ukuran"] = {
+                "panjang": product.panjang,
+                "lebar": product.lebar,
+                "tinggi": product.tinggi,
+            }
+    if wanted("promotion"):
+        data["promotion"] = promotion.to_dict() if promotion else None
+    return data
+
+
+def serialize_products(products, include_dimensions=True, fields=None):
+    """
+    Serialize a list of products with their images and latest promotion.
+    Relations are loaded in bulk, so the query count does not grow with the list;
+    with a fields set, relations that aren't requested are not queried at all.
+    """
+    images_by_product, promotion_by_product = load_product_relations(
+        (p.id for p in products),
+        images=fields is None or "images" in fields,
+        promotions=fields is None or "promotion" in fields,
+    )
+    return [
+        product_payload(
+            product,
+            images_by_product.get(product.id, []),
+            promotion_by_product.get(product.id),
+            include_dimensions=include_dimensions,
+            fields=fields,
+        )
+        for product in products
+    ]
+
+
+def serialize_product(product, fields=None):
+    """
+    Serialize a single product in the detail shape.
+    """
+    return serialize_products([product], fields=fields)[0]
+
+
+def iter_catalog(batch_size=500, fmt="ndjson", fields=None):
+    """
+    Stream the whole catalog as JSON without materializing it.
+
+    Products are read in keyset pages (id > last id of the previous page) and
+    each page is fetched completely before its images and promotions are
+    loaded, so no cursor stays open while other queries run (MySQL's
+    unbuffered cursors allow only one at a time). Peak memory depends on
+    batch_size, not on catalog size.
+    :param fmt: 'ndjson' for one product per line, 'json' for the listing shape.
+    :param fields: Optional sparse fieldset (see parse_fields).
+    """
+    query = (
+        Product.query
+        .options(*product_load_options("listing"), *fieldset_load_options(fields))
+        .order_by(Product.id)
+    )
+    dumps = current_app.json.dumps
+
+    if fmt == "json":
+        yield '{"msg": "Products exported successfully", "products": ['
+
+    first = True
+    last_id = None
+    while True:
+        page = query if last_id is None else query.filter(Product.id > last_id)
+        batch = page.limit(batch_size).all()
+        if not batch:
+            break
+        last_id = batch[-1].id
+
+        items = serialize_products(batch, fields=fields)
+        if fmt == "json":
+            chunk = ",".join(dumps(item) for item in items)
+            yield chunk if first else "," + chunk
+        else:
+            yield "".join(dumps(item) + "\n" for item in items)
+        first = False
+
+    if fmt == "json":
+        yield "]}"
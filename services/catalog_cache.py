@@ -0,0 +1,131 @@
+from functools import wraps
+from urllib.parse import urlencode
+from flask import request, current_app, make_response
+from connectors.cache import cache, NullCache
+from services.etag import etag_matches, not_modified
+from middlewares.replica import read_from_primary
+from middlewares.compression import compress_variants, negotiate_encoding, use_encoded_body
+
+# Tag untuk semua halaman listing; halaman juga diberi tag per produk di dalamnya
+LISTINGS_TAG = "catalog:listings"
+
+# Kolom yang dipakai listing dan facet untuk filter atau urutan
+LISTING_FIELDS = ("nama_produk", "effective_price", "kategori", "jenis_hewan")
+
+
+def product_tag(product_id):
+    return f"catalog:product:{product_id}"
+
+
+def catalog_cache_key(kind):
+    """
+    Build a cache key covering the path and the full (sorted) query string.
+    """
+    query_string = urlencode(sorted(request.args.items(multi=True)))
+    return f"catalog:{kind}:{request.path}?{query_string}"
+
+
+def _response_tags(kind, payload):
+    tags = set()
+    if kind == "listing":
+        tags.add(LISTINGS_TAG)
+        for product in payload.get("products", []):
+            tags.add(product_tag(product["id"]))
+    elif payload.get("product"):
+        tags.add(product_tag(payload["product"]["id"]))
+    return tags
+
+
+def cached_response(kind):
+    """
+    Cache successful GET responses of a catalog endpoint.
+    The body is stored along with its gzip/brotli variants, so hits are served
+    precompressed instead of being compressed again on every request.
+    Cache fills read from the primary, even under @use_replica, so a lagging
+    replica cannot put stale data back right after an invalidation.
+    :param kind: 'listing' or 'detail', decides how entries are tagged for invalidation.
+    """
+    def decorator(f):
+        @wraps(f)
+        def wrapper(*args, **kwargs):
+            key = catalog_cache_key(kind)
+            try:
+                entry = cache.get(key)
+            except Exception as e:
+                current_app.logger.warning(f"Catalog cache read failed: {e}")
+                entry = None
+
+            if entry is not None:
+                etag = entry.get("etag")
+                if etag and etag_matches(etag):
+                    return not_modified(etag)
+                response = current_app.response_class(entry["body"], status=200, mimetype="application/json")
+                if etag:
+                    response.set_etag(etag)
+                response.headers["X-Cache"] = "HIT"
+                return _with_encoding(response, entry.get("encoded", {}))
+
+            fill_from_primary()
+            response = make_response(f(*args, **kwargs))
+            if response.status_code == 200 and response.is_json:
+                body = response.get_data()
+                encoded = compress_variants(body, current_app.config)
+                try:
+                    cache.set(
+                        key,
+                        {"body": body, "etag": response.get_etag()[0], "encoded": encoded},
+                        ttl=current_app.config.get("CATALOG_CACHE_TTL"),
+                        tags=_response_tags(kind, response.get_json()),
+                    )
+                except Exception as e:
+                    current_app.logger.warning(f"Catalog cache write failed: {e}")
+                response = _with_encoding(response, encoded)
+            response.headers["X-Cache"] = "MISS"
+            return response
+        return wrapper
+    return decorator
+
+
+def fill_from_primary():
+    """
+    Read the rest of the request from the primary when its result is going to
+    be cached, so replica lag is not stored for the whole TTL right after an
+    invalidation. Without a cache nothing is stored and replicas stay in use.
+    """
+    if not isinstance(cache.backend, NullCache):
+        read_from_primary()
+
+
+def _with_encoding(response, encoded):
+    """
+    Swap in the precompressed body matching Accept-Encoding, if there is one.
+    """
+    encoding = negotiate_encoding()
+    if encoding and encoding in encoded:
+        use_encoded_body(response, encoded[encoding], encoding)
+        response.vary.add("Accept-Encoding")
+    return response
+
+
+def invalidate_product(*product_ids):
+    """
+    Evict the detail entry of each product and every cached listing page that contains it.
+    """
+    tags = [product_tag(pid) for pid in product_ids if pid is not None]
+    if tags:
+        cache.invalidate_tags(*tags)
+
+
+def listing_fields(product):
+    """
+    Values of the columns listings and facets filter or sort on; if they change,
+    the product may move between listing pages and facet counts.
+    """
+    return tuple(getattr(product, field) for field in LISTING_FIELDS)
+
+
+def invalidate_listings():
+    """
+    Evict all cached listing pages, used when a product may enter or move within a listing.
+    """
+    cache.invalidate_tags(LISTINGS_TAG)
@@ -0,0 +1,121 @@
+import hashlib
+from datetime import datetime
+from urllib.parse import urlencode
+from flask import request, current_app, make_response
+from sqlalchemy import func
+from connectors.db import db
+from models.product import Product
+from models.product_image import ProductImage
+from models.promotion import Promotion
+
+
+def product_versions(product_ids):
+    """
+    Fetch a cheap version marker for each product in a single aggregate query,
+    without loading images or promotions.
+    The marker covers Product.updated_at, the image set and the latest promotion.
+    :return: Dict {product_id: version tuple}, missing products are left out.
+    """
+    product_ids = list(set(product_ids))
+    if not product_ids:
+        return {}
+
+    images = (
+        db.session.query(
+            ProductImage.product_id.label("product_id"),
+            func.count(ProductImage.id).label("count"),
+            func.max(ProductImage.id).label("max_id"),
+            func.sum(ProductImage.id).label("sum_id"),
+        )
+        .filter(ProductImage.product_id.in_(product_ids), ProductImage.status == "ready")
+        .group_by(ProductImage.product_id)
+        .subquery()
+    )
+    latest_promotion = (
+        db.session.query(
+            Promotion.product_id.label("product_id"),
+            func.max(Promotion.id).label("id"),
+        )
+        .filter(Promotion.product_id.in_(product_ids))
+        .group_by(Promotion.product_id)
+        .subquery()
+    )
+
+    rows = (
+        db.session.query(
+            Product.id,
+            Product.created_at,
+            Product.updated_at,
+            images.c.count,
+            images.c.max_id,
+            images.c.sum_id,
+            Promotion.id,
+            Promotion.created_at,
+            Promotion.updated_at,
+            Promotion.promotion_period_start,
+            Promotion.promotion_period_end,
+        )
+        .outerjoin(images, images.c.product_id == Product.id)
+        .outerjoin(latest_promotion, latest_promotion.c.product_id == Product.id)
+        .outerjoin(Promotion, Promotion.id == latest_promotion.c.id)
+        .filter(Product.id.in_(product_ids))
+        .all()
+    )
+
+    now = datetime.utcnow()
+    versions = {}
+    for row in rows:
+        (product_id, created_at, updated_at, image_count, image_max, image_sum,
+         promotion_id, promotion_created, promotion_updated, start, end) = row
+        # Status aktif promosi berubah seiring waktu tanpa mengubah updated_at
+        promotion_active = bool(start and end and start <= now <= end)
+        versions[product_id] = (
+            updated_at or created_at, image_count, image_max, image_sum,
+            promotion_id, promotion_updated or promotion_created, promotion_active,
+        )
+    return versions
+
+
+def compute_etag(*parts):
+    """
+    Hash the request path, the full query string and the given parts into an ETag value.
+    """
+    digest = hashlib.sha256()
+    digest.update(request.path.encode())
+    digest.update(urlencode(sorted(request.args.items(multi=True))).encode())
+    for part in parts:
+        digest.update(repr(part).encode())
+    return digest.hexdigest()[:32]
+
+
+def etag_matches(etag):
+    # Respons terkompresi membawa ETag dengan akhiran coding (lihat middlewares.compression)
+    return any(
+        request.if_none_match.contains(candidate)
+        for candidate in (etag, f"{etag}-gzip", f"{etag}-br")
+    )
+
+
+def not_modified(etag):
+    """
+    Build an empty 304 response carrying the ETag.
+    """
+    response = current_app.response_class(status=304)
+    response.set_etag(etag)
+    return response
+
+
+def conditional_response(etag, build):
+    """
+    Return 304 when the client already has this ETag, otherwise call build() for the body.
+    Only GET and HEAD are conditional; other methods (e.g. POST /products/batch)
+    always get the full body, since a 304 is not a valid answer to them.
+    """
+    if request.method not in ("GET", "HEAD"):
+        return build()
+    if etag_matches(etag):
+        return not_modified(etag)
+    response = make_response(build())
+    if response.status_code == 200:
+        response.set_etag(etag)
+    return response
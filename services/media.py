@@ -0,0 +1,447 @@
+import hashlib
+import io
+import ipaddress
+import os
+import shutil
+import socket
+import tempfile
+import time
+import uuid
+import urllib.request
+import click
+from concurrent.futures import ThreadPoolExecutor
+from flask import current_app
+from flask.cli import with_appcontext
+from urllib.parse import urlparse
+from werkzeug.datastructures import FileStorage
+import cloudinary.uploader
+from sqlalchemy.exc import IntegrityError
+from connectors.db import db
+from models.media_blob import MediaBlob
+from models.product_image import ProductImage
+from services.background import submit
+from services.catalog_cache import invalidate_product
+
+
+class UploadError(Exception):
+    """Raised when one of a group of uploads fails; nothing from the group is kept."""
+
+
+class CloudinaryUploader:
+    """Uploads images to Cloudinary."""
+
+    def upload(self, file, timeout=None, **options):
+        if timeout:
+            options["timeout"] = timeout
+        result = cloudinary.uploader.upload(file, **options)
+        return {"url": result["secure_url"], "public_id": result["public_id"]}
+
+    def destroy(self, public_id):
+        cloudinary.uploader.destroy(public_id)
+
+
+class LocalStorage:
+    """
+    Stores images on the local filesystem, served back through /files/media/<name>.
+    """
+
+    def __init__(self, root, base_url="/files/media/"):
+        self.root = root
+        self.base_url = base_url
+        os.makedirs(root, exist_ok=True)
+
+    def upload(self, file, timeout=None, **options):
+        extension = os.path.splitext(getattr(file, "filename", None) or getattr(file, "name", "") or "")[1]
+        public_id = f"{uuid.uuid4().hex}{extension.lower()}"
+        with open(os.path.join(self.root, public_id), "wb") as target:
+            shutil.copyfileobj(getattr(file, "stream", file), target)
+        return {"url": f"{self.base_url}{public_id}", "public_id": public_id}
+
+    def destroy(self, public_id):
+        path = os.path.join(self.root, os.path.basename(public_id))
+        if os.path.exists(path):
+            os.remove(path)
+
+
+class FakeUploader:
+    """
+    Uploader that keeps files in memory, for tests and offline runs.
+    :param fail_on: Optional filenames whose upload should raise.
+    """
+
+    def __init__(self, base_url="https://media.local/", fail_on=()):
+        self.base_url = base_url
+        self.fail_on = set(fail_on)
+        self.files = {}
+
+    def upload(self, file, timeout=None, **options):
+        if getattr(file, "filename", None) in self.fail_on:
+            raise IOError(f"Fake upload failure for {file.filename}")
+        public_id = uuid.uuid4().hex
+        self.files[public_id] = file.read()
+        return {"url": f"{self.base_url}{public_id}", "public_id": public_id}
+
+    def destroy(self, public_id):
+        self.files.pop(public_id, None)
+
+
+def init_media(app):
+    """
+    Register the image storage backend and the bounded upload thread pool.
+    IMAGE_UPLOADER is 'cloudinary' (default), 'local' or 'fake'; an uploader
+    object can also be injected directly through IMAGE_UPLOADER_INSTANCE.
+    """
+    uploader = app.config.get("IMAGE_UPLOADER_INSTANCE")
+    if uploader is None:
+        backend = app.config.get("IMAGE_UPLOADER", "cloudinary")
+        if backend == "fake":
+            uploader = FakeUploader()
+        elif backend == "local":
+            uploader = LocalStorage(app.config["MEDIA_LOCAL_ROOT"])
+        else:
+            uploader = CloudinaryUploader()
+    app.extensions["image_uploader"] = uploader
+    os.makedirs(app.config.get("MEDIA_SPOOL_DIR", _default_spool_dir()), exist_ok=True)
+    app.extensions["upload_pool"] = ThreadPoolExecutor(
+        max_workers=app.config.get("UPLOAD_MAX_WORKERS", 4),
+        thread_name_prefix="upload",
+    )
+
+
+def _default_spool_dir():
+    return os.path.join(tempfile.gettempdir(), "petshop-media-spool")
+
+
+def get_uploader():
+    return current_app.extensions["image_uploader"]
+
+
+def _destroy_quietly(uploader, public_id):
+    try:
+        uploader.destroy(public_id)
+    except Exception as e:
+        current_app.logger.error(f"Failed to clean up uploaded image {public_id}: {e}")
+
+
+def hash_file(file, chunk_size=64 * 1024):
+    """
+    SHA-256 of the file contents, read in chunks; the stream is rewound afterwards.
+    """
+    stream = getattr(file, "stream", file)
+    digest = hashlib.sha256()
+    for chunk in iter(lambda: stream.read(chunk_size), b""):
+        digest.update(chunk)
+    stream.seek(0)
+    return digest.hexdigest()
+
+
+def find_blobs(hashes):
+    """
+    Look up stored blobs by content hash in one query.
+    :return: Dict of content_hash -> MediaBlob for the hashes that exist.
+    """
+    hashes = set(hashes)
+    if not hashes:
+        return {}
+    blobs = MediaBlob.query.filter(MediaBlob.content_hash.in_(hashes)).all()
+    return {blob.content_hash: blob for blob in blobs}
+
+
+def upload_images(files, hashes=None, **options):
+    """
+    Upload several files concurrently on the shared upload pool, skipping any
+    content that is already stored.
+
+    Files are hashed first; content found in media_blobs (or repeated within
+    the same call) is reused instead of uploaded again. New blobs are flushed
+    in a savepoint, so the caller's commit records them; if a concurrent
+    request stored the same content first, its blob is used and the duplicate
+    upload is destroyed.
+
+    Every upload gets UPLOAD_TIMEOUT seconds (passed to the uploader and used
+    when waiting on it). If any upload fails or times out,
+    the images that did upload are destroyed (including ones that finish after
+    the failure) and UploadError is raised, so callers can roll back without
+    leaving orphaned assets.
+    :param hashes: Optional precomputed content hashes, one per file.
+    :return: List of {"url", "public_id", "content_hash"} in the same order as files.
+    """
+    if not files:
+        return []
+
+    hashes = hashes or [hash_file(file) for file in files]
+    blobs = find_blobs(hashes)
+    missing = {}
+    for file, content_hash in zip(files, hashes):
+        if content_hash not in blobs:
+            missing.setdefault(content_hash, file)
+
+    uploader = get_uploader()
+    for content_hash, result in zip(missing, _upload_concurrently(list(missing.values()), **options)):
+        blobs[content_hash] = _record_blob(content_hash, result, uploader)
+
+    return [
+        {"url": blobs[h].url, "public_id": blobs[h].public_id, "content_hash": h}
+        for h in hashes
+    ]
+
+
+def _upload_concurrently(files, **options):
+    if not files:
+        return []
+
+    uploader = get_uploader()
+    pool = current_app.extensions["upload_pool"]
+    timeout = current_app.config.get("UPLOAD_TIMEOUT", 30)
+    app = current_app._get_current_object()
+
+    futures = [pool.submit(uploader.upload, file, timeout=timeout, **options) for file in files]
+    results, error = [], None
+    for future in futures:
+        try:
+            results.append(future.result(timeout=timeout))
+        except Exception as e:
+            error = e
+            break
+
+    if error is None:
+        return results
+
+    for result in results:
+        _destroy_quietly(uploader, result["public_id"])
+
+    def cleanup_late(future):
+        # Upload yang baru selesai setelah kegagalan juga harus dihapus
+        if not future.cancelled() and future.exception() is None:
+            with app.app_context():
+                _destroy_quietly(uploader, future.result()["public_id"])
+
+    for future in futures[len(results):]:
+        if not future.cancel():
+            future.add_done_callback(cleanup_late)
+
+    raise UploadError(str(error) or error.__class__.__name__)
+
+
+def _check_fetch_url(url):
+    """
+    Only fetch http(s) URLs whose host resolves to public addresses, so import
+    files cannot make the server read internal services.
+    :raises ValueError: If the URL is not allowed.
+    """
+    parsed = urlparse(url)
+    if parsed.scheme not in ("http", "https") or not parsed.hostname:
+        raise ValueError(f"Only http(s) image URLs can be imported: {url}")
+    try:
+        addresses = {info[4][0] for info in socket.getaddrinfo(parsed.hostname, parsed.port or None)}
+    except socket.gaierror as e:
+        raise ValueError(f"Cannot resolve {parsed.hostname}: {e}")
+    if not all(ipaddress.ip_address(address.split("%")[0]).is_global for address in addresses):
+        raise ValueError(f"Image URL points to a non-public address: {url}")
+
+
+class _CheckedRedirectHandler(urllib.request.HTTPRedirectHandler):
+    def redirect_request(self, req, fp, code, msg, headers, newurl):
+        _check_fetch_url(newurl)
+        return super().redirect_request(req, fp, code, msg, headers, newurl)
+
+
+_fetch_opener = urllib.request.build_opener(_CheckedRedirectHandler)
+
+
+def _download(url, timeout, max_bytes):
+    _check_fetch_url(url)
+    with _fetch_opener.open(url, timeout=timeout) as response:
+        data = response.read(max_bytes + 1)
+    if len(data) > max_bytes:
+        raise ValueError(f"Image at {url} is larger than {max_bytes} bytes")
+    return data
+
+
+def fetch_remote_image(url):
+    """
+    Download an image URL (e.g. from a product import) so it can go through
+    upload_images like an uploaded file: content hash, uploader and timeouts.
+    Waits at most UPLOAD_TIMEOUT seconds and reads at most MEDIA_FETCH_MAX_BYTES.
+    :return: FileStorage holding the downloaded bytes.
+    :raises ValueError: If the URL is not allowed or the file is too large.
+    :raises OSError: If the download fails.
+    """
+    data = _download(
+        url,
+        timeout=current_app.config.get("UPLOAD_TIMEOUT", 30),
+        max_bytes=current_app.config.get("MEDIA_FETCH_MAX_BYTES", 10 * 1024 * 1024),
+    )
+    filename = os.path.basename(urlparse(url).path) or "image"
+    return FileStorage(stream=io.BytesIO(data), filename=filename)
+
+
+def spool_images(files, product_id, hashes=None):
+    """
+    Add ProductImage rows for files that will be uploaded in the background.
+    Content that is already stored becomes a 'ready' image straight away;
+    everything else is written to the spool directory as a 'pending' row.
+    The caller commits and then hands the rows to enqueue_pending_images.
+    :return: List of the new ProductImage objects.
+    """
+    spool_dir = current_app.config.get("MEDIA_SPOOL_DIR", _default_spool_dir())
+    hashes = hashes or [hash_file(file) for file in files]
+    blobs = find_blobs(hashes)
+    images = []
+    for file, content_hash in zip(files, hashes):
+        blob = blobs.get(content_hash)
+        if blob:
+            image = ProductImage(product_id=product_id, image_url=blob.url, content_hash=content_hash)
+        else:
+            extension = os.path.splitext(file.filename or "")[1].lower()
+            path = os.path.join(spool_dir, f"{uuid.uuid4().hex}{extension}")
+            file.save(path)
+            image = ProductImage(
+                product_id=product_id, content_hash=content_hash, status="pending", spool_path=path
+            )
+        db.session.add(image)
+        images.append(image)
+    return images
+
+
+def sync_product_images(product, files, async_upload=False):
+    """
+    Make a product's images match the given files, compared by content hash.
+
+    Images whose content is still among the files are kept as they are, images
+    whose content is gone are deleted, and only new content is uploaded (or
+    spooled when async_upload is set). Uploads happen before anything is
+    deleted, so an UploadError leaves the product untouched. The caller commits.
+    :param product: Product loaded with its images.
+    :return: The new ProductImage rows.
+    """
+    hashes = [hash_file(file) for file in files]
+    wanted = set(hashes)
+
+    kept = {}
+    for image in product.images:
+        # Gambar lama tanpa hash atau yang gagal di-upload selalu diganti
+        if image.content_hash in wanted and image.status != "failed" and image.content_hash not in kept:
+            kept[image.content_hash] = image
+
+    new_files = {}
+    for file, content_hash in zip(files, hashes):
+        if content_hash not in kept:
+            new_files.setdefault(content_hash, file)
+
+    uploaded = []
+    if not async_upload:
+        uploaded = upload_images(list(new_files.values()), hashes=list(new_files))
+
+    kept_images = set(kept.values())
+    for image in list(product.images):
+        if image not in kept_images:
+            db.session.delete(image)
+
+    if async_upload:
+        return spool_images(list(new_files.values()), product.id, hashes=list(new_files))
+
+    new_images = [
+        ProductImage(product_id=product.id, image_url=item["url"], content_hash=item["content_hash"])
+        for item in uploaded
+    ]
+    db.session.add_all(new_images)
+    return new_images
+
+
+def enqueue_pending_images(image_ids):
+    """
+    Hand pending images to the background pool, one task per image.
+    """
+    for image_id in image_ids:
+        submit(process_pending_image, image_id)
+
+
+def process_pending_image(image_id):
+    """
+    Transfer one spooled image to the storage backend.
+
+    Retries up to MEDIA_MAX_ATTEMPTS times with exponential backoff
+    (MEDIA_RETRY_BACKOFF * 2^attempt seconds). The row ends as 'ready' with
+    its URL, or 'failed' with the last error; clients poll the status.
+    """
+    image = ProductImage.query.get(image_id)
+    if not image or image.status != "pending":
+        return
+
+    blob = find_blobs([image.content_hash]).get(image.content_hash) if image.content_hash else None
+    if blob:
+        # Isi yang sama sudah di-upload (mis. oleh worker lain), cukup pakai ulang
+        _mark_ready(image, blob.url)
+        return
+
+    uploader = get_uploader()
+    max_attempts = current_app.config.get("MEDIA_MAX_ATTEMPTS", 5)
+    backoff = current_app.config.get("MEDIA_RETRY_BACKOFF", 2)
+    timeout = current_app.config.get("UPLOAD_TIMEOUT", 30)
+
+    while image.attempts < max_attempts:
+        image.attempts += 1
+        try:
+            with open(image.spool_path, "rb") as spooled:
+                result = uploader.upload(spooled, timeout=timeout)
+        except FileNotFoundError as e:
+            # File spool hilang, tidak ada gunanya mencoba lagi
+            image.last_error = str(e)
+            break
+        except Exception as e:
+            image.last_error = str(e)
+            db.session.commit()
+            current_app.logger.warning(f"Upload attempt {image.attempts} for image {image.id} failed: {e}")
+            if image.attempts < max_attempts:
+                time.sleep(backoff * 2 ** (image.attempts - 1))
+            continue
+
+        url = result["url"]
+        if image.content_hash:
+            url = _record_blob(image.content_hash, result, uploader).url
+        _mark_ready(image, url)
+        return
+
+    image.status = "failed"
+    db.session.commit()
+
+
+def _record_blob(content_hash, result, uploader):
+    """
+    Store a freshly uploaded blob. If another request or worker stored the
+    same content first, keep theirs and drop this upload.
+    :return: The MediaBlob to use for the image.
+    """
+    blob = MediaBlob(content_hash=content_hash, url=result["url"], public_id=result["public_id"])
+    try:
+        with db.session.begin_nested():
+            db.session.add(blob)
+    except IntegrityError:
+        existing = find_blobs([content_hash]).get(content_hash)
+        if existing is None:
+            raise
+        _destroy_quietly(uploader, result["public_id"])
+        return existing
+    return blob
+
+
+def _mark_ready(image, url):
+    image.image_url = url
+    image.status = "ready"
+    image.last_error = None
+    spool_path, image.spool_path = image.spool_path, None
+    db.session.commit()
+    if spool_path and os.path.exists(spool_path):
+        os.remove(spool_path)
+    invalidate_product(image.product_id)
+
+
+@click.command("media-retry")
+@with_appcontext
+def media_retry_command():
+    """Process pending image uploads left over from a restart."""
+    pending = ProductImage.query.filter_by(status="pending").all()
+    for image in pending:
+        process_pending_image(image.id)
+    click.echo(f"Processed {len(pending)} pending image(s)")
@@ -0,0 +1,115 @@
+import base64
+import json
+from sqlalchemy import and_, or_
+from models.product import Product, product_load_options
+from services.catalog import fieldset_load_options
+
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 200
+
+# Kolom yang boleh dipakai untuk sort_by; harga diurutkan berdasarkan harga setelah promosi
+SORTABLE_COLUMNS = {
+    "id": Product.id,
+    "harga": Product.effective_price,
+    "nama_produk": Product.nama_produk,
+}
+
+
+class CursorError(ValueError):
+    """Raised when a pagination cursor or limit cannot be used."""
+
+
+def encode_cursor(sort_by, order, value, last_id):
+    """
+    Build an opaque cursor from the sort column value and id of the last row.
+    """
+    payload = json.dumps({"s": sort_by, "o": order, "v": value, "id": last_id}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor, sort_by, order):
+    """
+    Decode a cursor and make sure it was issued for the same ordering.
+    :return: Tuple (value, last_id).
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        value, last_id = payload["v"], int(payload["id"])
+    except (ValueError, KeyError, TypeError):
+        raise CursorError("Invalid cursor")
+
+    if payload.get("s") != sort_by or payload.get("o") != order:
+        raise CursorError("Cursor does not match the requested sort order")
+    return value, last_id
+
+
+def parse_limit(raw_limit):
+    """
+    Validate the limit query parameter.
+    """
+    if raw_limit in (None, ""):
+        return DEFAULT_LIMIT
+    try:
+        limit = int(raw_limit)
+    except (TypeError, ValueError):
+        raise CursorError("Limit must be an integer")
+    if limit <= 0:
+        raise CursorError("Limit must be greater than 0")
+    return min(limit, MAX_LIMIT)
+
+
+def paginate_products(query, args, default_sort="id", extra_sorts=None, fields=None):
+    """
+    Apply keyset pagination to a product query.
+
+    Rows are ordered by the active sort column plus Product.id, and the next
+    page starts strictly after the (value, id) pair stored in the cursor, so
+    every page costs the same regardless of how deep the client goes.
+    :param query: Filtered Product query without ordering.
+    :param args: Request args (sort_by, order, cursor, limit).
+    :param extra_sorts: Optional {name: expression} sort keys that are not
+        Product columns (e.g. search relevance). They default to descending.
+    :param fields: Optional sparse fieldset; only those columns (plus the sort
+        column) are selected.
+    :return: Tuple (products, next_cursor).
+    """
+    columns = dict(SORTABLE_COLUMNS, **(extra_sorts or {}))
+    sort_by = args.get("sort_by") or default_sort
+    if sort_by not in columns:
+        sort_by = default_sort
+    default_order = "desc" if sort_by not in SORTABLE_COLUMNS else "asc"
+    order = args.get("order", default_order)
+    order = "desc" if order == "desc" else "asc"
+    limit = parse_limit(args.get("limit"))
+    column = columns[sort_by]
+    is_expression = sort_by not in SORTABLE_COLUMNS
+
+    cursor = args.get("cursor")
+    if cursor:
+        value, last_id = decode_cursor(cursor, sort_by, order)
+        if sort_by == "id":
+            query = query.filter(Product.id < last_id if order == "desc" else Product.id > last_id)
+        elif order == "desc":
+            query = query.filter(or_(column < value, and_(column == value, Product.id < last_id)))
+        else:
+            query = query.filter(or_(column > value, and_(column == value, Product.id > last_id)))
+
+    order_columns = [column] if sort_by == "id" else [column, Product.id]
+    query = query.order_by(*[col.desc() if order == "desc" else col.asc() for col in order_columns])
+
+    sort_columns = [] if is_expression else [column]
+    query = query.options(*product_load_options("listing"), *fieldset_load_options(fields, *sort_columns))
+    if is_expression:
+        query = query.add_columns(column.label("sort_value"))
+
+    # Ambil satu baris ekstra untuk mengetahui apakah masih ada halaman berikutnya
+    rows = query.limit(limit + 1).all()
+    page = rows[:limit]
+    products = [row[0] for row in page] if is_expression else page
+
+    next_cursor = None
+    if len(rows) > limit:
+        last_value = page[-1][1] if is_expression else getattr(page[-1], column.key)
+        next_cursor = encode_cursor(sort_by, order, last_value, products[-1].id)
+    return products, next_cursor
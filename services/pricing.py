@@ -0,0 +1,92 @@
+import click
+from datetime import datetime
+from flask.cli import with_appcontext
+from connectors.db import db
+from models.product import Product, product_load_options
+from models.promotion import Promotion
+
+
+def discounted_price(harga, promotion):
+    """
+    Price after applying a promotion's discount, rounded like Promotion.apply_discount.
+    """
+    if promotion is None:
+        return harga
+    return round(harga * (1 - promotion.discount_percent / 100), 2)
+
+
+def refresh_effective_prices(product_ids, now=None):
+    """
+    Recompute Product.effective_price and Product.active_promotion_id.
+
+    The active promotion of a product is its newest promotion (highest id)
+    whose period contains `now`. Changes are added to the session but not
+    committed, so callers can commit them together with their own writes.
+    :param product_ids: IDs of the products to refresh.
+    :return: List of product IDs whose price or promotion changed.
+    """
+    product_ids = list({pid for pid in product_ids if pid is not None})
+    if not product_ids:
+        return []
+    now = now or datetime.utcnow()
+
+    products = (
+        Product.query
+        .options(*product_load_options("write"))
+        .filter(Product.id.in_(product_ids))
+        .all()
+    )
+    active_promotions = (
+        Promotion.query
+        .filter(
+            Promotion.product_id.in_(product_ids),
+            Promotion.promotion_period_start <= now,
+            Promotion.promotion_period_end >= now,
+        )
+        .order_by(Promotion.id)
+        .all()
+    )
+    # Urut berdasarkan id, jadi promosi terbaru menimpa yang lama
+    active_by_product = {promotion.product_id: promotion for promotion in active_promotions}
+
+    changed = []
+    for product in products:
+        promotion = active_by_product.get(product.id)
+        effective_price = discounted_price(product.harga, promotion)
+        active_promotion_id = promotion.id if promotion else None
+        if product.effective_price != effective_price or product.active_promotion_id != active_promotion_id:
+            product.effective_price = effective_price
+            product.active_promotion_id = active_promotion_id
+            changed.append(product.id)
+    return changed
+
+
+def products_due_for_refresh(now=None):
+    """
+    IDs of products whose stored active promotion may no longer match the clock:
+    products with an active promotion (it may have ended) and products with a
+    promotion running now (it may have started).
+    """
+    now = now or datetime.utcnow()
+    with_promotion = db.session.query(Product.id).filter(Product.active_promotion_id.isnot(None))
+    running = db.session.query(Promotion.product_id).filter(
+        Promotion.product_id.isnot(None),
+        Promotion.promotion_period_start <= now,
+        Promotion.promotion_period_end >= now,
+    )
+    return {row[0] for row in with_promotion.union(running).all()}
+
+
+@click.command("refresh-prices")
+@with_appcontext
+def refresh_prices_command():
+    """Recompute effective prices for promotions that started or ended (run from cron)."""
+    from services.catalog_cache import invalidate_product, invalidate_listings
+
+    changed = refresh_effective_prices(products_due_for_refresh())
+    db.session.commit()
+    if changed:
+        invalidate_product(*changed)
+        # Urutan listing berdasarkan harga dan bucket harga facet ikut berubah
+        invalidate_listings()
+    click.echo(f"Refreshed effective price for {len(changed)} product(s)")
@@ -0,0 +1,168 @@
+import csv
+import io
+import json
+from datetime import datetime
+from flask import current_app
+from sqlalchemy import insert
+from sqlalchemy.exc import SQLAlchemyError
+from connectors.db import db
+from models.product import Product
+from models.product_image import ProductImage
+from services.product_validation import validate_product_data
+from services.catalog_cache import invalidate_product
+from services.media import upload_images, fetch_remote_image
+
+PRODUCT_COLUMNS = [
+    "nama_produk", "deskripsi", "harga", "stok", "kategori",
+    "jenis_hewan", "berat", "panjang", "lebar", "tinggi",
+]
+
+
+class ImportFormatError(ValueError):
+    """Raised when the uploaded file cannot be read as CSV or JSONL."""
+
+
+def _split_image_urls(value):
+    if not value:
+        return []
+    if isinstance(value, list):
+        return [str(url).strip() for url in value if str(url).strip()]
+    return [url.strip() for url in str(value).split("|") if url.strip()]
+
+
+def read_rows(file_storage, fmt=None):
+    """
+    Read an uploaded CSV or JSONL file into a list of dicts.
+    :param fmt: 'csv' or 'jsonl'; guessed from the filename when not given.
+    """
+    if not fmt:
+        filename = (file_storage.filename or "").lower()
+        fmt = "jsonl" if filename.endswith((".jsonl", ".ndjson")) else "csv"
+
+    text = io.TextIOWrapper(file_storage.stream, encoding="utf-8-sig")
+    if fmt == "csv":
+        return list(csv.DictReader(text))
+    if fmt == "jsonl":
+        rows = []
+        for line_number, line in enumerate(text, start=1):
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError:
+                raise ImportFormatError(f"Line {line_number} is not valid JSON")
+            if not isinstance(row, dict):
+                raise ImportFormatError(f"Line {line_number} must be a JSON object")
+            rows.append(row)
+        return rows
+    raise ImportFormatError("Invalid format. Valid options: csv, jsonl")
+
+
+def import_products(rows, store_id, batch_size=500):
+    """
+    Validate rows with the create_product rules and insert the valid ones in batches.
+
+    Each batch is one executemany INSERT ... RETURNING id where the database
+    supports it, so 2,000 rows cost a handful of statements instead of 2,000
+    round trips.
+    Each batch runs in a savepoint; if the database rejects it, its rows are
+    retried one by one so only the failing rows end up in errors.
+    :return: Tuple (created, errors, pending_images). created is a list of
+        {"row", "id"}, errors a list of {"row", "msg"}, pending_images a list
+        of (product_id, [urls]) to fetch after the response.
+    :raises SQLAlchemyError: If the final commit fails (after rolling back).
+    """
+    valid_rows, errors = [], []
+    now = datetime.utcnow()
+
+    for row_number, raw in enumerate(rows, start=1):
+        data = {key: (str(value).strip() if value is not None and not isinstance(value, list) else value)
+                for key, value in raw.items() if key}
+        cleaned, error = validate_product_data(data)
+        if error:
+            errors.append({"row": row_number, "msg": error})
+            continue
+
+        values = {column: cleaned.get(column) for column in PRODUCT_COLUMNS}
+        values["deskripsi"] = values["deskripsi"] or ""
+        values.update(
+            effective_price=cleaned["harga"],
+            store_id=store_id,
+            created_at=now,
+        )
+        valid_rows.append((row_number, values, _split_image_urls(raw.get("image_urls"))))
+
+    created, pending_images = [], []
+    for start in range(0, len(valid_rows), batch_size):
+        batch = valid_rows[start:start + batch_size]
+        try:
+            with db.session.begin_nested():
+                product_ids = _insert_products([values for _, values, _ in batch])
+        except SQLAlchemyError:
+            # Batch ditolak database (mis. nilai terlalu panjang): ulangi per baris untuk menemukan baris yang gagal
+            product_ids = [_insert_row_or_report(row_number, values, errors) for row_number, values, _ in batch]
+
+        for (row_number, _, image_urls), product_id in zip(batch, product_ids):
+            if product_id is None:
+                continue
+            created.append({"row": row_number, "id": product_id})
+            if image_urls:
+                pending_images.append((product_id, image_urls))
+
+    try:
+        db.session.commit()
+    except SQLAlchemyError:
+        db.session.rollback()
+        raise
+    errors.sort(key=lambda error: error["row"])
+    return created, errors, pending_images
+
+
+def _insert_row_or_report(row_number, values, errors):
+    """
+    Insert one row in its own savepoint.
+    :return: The new product id, or None after adding the row to errors.
+    """
+    try:
+        with db.session.begin_nested():
+            return _insert_products([values])[0]
+    except SQLAlchemyError as e:
+        current_app.logger.warning(f"Import row {row_number} rejected by the database: {e}")
+        errors.append({"row": row_number, "msg": "Row could not be saved, check the length and range of its values"})
+        return None
+
+
+def _insert_products(rows):
+    """
+    Insert product rows and return their ids in the same order.
+
+    Uses one executemany INSERT ... RETURNING when the dialect can return ids
+    in parameter order (Postgres, SQLite, MariaDB). MySQL has no RETURNING and
+    the ids of a multi-row INSERT are not guaranteed to be consecutive
+    (innodb_autoinc_lock_mode=2), so there the rows are inserted one by one
+    and each id is read from lastrowid, still inside the same transaction.
+    """
+    dialect = db.session.get_bind(mapper=Product.__mapper__).dialect
+    if getattr(dialect, "insert_executemany_returning_sort_by_parameter_order", False):
+        result = db.session.execute(insert(Product).returning(Product.id, sort_by_parameter_order=True), rows)
+        return result.scalars().all()
+    return [db.session.execute(insert(Product.__table__), values).inserted_primary_key[0] for values in rows]
+
+
+def fetch_product_images(pending_images):
+    """
+    Background task: download the image URLs of imported products and store
+    them through services.media, with the same uploader, timeouts and
+    content-hash dedup as uploaded files.
+    A failing URL is logged and skipped; the product keeps the images that succeeded.
+    """
+    for product_id, urls in pending_images:
+        for url in urls:
+            try:
+                item = upload_images([fetch_remote_image(url)])[0]
+                db.session.add(ProductImage(product_id=product_id, image_url=item["url"], content_hash=item["content_hash"]))
+                db.session.commit()
+            except Exception as e:
+                db.session.rollback()
+                current_app.logger.error(f"Failed to import image {url} for product {product_id}: {e}")
+        invalidate_product(product_id)
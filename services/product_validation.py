@@ -0,0 +1,34 @@
+VALID_CATEGORIES = ["makanan", "kesehatan", "mainan", "peralatan"]
+VALID_ANIMALS = ["anjing", "kucing", "hamster", "burung", "kelinci"]
+REQUIRED_FIELDS = ["nama_produk", "harga", "stok", "kategori", "jenis_hewan", "berat"]
+
+
+def validate_product_data(data):
+    """
+    Validate and convert the fields of a new product.
+    Shared by create_product and the bulk import so both apply the same rules.
+    :param data: Dict of raw (string) values.
+    :return: Tuple (cleaned_data, error_message). error_message is None when valid.
+    """
+    missing_fields = [field for field in REQUIRED_FIELDS if not data.get(field)]
+    if missing_fields:
+        return None, f"Missing required fields: {', '.join(missing_fields)}"
+
+    if data["kategori"] not in VALID_CATEGORIES:
+        return None, f"Invalid category. Valid options: {', '.join(VALID_CATEGORIES)}"
+    if data["jenis_hewan"] not in VALID_ANIMALS:
+        return None, f"Invalid animal type. Valid options: {', '.join(VALID_ANIMALS)}"
+
+    cleaned = dict(data)
+    # Validate numeric fields
+    try:
+        cleaned["harga"] = float(data["harga"])
+        cleaned["stok"] = int(data["stok"])
+        cleaned["berat"] = float(data["berat"])
+        cleaned["panjang"] = float(data.get("panjang", 0)) if data.get("panjang") else None
+        cleaned["lebar"] = float(data.get("lebar", 0)) if data.get("lebar") else None
+        cleaned["tinggi"] = float(data.get("tinggi", 0)) if data.get("tinggi") else None
+    except (TypeError, ValueError):
+        return None, "Invalid numeric value for harga, stok, or berat"
+
+    return cleaned, None
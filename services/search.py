@@ -0,0 +1,213 @@
+import re
+import sqlalchemy as sa
+from sqlalchemy import or_, func, text
+from connectors.db import db
+from models.product import Product
+
+# Tabel virtual FTS5 untuk pencarian lokal (SQLite)
+FTS_TABLE = "products_fts"
+
+SQLITE_FTS_DDL = [
+    f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE}
+    USING fts5(nama_produk, deskripsi, content='products', content_rowid='id')
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS products_fts_ai AFTER INSERT ON products BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, nama_produk, deskripsi)
+        VALUES (new.id, new.nama_produk, new.deskripsi);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS products_fts_ad AFTER DELETE ON products BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, nama_produk, deskripsi)
+        VALUES ('delete', old.id, old.nama_produk, old.deskripsi);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS products_fts_au AFTER UPDATE OF nama_produk, deskripsi ON products BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, nama_produk, deskripsi)
+        VALUES ('delete', old.id, old.nama_produk, old.deskripsi);
+        INSERT INTO {FTS_TABLE}(rowid, nama_produk, deskripsi)
+        VALUES (new.id, new.nama_produk, new.deskripsi);
+    END
+    """,
+]
+
+fts_table = sa.table(FTS_TABLE, sa.column("rowid"), sa.column("rank"))
+
+
+def _dialect_name():
+    return db.engine.dialect.name
+
+
+def _tokens(term):
+    return re.findall(r"\w+", term.lower())
+
+
+def ensure_search_index(app):
+    """
+    Create the SQLite FTS5 table and its sync triggers for local runs.
+    Postgres keeps its tsvector column and GIN index through Alembic instead.
+    """
+    with app.app_context():
+        if _dialect_name() != "sqlite":
+            return
+        with db.engine.begin() as connection:
+            exists = connection.execute(
+                text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+                {"name": FTS_TABLE},
+            ).first()
+            for statement in SQLITE_FTS_DDL:
+                connection.execute(text(statement))
+            if not exists:
+                # Isi index untuk produk yang sudah ada
+                connection.execute(text(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')"))
+
+
+def apply_text_search(query, term):
+    """
+    Restrict a Product query to rows matching the search term.
+
+    Postgres matches against the GIN-indexed search_vector column (prefix
+    matching on every token) and the trigram index on nama_produk for typo
+    tolerance. SQLite uses the FTS5 table. Other dialects fall back to ILIKE.
+    :return: Tuple (query, relevance), relevance is None when the backend cannot rank.
+    """
+    tokens = _tokens(term)
+    if not tokens:
+        return query, None
+
+    dialect = _dialect_name()
+    if dialect == "postgresql":
+        ts_query = func.to_tsquery("simple", " & ".join(f"{token}:*" for token in tokens))
+        search_vector = sa.literal_column("products.search_vector")
+        query = query.filter(
+            or_(
+                search_vector.op("@@")(ts_query),
+                Product.nama_produk.op("%")(term),
+            )
+        )
+        relevance = sa.cast(
+            func.ts_rank(search_vector, ts_query) + func.similarity(Product.nama_produk, term),
+            sa.Float(53),
+        )
+        return query, relevance
+
+    if dialect == "sqlite":
+        match = " ".join(f'"{token}"*' for token in tokens)
+        query = query.join(fts_table, fts_table.c.rowid == Product.id).filter(
+            sa.literal_column(FTS_TABLE).op("MATCH")(match)
+        )
+        # bm25 di FTS5: makin kecil makin relevan
+        return query, -fts_table.c.rank
+
+    query = query.filter(
+        or_(
+            Product.nama_produk.ilike(f"%{term}%"),
+            Product.deskripsi.ilike(f"%{term}%")
+        )
+    )
+    return query, None
+
+
+def apply_product_filters(query, args):
+    """
+    Apply the search and filter parameters shared by the search route and the facets endpoint.
+    :param args: Request args (search, category, jenis_hewan, min_price, max_price).
+    :return: Tuple (query, relevance), see apply_text_search.
+    """
+    search = args.get('search', '')
+    category = args.get('category', '')
+    animal_type = args.get('jenis_hewan', '')
+    min_price = args.get('min_price', type=float)
+    max_price = args.get('max_price', type=float)
+
+    relevance = None
+    if search:
+        query, relevance = apply_text_search(query, search)
+
+    if category:
+        query = query.filter(Product.kategori == category)
+
+    if animal_type:
+        query = query.filter(Product.jenis_hewan == animal_type)
+
+    # Filter harga memakai harga setelah promosi (kolom ter-index)
+    if min_price is not None:
+        query = query.filter(Product.effective_price >= min_price)
+    if max_price is not None:
+        query = query.filter(Product.effective_price <= max_price)
+
+    return query, relevance
+
+
+def validate_price_buckets(bounds):
+    """
+    Check the FACET_PRICE_BUCKETS edges at startup.
+    Edges must be distinct, non-negative numbers; they are returned sorted so
+    each price falls into exactly one bucket whatever order they were configured in.
+    :raises ValueError: If an edge is not a number, negative or repeated.
+    """
+    try:
+        edges = sorted(float(bound) for bound in bounds)
+    except (TypeError, ValueError):
+        raise ValueError(f"FACET_PRICE_BUCKETS must be numbers, got {bounds!r}")
+    if any(edge < 0 for edge in edges):
+        raise ValueError(f"FACET_PRICE_BUCKETS cannot be negative, got {bounds!r}")
+    if len(set(edges)) != len(edges):
+        raise ValueError(f"FACET_PRICE_BUCKETS has duplicate edges, got {bounds!r}")
+    return edges
+
+
+def init_search(app):
+    """
+    Validate the search settings and create the local full-text index.
+    """
+    app.config["FACET_PRICE_BUCKETS"] = validate_price_buckets(app.config.get("FACET_PRICE_BUCKETS", []))
+    ensure_search_index(app)
+
+
+def price_bucket_expression(bounds):
+    """
+    SQL CASE expression mapping Product.effective_price to the index of its price bucket.
+    :param bounds: Sorted bucket edges, e.g. [50000, 100000] gives 3 buckets.
+    """
+    return sa.case(
+        *[(Product.effective_price < bound, index) for index, bound in enumerate(bounds)],
+        else_=len(bounds),
+    )
+
+
+def compute_facets(args, bounds):
+    """
+    Count products per kategori, jenis_hewan and price bucket for a filter set.
+    All counts come from one GROUP BY query over the same filters as the search route.
+    """
+    bucket = price_bucket_expression(bounds)
+    query = db.session.query(
+        Product.kategori, Product.jenis_hewan, bucket.label("bucket"), func.count(Product.id)
+    )
+    query, _ = apply_product_filters(query, args)
+    # Group by label agar Postgres tidak menganggap CASE dengan parameter berbeda sebagai ekspresi lain
+    rows = query.group_by(Product.kategori, Product.jenis_hewan, "bucket").all()
+
+    categories, animals, buckets = {}, {}, {}
+    total = 0
+    for kategori, jenis_hewan, bucket_index, count in rows:
+        categories[kategori] = categories.get(kategori, 0) + count
+        animals[jenis_hewan] = animals.get(jenis_hewan, 0) + count
+        buckets[bucket_index] = buckets.get(bucket_index, 0) + count
+        total += count
+
+    edges = [None] + list(bounds) + [None]
+    price_buckets = [
+        {"min": edges[index], "max": edges[index + 1], "count": buckets.get(index, 0)}
+        for index in range(len(bounds) + 1)
+    ]
+    return {
+        "total": total,
+        "kategori": categories,
+        "jenis_hewan": animals,
+        "price": price_buckets,
+    }
@@ -0,0 +1,181 @@
+import re
+import threading
+import time
+from bisect import bisect_left, insort
+from flask import current_app
+from sqlalchemy import func
+from connectors.db import db
+from models.product import Product
+from models.order import Order
+from models.order_item import OrderItem
+from services.background import submit
+
+_WORD = re.compile(r"\w+", re.UNICODE)
+
+
+def normalize(text):
+    """
+    Lowercase and collapse a name (or query) into space separated words.
+    """
+    return " ".join(_WORD.findall((text or "").lower()))
+
+
+def _index_keys(name):
+    """
+    One key per word start, so "makanan kucing" is found by "mak" and "kuc".
+    """
+    words = normalize(name).split(" ")
+    return {" ".join(words[i:]) for i in range(len(words)) if words[i]}
+
+
+class SuggestIndex:
+    """
+    In-memory prefix index over product names.
+
+    Keys are kept in a sorted list of (key, product_id) tuples, so a prefix
+    lookup is a bisect plus a short scan. Matches are ranked by sales weight.
+    Reads never touch the database; the index is rebuilt from it in bulk and
+    patched in place when a product is created, renamed or deleted.
+    """
+
+    def __init__(self, max_scan=1000):
+        self.max_scan = max_scan
+        self.built_at = None
+        self._lock = threading.Lock()
+        self._entries = []
+        self._products = {}  # product_id -> (nama_produk, weight)
+
+    def load(self, rows):
+        """
+        Replace the whole index.
+        :param rows: Iterable of (product_id, nama_produk, weight).
+        """
+        entries, products = [], {}
+        for product_id, name, weight in rows:
+            products[product_id] = (name, weight or 0)
+            entries.extend((key, product_id) for key in _index_keys(name))
+        entries.sort()
+        with self._lock:
+            self._entries, self._products = entries, products
+            self.built_at = time.monotonic()
+
+    def upsert(self, product_id, name, weight=None):
+        """
+        Add a product or update its name; the sales weight is kept unless given.
+        """
+        with self._lock:
+            previous = self._products.get(product_id)
+            if previous:
+                self._remove_keys(product_id, previous[0])
+            if weight is None:
+                weight = previous[1] if previous else 0
+            self._products[product_id] = (name, weight)
+            for key in _index_keys(name):
+                insort(self._entries, (key, product_id))
+
+    def remove(self, product_id):
+        with self._lock:
+            previous = self._products.pop(product_id, None)
+            if previous:
+                self._remove_keys(product_id, previous[0])
+
+    def _remove_keys(self, product_id, name):
+        for key in _index_keys(name):
+            position = bisect_left(self._entries, (key, product_id))
+            if position < len(self._entries) and self._entries[position] == (key, product_id):
+                del self._entries[position]
+
+    def suggest(self, query, limit=10):
+        """
+        Products whose name has a word starting with the query, best sellers first.
+        :return: List of (product_id, nama_produk).
+        """
+        prefix = normalize(query)
+        if not prefix:
+            return []
+
+        with self._lock:
+            entries, products = self._entries, self._products
+            position = bisect_left(entries, (prefix,))
+            matches = set()
+            for key, product_id in entries[position:position + self.max_scan]:
+                if not key.startswith(prefix):
+                    break
+                matches.add(product_id)
+            ranked = sorted(
+                ((products[pid][1], products[pid][0], pid) for pid in matches),
+                key=lambda item: (-item[0], item[1].lower(), item[2]),
+            )
+        return [(product_id, name) for _, name, product_id in ranked[:limit]]
+
+
+def init_suggest(app):
+    app.extensions["suggest_index"] = SuggestIndex(max_scan=app.config.get("SUGGEST_MAX_SCAN", 1000))
+    app.extensions["suggest_rebuilding"] = threading.Lock()
+
+
+def get_suggest_index():
+    return current_app.extensions["suggest_index"]
+
+
+def rebuild_suggest_index():
+    """
+    Load every product name with its sales weight (units sold in orders that
+    were not cancelled) in one query and swap the index.
+    """
+    sales = (
+        db.session.query(OrderItem.product_id, func.sum(OrderItem.quantity).label("sold"))
+        .join(Order, Order.id == OrderItem.order_id)
+        .filter(Order.status != "Cancelled")
+        .group_by(OrderItem.product_id)
+        .subquery()
+    )
+    rows = (
+        db.session.query(Product.id, Product.nama_produk, func.coalesce(sales.c.sold, 0))
+        .outerjoin(sales, sales.c.product_id == Product.id)
+        .all()
+    )
+    get_suggest_index().load(rows)
+
+
+def _rebuild_in_background():
+    lock = current_app.extensions["suggest_rebuilding"]
+    if not lock.acquire(blocking=False):
+        return  # Rebuild lain sedang berjalan
+    try:
+        rebuild_suggest_index()
+    finally:
+        lock.release()
+
+
+def suggest_products(query, limit=10):
+    """
+    Answer an autocomplete query from the in-memory index.
+
+    The first call in a process builds the index; after SUGGEST_REBUILD_INTERVAL
+    seconds a rebuild is queued on the background pool (to pick up sales and
+    changes made by other processes) while the current index keeps serving.
+    """
+    index = get_suggest_index()
+    if index.built_at is None:
+        _rebuild_in_background()
+    elif time.monotonic() - index.built_at > current_app.config.get("SUGGEST_REBUILD_INTERVAL", 600):
+        index.built_at = time.monotonic()  # Cegah rebuild ganda sampai yang ini selesai
+        submit(_rebuild_in_background)
+    return index.suggest(query, limit)
+
+
+def index_product(product_id, name):
+    """
+    Patch the index after a product is created or renamed. Until the first
+    build there is nothing to patch; the build will pick the product up.
+    """
+    index = get_suggest_index()
+    if index.built_at is not None:
+        index.upsert(product_id, name)
+
+
+def unindex_product(product_id):
+    index = get_suggest_index()
+    if index.built_at is not None:
+        index.remove(product_id)
@@ -0,0 +1,38 @@
+from sqlalchemy import insert
+from sqlalchemy.dialects import mysql, postgresql, sqlite
+from connectors.db import db
+
+
+def upsert(model, values, conflict_columns, update=None):
+    """
+    Insert a row, resolving a unique-key conflict inside the same statement.
+
+    Uses INSERT ... ON CONFLICT on PostgreSQL and SQLite, and
+    INSERT ... ON DUPLICATE KEY UPDATE (or INSERT IGNORE) on MySQL/MariaDB.
+    :param conflict_columns: Columns of the unique constraint (needed by ON CONFLICT).
+    :param update: Callable taking the "inserted row" (excluded / VALUES()) and
+        returning {column_name: expression} to apply on conflict; None keeps
+        the existing row unchanged.
+    :return: The statement result; rowcount is 0 when an existing row was kept unchanged.
+    """
+    dialect = db.session.get_bind(mapper=model.__mapper__).dialect.name
+
+    if dialect in ("postgresql", "sqlite"):
+        statement = (postgresql if dialect == "postgresql" else sqlite).insert(model).values(**values)
+        if update is None:
+            statement = statement.on_conflict_do_nothing(index_elements=conflict_columns)
+        else:
+            statement = statement.on_conflict_do_update(
+                index_elements=conflict_columns, set_=update(statement.excluded)
+            )
+    elif dialect in ("mysql", "mariadb"):
+        statement = mysql.insert(model).values(**values)
+        if update is None:
+            statement = statement.prefix_with("IGNORE")
+        else:
+            statement = statement.on_duplicate_key_update(**update(statement.inserted))
+    else:
+        # Dialek lain: INSERT biasa, konflik muncul sebagai IntegrityError
+        statement = insert(model).values(**values)
+
+    return db.session.execute(statement)
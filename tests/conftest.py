@@ -0,0 +1,133 @@
+import json
+import os
+import threading
+from contextlib import contextmanager
+import pytest
+from flask_jwt_extended import create_access_token
+from sqlalchemy import event
+from app import create_app
+from connectors.db import db
+from models.product import Product
+from models.store import Store
+from models.user import User
+
+# Jalankan test terhadap Postgres/MySQL dengan TEST_DATABASE_URI; default SQLite file sementara
+TEST_DATABASE_URI = os.getenv("TEST_DATABASE_URI")
+
+
+@pytest.fixture
+def make_app(tmp_path):
+    """
+    Build an app on a fresh database; keyword arguments override config values.
+    """
+    apps = []
+
+    def build(**overrides):
+        config = {
+            "TESTING": True,
+            "SQLALCHEMY_DATABASE_URI": TEST_DATABASE_URI or f"sqlite:///{tmp_path / 'petshop.db'}",
+            "SQLALCHEMY_BINDS": {},
+            "SECRET_KEY": "test-secret-key-with-at-least-32-bytes",
+            "JWT_SECRET_KEY": "test-jwt-secret-key-with-at-least-32-bytes",
+            "CACHE_BACKEND": "memory",
+            "CART_STORE_BACKEND": "database",
+            "IMAGE_UPLOADER": "fake",
+            "MEDIA_SPOOL_DIR": str(tmp_path / "spool"),
+        }
+        config.update(overrides)
+        app = create_app(config)
+        apps.append(app)
+        return app
+
+    yield build
+
+    for app in apps:
+        with app.app_context():
+            db.session.remove()
+            db.drop_all()
+            for engine in db.engines.values():
+                engine.dispose()
+        # init_app mendaftarkan metadata per bind di objek db global; buang agar app berikutnya tanpa replika tidak mencarinya
+        for bind_key in app.config["SQLALCHEMY_BINDS"]:
+            db.metadatas.pop(bind_key, None)
+
+
+@pytest.fixture
+def app(make_app):
+    return make_app()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+def create_user(email, is_seller=False):
+    user = User(email=email, password="rahasia123", first_name="Test", last_name="User")
+    user.is_seller = is_seller
+    db.session.add(user)
+    db.session.commit()
+    return user
+
+
+def create_store(user, domain="toko-test"):
+    store = Store(user_id=user.id, nama_toko=f"Toko {domain}", nama_domain=domain, alamat_lengkap="Jl. Test 1")
+    db.session.add(store)
+    db.session.commit()
+    return store
+
+
+def create_product(store, **values):
+    data = {
+        "nama_produk": "Makanan Kucing",
+        "harga": 50000.0,
+        "stok": 10,
+        "kategori": "makanan",
+        "jenis_hewan": "kucing",
+        "berat": 1.0,
+    }
+    data.update(values)
+    product = Product(store_id=store.id, **data)
+    db.session.add(product)
+    db.session.commit()
+    return product
+
+
+def auth_headers(user, **headers):
+    token = create_access_token(identity=json.dumps({"id": user.id, "email": user.email}))
+    return {"Authorization": f"Bearer {token}", **headers}
+
+
+def send_in_parallel(app, requests):
+    """Send every (method, path, headers, body) at the same moment, one thread and test client each."""
+    barrier = threading.Barrier(len(requests))
+    statuses = [None] * len(requests)
+
+    def run(index, method, path, headers, body):
+        client = app.test_client()
+        barrier.wait()
+        statuses[index] = client.open(path, method=method, json=body, headers=headers).status_code
+
+    threads = [threading.Thread(target=run, args=(i, *request)) for i, request in enumerate(requests)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return statuses
+
+
+@contextmanager
+def count_queries(app, bind_key=None):
+    """Collect the SQL statements sent to one engine (the primary by default) inside the block."""
+    statements = []
+    with app.app_context():
+        engine = db.engines[bind_key]
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
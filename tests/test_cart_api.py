@@ -0,0 +1,219 @@
+from datetime import datetime, timedelta
+import fakeredis
+import pytest
+from connectors.db import db
+from models.cart import Cart
+from models.product import Product
+from models.product_image import ProductImage
+from models.promotion import Promotion
+from services.cart_store import cart_store
+from services.pricing import refresh_effective_prices
+from tests.conftest import create_user, create_store, create_product, auth_headers, count_queries
+
+
+@pytest.fixture(params=["database", "memory", "redis"])
+def shop(request, make_app):
+    overrides = {"CART_STORE_BACKEND": request.param, "CART_FLUSH_INTERVAL": 3600}
+    if request.param == "redis":
+        overrides["CART_REDIS_CLIENT"] = fakeredis.FakeRedis()
+    app = make_app(**overrides)
+    with app.app_context():
+        store = create_store(create_user("seller@example.com", is_seller=True))
+        buyer = create_user("buyer@example.com")
+        ctx = {
+            "user": buyer.id,
+            "products": [create_product(store, nama_produk=f"Produk {i}").id for i in range(2)],
+            "headers": auth_headers(buyer),
+        }
+    return app, ctx
+
+
+def _quantities(client, headers):
+    cart = client.get("/cart/items", headers=headers).get_json()["cart"]
+    return {item["product_id"]: item["quantity"] for item in cart}
+
+
+def test_string_product_ids_share_the_int_line(shop):
+    app, ctx = shop
+    client, headers, product_id = app.test_client(), ctx["headers"], ctx["products"][0]
+
+    assert client.post("/cart/add", json={"product_id": product_id, "quantity": 1}, headers=headers).status_code == 201
+    assert client.post("/cart/add", json={"product_id": str(product_id), "quantity": 2}, headers=headers).status_code == 201
+    assert _quantities(client, headers) == {product_id: 3}
+
+    response = client.put("/cart/update", json={"product_id": str(product_id), "quantity": 5}, headers=headers)
+    assert response.status_code == 200
+    assert _quantities(client, headers) == {product_id: 5}
+
+    with app.app_context():
+        cart_store.flush()
+        assert db.session.query(Cart.quantity).filter_by(user_id=ctx["user"], product_id=product_id).scalar() == 5
+
+    response = client.delete("/cart/remove", json={"product_id": str(product_id)}, headers=headers)
+    assert response.status_code == 200
+    assert _quantities(client, headers) == {}
+
+
+@pytest.mark.parametrize("product_id", [[1], {"id": 1}, "abc", -1, True, None])
+def test_invalid_product_ids_are_rejected(shop, product_id):
+    app, ctx = shop
+    client, headers = app.test_client(), ctx["headers"]
+
+    assert client.post("/cart/add", json={"product_id": product_id, "quantity": 1}, headers=headers).status_code == 400
+    assert client.put("/cart/update", json={"product_id": product_id, "quantity": 1}, headers=headers).status_code == 400
+    assert client.delete("/cart/remove", json={"product_id": product_id}, headers=headers).status_code == 400
+
+
+def test_non_object_bodies_are_rejected(shop):
+    app, ctx = shop
+    client, headers = app.test_client(), ctx["headers"]
+    body = [{"product_id": ctx["products"][0], "quantity": 1}]
+
+    assert client.post("/cart/add", json=body, headers=headers).status_code == 400
+    assert client.put("/cart/update", json=body, headers=headers).status_code == 400
+    assert client.delete("/cart/remove", json=body, headers=headers).status_code == 400
+
+
+def _batch(client, headers, *operations):
+    return client.post("/cart/batch", json={"operations": list(operations)}, headers=headers)
+
+
+def test_batch_applies_operations_in_order(shop):
+    app, ctx = shop
+    client, headers = app.test_client(), ctx["headers"]
+    first, second = ctx["products"]
+    client.post("/cart/add", json={"product_id": second, "quantity": 4}, headers=headers)
+
+    response = _batch(
+        client, headers,
+        {"op": "add", "product_id": first, "quantity": 2},
+        {"op": "set", "product_id": first, "quantity": 5},
+        {"op": "add", "product_id": first, "quantity": 1},
+        {"op": "remove", "product_id": second},
+    )
+
+    assert response.status_code == 200
+    body = response.get_json()
+    assert {item["product_id"]: item["quantity"] for item in body["cart"]} == {first: 6}
+    assert body["summary"]["item_count"] == 6
+    assert _quantities(client, headers) == {first: 6}
+
+
+def test_batch_is_all_or_nothing(shop):
+    app, ctx = shop
+    client, headers = app.test_client(), ctx["headers"]
+    first, second = ctx["products"]
+    client.post("/cart/add", json={"product_id": first, "quantity": 1}, headers=headers)
+
+    response = _batch(
+        client, headers,
+        {"op": "set", "product_id": first, "quantity": 9},
+        {"op": "move", "product_id": first},
+        "remove",
+        {"op": "add", "product_id": second, "quantity": 0},
+        {"op": "set", "product_id": second, "quantity": -1},
+        {"op": "add", "product_id": True, "quantity": 1},
+    )
+    assert response.status_code == 400
+    assert [error["index"] for error in response.get_json()["errors"]] == [1, 2, 3, 4, 5]
+
+    response = _batch(
+        client, headers,
+        {"op": "add", "product_id": second, "quantity": 1},
+        {"op": "add", "product_id": 999999, "quantity": 1},
+        {"op": "remove", "product_id": 999999},
+    )
+    assert response.status_code == 400
+    assert response.get_json()["errors"] == [
+        {"index": 1, "msg": "Produk tidak ditemukan."},
+        {"index": 2, "msg": "Produk tidak ditemukan."},
+    ]
+
+    assert _quantities(client, headers) == {first: 1}
+
+
+@pytest.mark.parametrize("body", [{}, {"operations": []}, {"operations": {"op": "add"}}, [1]])
+def test_batch_requires_a_list_of_operations(shop, body):
+    app, ctx = shop
+
+    response = app.test_client().post("/cart/batch", json=body, headers=ctx["headers"])
+
+    assert response.status_code == 400
+
+
+def test_batch_size_is_limited(make_app):
+    app = make_app(CART_BATCH_MAX_OPERATIONS=2)
+    with app.app_context():
+        headers = auth_headers(create_user("buyer@example.com"))
+    operations = [{"op": "remove", "product_id": i} for i in range(1, 4)]
+
+    response = app.test_client().post("/cart/batch", json={"operations": operations}, headers=headers)
+
+    assert response.status_code == 400
+    assert response.get_json()["msg"] == "Maksimal 2 operasi per request."
+
+
+def test_cart_view_prices_lines_and_sums_the_cart(shop):
+    app, ctx = shop
+    client, headers = app.test_client(), ctx["headers"]
+    discounted, plain = ctx["products"]
+    with app.app_context():
+        product = db.session.get(Product, plain)
+        product.harga, product.effective_price, product.stok, product.berat = 20000.0, 20000.0, 1, 0.5
+        db.session.add_all([
+            ProductImage(product_id=plain, image_url="https://img.test/depan.jpg"),
+            ProductImage(product_id=plain, image_url="https://img.test/belakang.jpg"),
+            ProductImage(product_id=discounted, status="pending"),
+        ])
+        now = datetime.utcnow()
+        db.session.add(Promotion(
+            product_id=discounted, store_id=product.store_id, promotion_name="Diskon 20",
+            promotion_period_start=now - timedelta(hours=1), promotion_period_end=now + timedelta(hours=1),
+            max_quantity=10, discount_percent=20,
+        ))
+        db.session.flush()
+        refresh_effective_prices([discounted])
+        db.session.commit()
+    client.post("/cart/add", json={"product_id": discounted, "quantity": 2}, headers=headers)
+    client.post("/cart/add", json={"product_id": plain, "quantity": 3}, headers=headers)
+
+    body = client.get("/cart/items", headers=headers).get_json()
+
+    lines = {item["product_id"]: item for item in body["cart"]}
+    assert lines[discounted]["unit_price"] == 40000
+    assert lines[discounted]["line_total"] == 80000
+    assert lines[discounted]["line_discount"] == 20000
+    assert lines[discounted]["promotion"]["name"] == "Diskon 20"
+    assert lines[discounted]["product_details"]["image_url"] is None
+    assert lines[discounted]["in_stock"] is True
+    assert lines[plain]["promotion"] is None
+    assert lines[plain]["product_details"]["image_url"] == "https://img.test/depan.jpg"
+    assert lines[plain]["in_stock"] is False
+    assert body["summary"] == {
+        "item_count": 5,
+        "subtotal": 160000,
+        "discount": 20000,
+        "total": 140000,
+        "total_weight": 3.5,
+        "all_in_stock": False,
+    }
+
+
+def test_cart_view_queries_do_not_grow_with_the_cart(shop):
+    app, ctx = shop
+    client, headers = app.test_client(), ctx["headers"]
+    with app.app_context():
+        store = db.session.get(Product, ctx["products"][0]).store
+        extra = [create_product(store, nama_produk=f"Ekstra {i}").id for i in range(4)]
+    client.post("/cart/add", json={"product_id": ctx["products"][0], "quantity": 1}, headers=headers)
+    client.get("/cart/items", headers=headers)  # Muat keranjang ke store lebih dulu
+
+    with count_queries(app) as one_line:
+        client.get("/cart/items", headers=headers)
+    for product_id in [ctx["products"][1], *extra]:
+        client.post("/cart/add", json={"product_id": product_id, "quantity": 1}, headers=headers)
+    with count_queries(app) as six_lines:
+        body = client.get("/cart/items", headers=headers).get_json()
+
+    assert len(body["cart"]) == 6
+    assert len(six_lines) == len(one_line)
@@ -0,0 +1,102 @@
+import fakeredis
+import pytest
+from connectors.db import db
+from models.cart import Cart
+from models.product import Product
+from services.cart_store import cart_store
+from tests.conftest import create_user, create_store, create_product
+
+
+@pytest.fixture(params=["memory", "redis"])
+def store_app(request, make_app):
+    overrides = {"CART_STORE_BACKEND": request.param, "CART_FLUSH_INTERVAL": 3600}
+    if request.param == "redis":
+        overrides["CART_REDIS_CLIENT"] = fakeredis.FakeRedis()
+    app = make_app(**overrides)
+    with app.app_context():
+        store = create_store(create_user("seller@example.com", is_seller=True))
+        ctx = {
+            "user": create_user("buyer@example.com").id,
+            "products": [create_product(store, nama_produk=f"Produk {i}").id for i in range(3)],
+        }
+    return app, ctx
+
+
+def _saved_cart(user_id):
+    rows = db.session.query(Cart.product_id, Cart.quantity).filter_by(user_id=user_id).all()
+    return dict(rows)
+
+
+def test_cart_is_loaded_from_the_table_on_first_use(store_app):
+    app, ctx = store_app
+    user_id, (a, b, _) = ctx["user"], ctx["products"]
+    with app.app_context():
+        db.session.add_all([Cart(user_id=user_id, product_id=a, quantity=2), Cart(user_id=user_id, product_id=b, quantity=1)])
+        db.session.commit()
+        assert not cart_store.backend.is_loaded(user_id)
+
+        assert cart_store.items(user_id) == {a: 2, b: 1}
+        assert cart_store.backend.is_loaded(user_id)
+
+
+def test_changes_reach_the_table_on_flush(store_app):
+    app, ctx = store_app
+    user_id, (a, b, _) = ctx["user"], ctx["products"]
+    with app.app_context():
+        cart_store.add(user_id, a, 2)
+        cart_store.add(user_id, b, 1)
+        assert _saved_cart(user_id) == {}
+
+        assert cart_store.flush() == 1
+        assert _saved_cart(user_id) == {a: 2, b: 1}
+
+        cart_store.set_many(user_id, {a: 5, b: 0})
+        cart_store.flush()
+        assert _saved_cart(user_id) == {a: 5}
+        assert cart_store.flush() == 0
+
+
+def test_deduct_keeps_lines_added_after_the_snapshot(store_app):
+    app, ctx = store_app
+    user_id, (a, b, _) = ctx["user"], ctx["products"]
+    with app.app_context():
+        cart_store.add(user_id, a, 2)
+        snapshot = cart_store.items(user_id)
+
+        # Request lain menambah barang selagi checkout berjalan
+        cart_store.add(user_id, a, 1)
+        cart_store.add(user_id, b, 1)
+        cart_store.deduct(user_id, snapshot)
+
+        assert cart_store.items(user_id) == {a: 1, b: 1}
+        cart_store.flush()
+        assert _saved_cart(user_id) == {a: 1, b: 1}
+
+
+def test_flush_drops_lines_of_deleted_products(store_app):
+    app, ctx = store_app
+    user_id, (a, b, _) = ctx["user"], ctx["products"]
+    with app.app_context():
+        cart_store.add(user_id, a, 1)
+        cart_store.add(user_id, b, 1)
+        db.session.delete(db.session.get(Product, b))
+        db.session.commit()
+
+        cart_store.flush()
+
+        assert _saved_cart(user_id) == {a: 1}
+        assert cart_store.items(user_id) == {a: 1}
+        assert cart_store.flush() == 0
+
+
+def test_memory_store_evicts_idle_flushed_carts(make_app):
+    app = make_app(CART_STORE_BACKEND="memory", CART_FLUSH_INTERVAL=3600, CART_IDLE_SECONDS=0)
+    with app.app_context():
+        product_id = create_product(create_store(create_user("seller@example.com", is_seller=True))).id
+        user_id = create_user("buyer@example.com").id
+        cart_store.add(user_id, product_id, 3)
+
+        cart_store.flush()
+
+        assert not cart_store.backend.is_loaded(user_id)
+        assert cart_store.items(user_id) == {product_id: 3}
@@ -0,0 +1,174 @@
+from datetime import datetime, timedelta
+import pytest
+from connectors.db import db
+from models.product import Product
+from models.product_image import ProductImage
+from models.promotion import Promotion
+from models.store import Store
+from tests.conftest import create_user, create_store, create_product, auth_headers, count_queries
+
+LISTINGS = [
+    "/products/",
+    "/products?search_by=nama_produk",
+    "/products/category?category=makanan",
+    "/products/animal?jenis_hewan=kucing",
+    "/seller/products",
+]
+
+
+def add_products(store, count):
+    """Products with two ready images, one pending image and two promotions (the newest one wins)."""
+    now = datetime.utcnow()
+    for _ in range(count):
+        product = create_product(store)
+        db.session.add_all([
+            ProductImage(product_id=product.id, image_url=f"https://img.test/{product.id}-a.jpg"),
+            ProductImage(product_id=product.id, image_url=f"https://img.test/{product.id}-b.jpg"),
+            ProductImage(product_id=product.id, status="pending"),
+        ])
+        for name, days_ago in (("Promo Lama", 2), ("Promo Baru", 1)):
+            db.session.add(Promotion(
+                product_id=product.id, store_id=store.id, promotion_name=name,
+                promotion_period_start=now - timedelta(days=days_ago), promotion_period_end=now + timedelta(days=1),
+                max_quantity=10, discount_percent=10,
+            ))
+    db.session.commit()
+
+
+@pytest.fixture
+def shop(make_app):
+    app = make_app(CACHE_BACKEND="none")
+    with app.app_context():
+        seller = create_user("seller@example.com", is_seller=True)
+        store = create_store(seller)
+        add_products(store, 2)
+        return app, store.id, auth_headers(seller)
+
+
+def _count(app, url, headers):
+    with count_queries(app) as statements:
+        response = app.test_client().get(url, headers=headers)
+    assert response.status_code == 200
+    return len(statements), response.get_json()["products"]
+
+
+@pytest.mark.parametrize("url", LISTINGS)
+def test_listing_queries_do_not_grow_with_the_page(shop, url):
+    app, store_id, headers = shop
+    queries, products = _count(app, url, headers)
+    assert len(products) == 2
+
+    with app.app_context():
+        add_products(db.session.get(Store, store_id), 6)
+    more_queries, products = _count(app, url, headers)
+
+    assert len(products) == 8
+    assert more_queries == queries
+    for product in products:
+        assert [image["url"] for image in product["images"]] == [
+            f"https://img.test/{product['id']}-a.jpg", f"https://img.test/{product['id']}-b.jpg",
+        ]
+        assert product["promotion"]["promotion_name"] == "Promo Baru"
+
+
+def test_to_dict_uses_the_bulk_loader(shop):
+    app, _, _ = shop
+    with app.app_context():
+        product = Product.query.first()
+        with count_queries(app) as statements:
+            data = product.to_dict()
+
+    assert len(statements) == 2
+    assert len(data["images"]) == 2
+    assert data["promotion"]["promotion_name"] == "Promo Baru"
+
+
+def test_detail_queries_do_not_grow_with_images_or_promotions(shop):
+    app, store_id, _ = shop
+    with app.app_context():
+        product_id = Product.query.first().id
+    url = f"/products/{product_id}"
+
+    with count_queries(app) as before:
+        assert app.test_client().get(url).status_code == 200
+    with app.app_context():
+        now = datetime.utcnow()
+        for i in range(5):
+            db.session.add(ProductImage(product_id=product_id, image_url=f"https://img.test/extra-{i}.jpg"))
+            db.session.add(Promotion(
+                product_id=product_id, store_id=store_id, promotion_name=f"Promo {i}",
+                promotion_period_start=now - timedelta(hours=i + 1), promotion_period_end=now + timedelta(days=1),
+                max_quantity=10, discount_percent=10,
+            ))
+        db.session.commit()
+    with count_queries(app) as after:
+        response = app.test_client().get(url)
+
+    assert len(after) == len(before)
+    assert len(response.get_json()["product"]["images"]) == 7
+    product_select = next(statement for statement in after if "products.deskripsi" in statement)
+    assert "promotions" not in product_select
+
+
+def test_write_paths_load_a_narrow_product_row(shop):
+    app, _, _ = shop
+    with app.app_context():
+        product_id = Product.query.first().id
+        buyer = auth_headers(create_user("buyer@example.com"))
+    client = app.test_client()
+    line = {"product_id": product_id, "quantity": 1}
+
+    with count_queries(app) as statements:
+        assert client.post("/cart/add", json=line, headers=buyer).status_code == 201
+        assert client.post("/wishlist/add", json={"product_id": product_id}, headers=buyer).status_code == 201
+        order_id = client.post("/cart/checkout", json={"products": [line]}, headers=buyer).get_json()["order_id"]
+        assert client.put(f"/order/{order_id}/cancel", headers=buyer).status_code == 200
+
+    product_reads = [statement for statement in statements if "FROM products" in statement]
+    assert product_reads
+    for statement in product_reads:
+        assert "products.deskripsi" not in statement
+        assert "promotions" not in statement
+
+
+@pytest.mark.parametrize("url", [*LISTINGS, "/products/{id}"])
+def test_fields_prune_columns_and_relation_queries(shop, url):
+    app, _, headers = shop
+    with app.app_context():
+        url = url.format(id=Product.query.first().id)
+    separator = "&" if "?" in url else "?"
+    client = app.test_client()
+
+    with count_queries(app) as full:
+        assert client.get(url, headers=headers).status_code == 200
+    with count_queries(app) as pruned:
+        response = client.get(f"{url}{separator}fields=nama_produk,harga", headers=headers)
+
+    body = response.get_json()
+    products = body["products"] if "products" in body else [body["product"]]
+    assert {tuple(sorted(product)) for product in products} == {("harga", "id", "nama_produk")}
+    assert len(pruned) == len(full) - 2
+    assert not any("products.deskripsi" in statement for statement in pruned)
+    assert not any("product_images.image_url" in statement for statement in pruned)
+    assert not any("promotions.promotion_name" in statement for statement in pruned)
+
+
+def test_fields_load_only_the_requested_relation(shop):
+    app, _, _ = shop
+    client = app.test_client()
+
+    with count_queries(app) as statements:
+        products = client.get("/products/?fields=images").get_json()["products"]
+
+    assert all(sorted(product) == ["id", "images"] and len(product["images"]) == 2 for product in products)
+    assert any("product_images.image_url" in statement for statement in statements)
+    assert not any("promotions.promotion_name" in statement for statement in statements)
+
+
+def test_unknown_fields_are_rejected(shop):
+    app, _, _ = shop
+
+    response = app.test_client().get("/products/?fields=nama_produk,password")
+
+    assert response.status_code == 400
+    assert response.get_json()["msg"].startswith("Unknown field(s): password.")
@@ -0,0 +1,131 @@
+import fakeredis
+import pytest
+from connectors.cache import MemoryCache, RedisCache
+from models.store import Store
+from tests.conftest import create_user, create_store, create_product, auth_headers
+
+
+@pytest.fixture(params=["memory", "redis"])
+def backend(request):
+    if request.param == "memory":
+        return MemoryCache(max_entries=3, default_ttl=60)
+    return RedisCache(fakeredis.FakeRedis(), default_ttl=60)
+
+
+def test_get_set_and_delete(backend):
+    backend.set("a", {"body": b"1"})
+    assert backend.get("a") == {"body": b"1"}
+    backend.delete("a")
+    assert backend.get("a") is None
+
+
+def test_invalidate_tags_only_evicts_tagged_entries(backend):
+    backend.set("listing", 1, tags=["catalog:listings", "catalog:product:1"])
+    backend.set("detail-1", 2, tags=["catalog:product:1"])
+    backend.set("detail-2", 3, tags=["catalog:product:2"])
+
+    backend.invalidate_tags("catalog:product:1")
+
+    assert backend.get("listing") is None
+    assert backend.get("detail-1") is None
+    assert backend.get("detail-2") == 3
+
+
+def test_redis_tag_outlives_its_longest_entry():
+    client = fakeredis.FakeRedis()
+    backend = RedisCache(client, default_ttl=60, key_prefix="")
+    backend.set("listing", 1, ttl=60, tags=["catalog:listings"])
+    backend.set("facets", 2, ttl=15, tags=["catalog:listings"])
+
+    assert client.ttl("tag:catalog:listings") > 15
+    backend.invalidate_tags("catalog:listings")
+    assert backend.get("listing") is None
+    assert backend.get("facets") is None
+
+
+def test_memory_cache_evicts_least_recently_used():
+    cache = MemoryCache(max_entries=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+
+    assert cache.get("a") == 1
+    assert cache.get("b") is None
+    assert cache.get("c") == 3
+
+
+@pytest.fixture(params=["memory", "redis"])
+def catalog(request, make_app):
+    overrides = {"CACHE_BACKEND": request.param}
+    if request.param == "redis":
+        overrides["CACHE_REDIS_CLIENT"] = fakeredis.FakeRedis()
+    app = make_app(**overrides)
+    with app.app_context():
+        seller = create_user("seller@example.com", is_seller=True)
+        store = create_store(seller)
+        product = create_product(store, stok=5)
+        buyer = create_user("buyer@example.com")
+        ctx = {
+            "product": product.id,
+            "seller": auth_headers(seller),
+            "buyer": auth_headers(buyer),
+        }
+    return app, ctx
+
+
+def test_listing_is_cached_until_filterable_field_changes(catalog):
+    app, ctx = catalog
+    client = app.test_client()
+
+    assert client.get("/products/").headers["X-Cache"] == "MISS"
+    assert client.get("/products/").headers["X-Cache"] == "HIT"
+    facets = client.get("/products/facets").get_json()["facets"]
+    assert facets["kategori"] == {"makanan": 1}
+
+    response = client.put(
+        f"/seller/products/{ctx['product']}", data={"kategori": "mainan"}, headers=ctx["seller"]
+    )
+    assert response.status_code == 200
+
+    assert client.get("/products/").headers["X-Cache"] == "MISS"
+    facets = client.get("/products/facets").get_json()["facets"]
+    assert facets["kategori"] == {"mainan": 1}
+
+
+def test_checkout_evicts_cached_stock(catalog):
+    app, ctx = catalog
+    client = app.test_client()
+    path = f"/products/{ctx['product']}"
+
+    assert client.get(path).get_json()["product"]["stok"] == 5
+    assert client.get(path).headers["X-Cache"] == "HIT"
+
+    response = client.post(
+        "/cart/checkout",
+        json={"products": [{"product_id": ctx["product"], "quantity": 2}]},
+        headers=ctx["buyer"],
+    )
+    assert response.status_code == 201
+
+    response = client.get(path)
+    assert response.headers["X-Cache"] == "MISS"
+    assert response.get_json()["product"]["stok"] == 3
+    assert client.get("/products/").get_json()["products"][0]["stok"] == 3
+
+
+def test_delete_evicts_listings_and_facets(catalog):
+    app, ctx = catalog
+    client = app.test_client()
+    with app.app_context():
+        other = create_product(Store.query.one(), nama_produk="Mainan Kucing", kategori="mainan").id
+
+    assert client.get("/products/facets").get_json()["facets"]["kategori"] == {"makanan": 1, "mainan": 1}
+    client.get("/products/?kategori=makanan")
+    assert client.get("/products/?kategori=makanan").headers["X-Cache"] == "HIT"
+
+    response = client.delete(f"/seller/products/{other}", headers=ctx["seller"])
+    assert response.status_code == 200
+
+    assert client.get("/products/facets").get_json()["facets"]["kategori"] == {"makanan": 1}
+    assert client.get("/products/?kategori=makanan").headers["X-Cache"] == "MISS"
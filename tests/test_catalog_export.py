@@ -0,0 +1,39 @@
+import json
+from models.product_image import ProductImage
+from connectors.db import db
+from tests.conftest import create_user, create_store, create_product
+
+
+def _seed(app, count):
+    with app.app_context():
+        store = create_store(create_user("seller@example.com", is_seller=True))
+        ids = []
+        for i in range(count):
+            product = create_product(store, nama_produk=f"Produk {i}")
+            db.session.add(ProductImage(product_id=product.id, image_url=f"https://img.test/{i}.jpg"))
+            ids.append(product.id)
+        db.session.commit()
+        return ids
+
+
+def test_ndjson_export_reads_every_keyset_page(make_app):
+    app = make_app(CATALOG_EXPORT_BATCH_SIZE=2)
+    ids = _seed(app, 5)
+
+    response = app.test_client().get("/products/export")
+    lines = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+
+    assert response.mimetype == "application/x-ndjson"
+    assert [item["id"] for item in lines] == ids
+    assert all(len(item["images"]) == 1 for item in lines)
+
+
+def test_json_export_with_fieldset(make_app):
+    app = make_app(CATALOG_EXPORT_BATCH_SIZE=2)
+    ids = _seed(app, 3)
+
+    response = app.test_client().get("/products/export?format=json&fields=nama_produk")
+    products = response.get_json()["products"]
+
+    assert [product["id"] for product in products] == ids
+    assert products[0] == {"id": ids[0], "nama_produk": "Produk 0"}
@@ -0,0 +1,46 @@
+import pytest
+from models.order import Order
+from tests.conftest import create_user, create_store, create_product, auth_headers
+
+
+@pytest.fixture
+def buyer(app):
+    with app.app_context():
+        product_id = create_product(create_store(create_user("seller@example.com", is_seller=True)), stok=5).id
+        return product_id, auth_headers(create_user("buyer@example.com"))
+
+
+@pytest.mark.parametrize("body", [
+    {"products": "x"},
+    {"products": ["x"]},
+    {"products": [{"product_id": [1], "quantity": 1}]},
+    {"products": [{"product_id": {"id": 1}, "quantity": 1}]},
+    {"products": [{"product_id": 1, "quantity": "2"}]},
+    {"products": [{"product_id": 1, "quantity": True}]},
+    [{"product_id": 1, "quantity": 1}],
+])
+def test_malformed_bodies_are_rejected_before_locking(app, client, buyer, body):
+    response = client.post("/cart/checkout", json=body, headers=buyer[1])
+
+    assert response.status_code == 400
+    with app.app_context():
+        assert Order.query.count() == 0
+
+
+def test_errors_are_reported_per_line(client, buyer):
+    product_id, headers = buyer
+    body = {"products": [{"product_id": product_id, "quantity": 1}, {"product_id": "abc", "quantity": 1}, 7]}
+
+    errors = client.post("/cart/checkout", json=body, headers=headers).get_json()["errors"]
+
+    assert [error["index"] for error in errors] == [1, 2]
+
+
+def test_string_product_id_is_accepted(client, buyer):
+    product_id, headers = buyer
+
+    response = client.post(
+        "/cart/checkout", json={"products": [{"product_id": str(product_id), "quantity": 2}]}, headers=headers
+    )
+
+    assert response.status_code == 201
@@ -0,0 +1,95 @@
+from sqlalchemy import func
+from connectors.db import db
+from models.order_item import OrderItem
+from models.product import Product
+from controllers.CheckoutOrderController import _decrement_stock
+from tests.conftest import create_user, create_store, create_product, auth_headers, send_in_parallel
+
+BUYERS = 8
+STOCK = 5
+
+
+def _seed(app):
+    with app.app_context():
+        store = create_store(create_user("seller@example.com", is_seller=True))
+        products = [create_product(store, nama_produk=f"Produk {i}", stok=STOCK).id for i in range(2)]
+        buyers = [auth_headers(create_user(f"buyer{i}@example.com")) for i in range(BUYERS)]
+        return products, buyers
+
+
+def _stock(app):
+    with app.app_context():
+        return dict(db.session.query(Product.id, Product.stok).all())
+
+
+def test_parallel_checkouts_never_oversell(make_app):
+    app = make_app(SQLALCHEMY_ENGINE_OPTIONS={"pool_size": BUYERS, "max_overflow": 0})
+    (a, b), buyers = _seed(app)
+    requests = []
+    for i, headers in enumerate(buyers):
+        lines = [{"product_id": a, "quantity": 1}, {"product_id": b, "quantity": 1}]
+        # Urutan baris dibalik untuk separuh pembeli; penguncian urut id mencegah deadlock
+        requests.append(("POST", "/cart/checkout", headers, {"products": lines if i % 2 else lines[::-1]}))
+
+    statuses = send_in_parallel(app, requests)
+
+    # Postgres/MySQL: pemenang mengunci baris, sisanya melihat stok habis (400).
+    # SQLite tanpa row lock: UPDATE bersyarat stok >= jumlah yang menolak (409).
+    assert statuses.count(201) == STOCK
+    assert set(statuses) - {201} <= {400, 409}
+    with app.app_context():
+        sold = dict(
+            db.session.query(OrderItem.product_id, func.sum(OrderItem.quantity)).group_by(OrderItem.product_id).all()
+        )
+        stock = dict(db.session.query(Product.id, Product.stok).all())
+    for product_id in (a, b):
+        assert sold[product_id] == statuses.count(201) <= STOCK
+        assert stock[product_id] == STOCK - sold[product_id] >= 0
+
+
+def test_decrement_stock_updates_all_lines_or_reports_a_short_one(app):
+    (a, b), _ = _seed(app)
+    with app.app_context():
+        assert _decrement_stock({a: 2, b: 5})
+        db.session.commit()
+        assert dict(db.session.query(Product.id, Product.stok).all()) == {a: 3, b: 0}
+
+        # b sudah habis: rowcount kurang dari jumlah baris, pemanggil me-rollback
+        assert not _decrement_stock({a: 1, b: 1})
+        db.session.rollback()
+        assert dict(db.session.query(Product.id, Product.stok).all()) == {a: 3, b: 0}
+
+
+def test_cancel_alongside_checkouts_keeps_every_decrement(make_app):
+    app = make_app(SQLALCHEMY_ENGINE_OPTIONS={"pool_size": BUYERS, "max_overflow": 0})
+    (a, b), buyers = _seed(app)
+    lines = [{"product_id": a, "quantity": 2}, {"product_id": b, "quantity": 2}]
+    order_id = app.test_client().post("/cart/checkout", json={"products": lines}, headers=buyers[0]).get_json()["order_id"]
+
+    requests = [("PUT", f"/order/{order_id}/cancel", buyers[0], None)]
+    for headers in buyers[1:]:
+        requests.append(("POST", "/cart/checkout", headers, {"products": [
+            {"product_id": a, "quantity": 1}, {"product_id": b, "quantity": 1}
+        ]}))
+
+    statuses = send_in_parallel(app, requests)
+
+    assert statuses[0] == 200
+    sold = statuses[1:].count(201)
+    assert set(statuses[1:]) - {201} <= {400, 409}
+    # Pembatalan mengembalikan 2, setiap checkout yang berhasil mengambil 1; tidak ada yang hilang
+    assert _stock(app) == {a: STOCK - sold, b: STOCK - sold}
+
+
+def test_parallel_cancels_restore_stock_once(make_app):
+    app = make_app(SQLALCHEMY_ENGINE_OPTIONS={"pool_size": BUYERS, "max_overflow": 0})
+    (a, b), buyers = _seed(app)
+    order_id = app.test_client().post(
+        "/cart/checkout", json={"products": [{"product_id": a, "quantity": 2}]}, headers=buyers[0]
+    ).get_json()["order_id"]
+
+    statuses = send_in_parallel(app, [("PUT", f"/order/{order_id}/cancel", buyers[0], None)] * 4)
+
+    assert statuses.count(200) == 1
+    assert set(statuses) - {200} <= {400, 409}
+    assert _stock(app)[a] == STOCK
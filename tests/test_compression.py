@@ -0,0 +1,140 @@
+import gzip
+import pytest
+from flask import Response
+import middlewares.compression
+from tests.conftest import create_user, create_store, create_product
+
+GZIP = {"Accept-Encoding": "gzip"}
+
+
+@pytest.fixture
+def shop(make_app):
+    """
+    App with enough products for the listing to pass a 200 byte COMPRESS_MIN_SIZE.
+    """
+    def build(**overrides):
+        app = make_app(**{"COMPRESS_MIN_SIZE": 200, **overrides})
+        with app.app_context():
+            store = create_store(create_user("seller@example.com", is_seller=True))
+            for i in range(5):
+                create_product(store, nama_produk=f"Makanan Kucing {i}", deskripsi="Makanan kering rasa ikan " * 4)
+        return app.test_client()
+    return build
+
+
+@pytest.fixture
+def compress_calls(monkeypatch):
+    calls = []
+    original = middlewares.compression.compress_body
+
+    def counting(data, encoding, config):
+        calls.append(encoding)
+        return original(data, encoding, config)
+
+    monkeypatch.setattr(middlewares.compression, "compress_body", counting)
+    return calls
+
+
+def test_listing_is_gzipped_when_accepted(shop):
+    client = shop()
+
+    plain = client.get("/products/")
+    encoded = client.get("/products/", headers=GZIP)
+
+    assert "Content-Encoding" not in plain.headers
+    assert encoded.headers["Content-Encoding"] == "gzip"
+    assert gzip.decompress(encoded.get_data()) == plain.get_data()
+    assert encoded.get_etag() == (f"{plain.get_etag()[0]}-gzip", False)
+    for response in (plain, encoded):
+        assert "Accept-Encoding" in response.vary
+
+
+def test_bodies_below_the_threshold_are_sent_as_is(shop):
+    client = shop(COMPRESS_MIN_SIZE=10 ** 6)
+
+    response = client.get("/products/", headers=GZIP)
+
+    assert "Content-Encoding" not in response.headers
+    assert response.get_json()["products"]
+    assert "Accept-Encoding" in response.vary
+
+
+def test_refused_encoding_is_not_used(shop):
+    client = shop()
+
+    response = client.get("/products/", headers={"Accept-Encoding": "gzip;q=0, deflate"})
+
+    assert "Content-Encoding" not in response.headers
+
+
+def test_cache_hits_are_served_precompressed(shop, compress_calls):
+    client = shop()
+
+    miss = client.get("/products/", headers=GZIP)
+    assert miss.headers["X-Cache"] == "MISS"
+    assert compress_calls == ["gzip"]  # Hanya varian untuk cache; middleware tidak mengompres ulang
+
+    hit = client.get("/products/", headers=GZIP)
+    assert hit.headers["X-Cache"] == "HIT"
+    assert hit.headers["Content-Encoding"] == "gzip"
+    assert hit.get_data() == miss.get_data()
+    assert "Accept-Encoding" in hit.vary
+    assert compress_calls == ["gzip"]
+
+
+def test_not_modified_keeps_the_encoded_etag(shop):
+    client = shop()
+    etag = client.get("/products/", headers=GZIP).headers["ETag"]
+
+    response = client.get("/products/", headers={**GZIP, "If-None-Match": etag})
+
+    assert response.status_code == 304
+    assert response.headers["ETag"] == etag
+
+
+def test_streamed_export_is_compressed_on_the_fly(shop):
+    client = shop()
+    plain = client.get("/products/export").get_data()
+
+    response = client.get("/products/export", headers=GZIP)
+
+    assert response.is_streamed
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert "Content-Length" not in response.headers
+    assert gzip.decompress(response.get_data()) == plain
+
+
+def test_already_encoded_and_passthrough_responses_are_left_alone(shop, tmp_path):
+    client = shop()
+    app = client.application
+    body = b"x" * 1000
+    (tmp_path / "feed.txt").write_bytes(body)
+
+    @app.route("/test/encoded")
+    def encoded():
+        return Response(body, mimetype="text/plain", headers={"Content-Encoding": "identity"})
+
+    @app.route("/test/file")
+    def file():
+        response = Response(open(tmp_path / "feed.txt", "rb"), mimetype="text/plain", direct_passthrough=True)
+        response.headers["Content-Length"] = str(len(body))
+        return response
+
+    for url in ("/test/encoded", "/test/file"):
+        response = client.get(url, headers=GZIP)
+        assert response.headers.get("Content-Encoding") in (None, "identity")
+        assert response.get_data() == body
+
+
+def test_other_mimetypes_are_not_compressed(shop):
+    client = shop()
+    app = client.application
+
+    @app.route("/test/image")
+    def image():
+        return Response(b"\x89PNG" + b"\0" * 2000, mimetype="image/png")
+
+    response = client.get("/test/image", headers=GZIP)
+
+    assert "Content-Encoding" not in response.headers
+    assert "Accept-Encoding" not in response.vary
@@ -0,0 +1,101 @@
+from datetime import datetime, timedelta
+import pytest
+from connectors.db import db
+from models.product import Product
+from models.product_image import ProductImage
+from models.promotion import Promotion
+from tests.conftest import create_user, create_store, create_product, auth_headers, count_queries
+
+
+@pytest.fixture
+def shop(make_app):
+    def build(**overrides):
+        app = make_app(**overrides)
+        with app.app_context():
+            seller = create_user("seller@example.com", is_seller=True)
+            store = create_store(seller)
+            product_id = create_product(store, deskripsi="Makanan kering").id
+            create_product(store, nama_produk="Mangkuk")
+            return app, product_id, auth_headers(seller)
+    return build
+
+
+def _etag(client, url, **headers):
+    response = client.get(url, headers=headers)
+    assert response.status_code == 200
+    return response.headers["ETag"]
+
+
+def test_detail_304_runs_only_the_version_query(shop):
+    app, product_id, _ = shop(CACHE_BACKEND="none")
+    client = app.test_client()
+    etag = _etag(client, f"/products/{product_id}")
+
+    with count_queries(app) as statements:
+        response = client.get(f"/products/{product_id}", headers={"If-None-Match": etag})
+
+    assert response.status_code == 304
+    assert response.headers["ETag"] == etag
+    assert response.headers["Cache-Control"] == "public, max-age=30"
+    assert len(statements) == 1
+    assert "deskripsi" not in statements[0]
+
+
+def test_cached_detail_304_runs_no_query(shop):
+    app, product_id, _ = shop()
+    client = app.test_client()
+    etag = _etag(client, f"/products/{product_id}")
+
+    with count_queries(app) as statements:
+        response = client.get(f"/products/{product_id}", headers={"If-None-Match": etag})
+
+    assert response.status_code == 304
+    assert statements == []
+
+
+def test_detail_etag_follows_product_images_and_promotions(shop):
+    app, product_id, _ = shop(CACHE_BACKEND="none")
+    client = app.test_client()
+    url = f"/products/{product_id}"
+    seen = [_etag(client, url)]
+
+    with app.app_context():
+        product = db.session.get(Product, product_id)
+        product.stok = 3
+        store_id = product.store_id
+        db.session.commit()
+    seen.append(_etag(client, url))
+
+    with app.app_context():
+        db.session.add(ProductImage(product_id=product_id, image_url="https://img.test/a.jpg"))
+        db.session.commit()
+    seen.append(_etag(client, url))
+
+    with app.app_context():
+        now = datetime.utcnow()
+        db.session.add(Promotion(
+            product_id=product_id, store_id=store_id, promotion_name="Flash sale",
+            promotion_period_start=now - timedelta(hours=1), promotion_period_end=now + timedelta(hours=1),
+            max_quantity=10, discount_percent=10,
+        ))
+        db.session.commit()
+    seen.append(_etag(client, url))
+
+    assert len(set(seen)) == len(seen)
+    assert _etag(client, url) == seen[-1]
+    assert _etag(client, f"{url}?fields=nama_produk") != seen[-1]
+
+
+def test_listing_304_skips_images_and_promotions(shop):
+    app, _, headers = shop(CACHE_BACKEND="none")
+    client = app.test_client()
+
+    with count_queries(app) as full:
+        etag = _etag(client, "/seller/products", **headers)
+    with count_queries(app) as conditional:
+        response = client.get("/seller/products", headers={**headers, "If-None-Match": etag})
+
+    assert response.status_code == 304
+    assert response.headers["Cache-Control"] == "private, no-cache"
+    assert len(conditional) == len(full) - 2
+    assert not any("promotion_name" in statement for statement in conditional)
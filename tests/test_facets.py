@@ -0,0 +1,35 @@
+import pytest
+from services.search import validate_price_buckets
+from tests.conftest import create_user, create_store, create_product
+
+
+def test_price_buckets_are_sorted():
+    assert validate_price_buckets([100000, 50000.0, "250000"]) == [50000.0, 100000.0, 250000.0]
+
+
+@pytest.mark.parametrize("bounds", [[50000, 50000], [-1, 100], ["murah"]])
+def test_invalid_price_buckets_are_rejected(bounds):
+    with pytest.raises(ValueError):
+        validate_price_buckets(bounds)
+
+
+def test_invalid_price_buckets_fail_at_startup(make_app):
+    with pytest.raises(ValueError):
+        make_app(FACET_PRICE_BUCKETS=[100000, 100000])
+
+
+def test_unsorted_buckets_count_each_product_once(make_app):
+    app = make_app(FACET_PRICE_BUCKETS=[100000, 50000])
+    with app.app_context():
+        store = create_store(create_user("seller@example.com", is_seller=True))
+        for harga in (10000, 60000, 70000, 150000):
+            create_product(store, harga=harga)
+
+    facets = app.test_client().get("/products/facets").get_json()["facets"]
+
+    assert facets["total"] == 4
+    assert facets["price"] == [
+        {"min": None, "max": 50000.0, "count": 1},
+        {"min": 50000.0, "max": 100000.0, "count": 2},
+        {"min": 100000.0, "max": None, "count": 1},
+    ]
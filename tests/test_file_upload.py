@@ -0,0 +1,26 @@
+from connectors.db import db
+from models.product_image import ProductImage
+from tests.conftest import create_user, create_store, create_product, auth_headers
+
+
+def test_image_status_is_only_visible_to_the_owning_seller(app, client):
+    with app.app_context():
+        seller = create_user("seller@example.com", is_seller=True)
+        product = create_product(create_store(seller))
+        other = create_user("other@example.com", is_seller=True)
+        create_store(other, domain="toko-lain")
+        image = ProductImage(product_id=product.id, status="failed", attempts=5, last_error="timeout to media.local")
+        db.session.add(image)
+        db.session.commit()
+        path = f"/files/images/{image.id}"
+        owner_headers, other_headers = auth_headers(seller), auth_headers(other)
+
+    response = client.get(path, headers=owner_headers)
+    assert response.status_code == 200
+    assert response.get_json()["last_error"] == "timeout to media.local"
+
+    response = client.get(path, headers=other_headers)
+    assert response.status_code == 403
+    assert "last_error" not in response.get_json()
+
+    assert client.get("/files/images/999", headers=owner_headers).status_code == 404
@@ -0,0 +1,127 @@
+import threading
+import time
+from datetime import datetime, timedelta
+from flask import jsonify, request
+from flask_jwt_extended import jwt_required
+from connectors.db import db
+from middlewares.idempotency import idempotent
+from models.idempotency_key import IdempotencyKey
+from models.order import Order
+from models.product import Product
+from tests.conftest import create_user, create_store, create_product, auth_headers
+
+
+def test_checkout_is_replayed_for_the_same_key(app, client):
+    with app.app_context():
+        product_id = create_product(create_store(create_user("seller@example.com", is_seller=True)), stok=5).id
+        headers = auth_headers(create_user("buyer@example.com"), **{"Idempotency-Key": "checkout-1"})
+    body = {"products": [{"product_id": product_id, "quantity": 2}]}
+
+    first = client.post("/cart/checkout", json=body, headers=headers)
+    second = client.post("/cart/checkout", json=body, headers=headers)
+
+    assert first.status_code == second.status_code == 201
+    assert second.get_json() == first.get_json()
+    assert second.headers["Idempotent-Replayed"] == "true"
+    assert "Idempotent-Replayed" not in first.headers
+    with app.app_context():
+        assert Order.query.count() == 1
+        assert db.session.get(Product, product_id).stok == 3
+
+    changed = client.post("/cart/checkout", json={"products": [{"product_id": product_id, "quantity": 1}]},
+                          headers=headers)
+    assert changed.status_code == 422
+
+
+def _idempotent_app(make_app, view):
+    """App with an extra idempotent POST /test/idempotent route and a logged-in user's headers."""
+    app = make_app(IDEMPOTENCY_POLL_INTERVAL=0.02)
+    app.add_url_rule("/test/idempotent", view_func=jwt_required()(idempotent(view)), methods=["POST"])
+    with app.app_context():
+        user = create_user("buyer@example.com")
+        return app, auth_headers(user, **{"Idempotency-Key": "key-1"}), user.id
+
+
+def test_transient_responses_are_not_stored(make_app):
+    statuses = [409, 201]
+
+    def view():
+        return jsonify({"status": statuses[0]}), statuses.pop(0)
+
+    app, headers, _ = _idempotent_app(make_app, view)
+    client = app.test_client()
+
+    assert client.post("/test/idempotent", json={}, headers=headers).status_code == 409
+    response = client.post("/test/idempotent", json={}, headers=headers)
+    assert response.status_code == 201
+    assert "Idempotent-Replayed" not in response.headers
+    assert client.post("/test/idempotent", json={}, headers=headers).headers["Idempotent-Replayed"] == "true"
+
+
+def test_duplicate_waits_for_the_request_in_flight(make_app):
+    started, release = threading.Event(), threading.Event()
+    calls = []
+
+    def view():
+        calls.append(request.get_json())
+        started.set()
+        release.wait(5)
+        return jsonify({"call": len(calls)}), 201
+
+    app, headers, _ = _idempotent_app(make_app, view)
+    responses = {}
+
+    def send(name):
+        responses[name] = app.test_client().post("/test/idempotent", json={"a": 1}, headers=headers)
+
+    first = threading.Thread(target=send, args=("first",))
+    first.start()
+    assert started.wait(5)
+    duplicate = threading.Thread(target=send, args=("duplicate",))
+    duplicate.start()
+    time.sleep(0.2)  # Duplikat sedang menunggu
+    assert "duplicate" not in responses
+    release.set()
+    first.join()
+    duplicate.join()
+
+    assert len(calls) == 1
+    assert responses["duplicate"].status_code == 201
+    assert responses["duplicate"].get_json() == responses["first"].get_json() == {"call": 1}
+    assert responses["duplicate"].headers["Idempotent-Replayed"] == "true"
+
+
+def test_expired_claim_is_taken_over(make_app):
+    def view():
+        return jsonify({"ok": True}), 201
+
+    app, headers, user_id = _idempotent_app(make_app, view)
+    with app.app_context():
+        record = IdempotencyKey(
+            user_id=user_id, key="key-1", request_hash="x" * 64, status="in_progress",
+            expires_at=datetime.utcnow() - timedelta(seconds=1),
+        )
+        db.session.add(record)
+        db.session.commit()
+
+    response = app.test_client().post("/test/idempotent", json={}, headers=headers)
+
+    assert response.status_code == 201
+    with app.app_context():
+        assert IdempotencyKey.query.one().status == "completed"
+
+
+def test_response_is_not_stored_when_the_claim_was_lost(make_app):
+    def view():
+        # Klaim kedaluwarsa dan dihapus oleh request lain selagi handler berjalan
+        IdempotencyKey.query.delete()
+        db.session.commit()
+        return jsonify({"ok": True}), 201
+
+    app, headers, _ = _idempotent_app(make_app, view)
+
+    response = app.test_client().post("/test/idempotent", json={}, headers=headers)
+
+    assert response.status_code == 201
+    with app.app_context():
+        assert IdempotencyKey.query.count() == 0
@@ -0,0 +1,116 @@
+import io
+import threading
+import time
+import pytest
+import services.media
+from werkzeug.datastructures import FileStorage
+from connectors.db import db
+from models.media_blob import MediaBlob
+from services.media import FakeUploader, UploadError, upload_images, hash_file
+
+
+class SlowUploader(FakeUploader):
+    """FakeUploader that records how many uploads run at once; files in `block` wait for `release`."""
+
+    def __init__(self, delay=0.0, block=(), **kwargs):
+        super().__init__(**kwargs)
+        self.delay = delay
+        self.block = set(block)
+        self.release = threading.Event()
+        self.active = 0
+        self.peak = 0
+        self.completed = 0
+        self.lock = threading.Lock()
+
+    def upload(self, file, timeout=None, **options):
+        with self.lock:
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        try:
+            time.sleep(self.delay)
+            if file.filename in self.block:
+                self.release.wait(5)
+            result = super().upload(file, timeout=timeout, **options)
+            with self.lock:
+                self.completed += 1
+            return result
+        finally:
+            with self.lock:
+                self.active -= 1
+
+
+def _files(*names):
+    return [FileStorage(stream=io.BytesIO(name.encode()), filename=name) for name in names]
+
+
+def _wait_until(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() >= deadline:
+            return False
+        time.sleep(0.01)
+    return True
+
+
+def test_uploads_are_bounded_by_the_pool(make_app):
+    uploader = SlowUploader(delay=0.05)
+    app = make_app(IMAGE_UPLOADER_INSTANCE=uploader, UPLOAD_MAX_WORKERS=2)
+
+    with app.app_context():
+        results = upload_images(_files(*(f"{i}.jpg" for i in range(6))))
+
+    assert uploader.peak == 2
+    assert len(results) == 6
+    assert len(uploader.files) == 6
+
+
+def test_failed_upload_destroys_the_others(make_app):
+    uploader = SlowUploader(fail_on=["rusak.jpg"])
+    app = make_app(IMAGE_UPLOADER_INSTANCE=uploader)
+
+    with app.app_context():
+        with pytest.raises(UploadError):
+            upload_images(_files("a.jpg", "rusak.jpg", "b.jpg"))
+
+    assert _wait_until(lambda: uploader.files == {})
+
+
+def test_timeout_cleans_up_uploads_that_finish_late(make_app):
+    uploader = SlowUploader(block=["lambat.jpg"])
+    app = make_app(IMAGE_UPLOADER_INSTANCE=uploader, UPLOAD_MAX_WORKERS=2, UPLOAD_TIMEOUT=0.2)
+
+    with app.app_context():
+        started = time.monotonic()
+        with pytest.raises(UploadError):
+            upload_images(_files("a.jpg", "lambat.jpg"))
+        assert time.monotonic() - started < 2
+
+    assert uploader.files == {}
+    uploader.release.set()
+    # Upload yang selesai setelah timeout tetap dihapus lewat callback
+    assert _wait_until(lambda: uploader.completed == 2 and uploader.files == {})
+
+
+def test_concurrent_duplicate_upload_reuses_the_stored_blob(make_app, monkeypatch):
+    uploader = FakeUploader()
+    app = make_app(IMAGE_UPLOADER_INSTANCE=uploader)
+    file = _files("a.jpg")[0]
+
+    with app.app_context():
+        content_hash = hash_file(file)
+        db.session.add(MediaBlob(content_hash=content_hash, url="https://media.local/first", public_id="first"))
+        db.session.commit()
+        find_blobs = services.media.find_blobs
+
+        def find_blobs_before_other_request(hashes):
+            # Request lain baru menyimpan blob yang sama setelah pencarian pertama
+            return find_blobs(hashes) if uploader.files else {}
+
+        monkeypatch.setattr(services.media, "find_blobs", find_blobs_before_other_request)
+
+        result = upload_images([file])[0]
+        db.session.commit()
+
+        assert result["url"] == "https://media.local/first"
+        assert MediaBlob.query.count() == 1
+    assert uploader.files == {}
@@ -0,0 +1,71 @@
+import pytest
+from tests.conftest import create_user, create_store, create_product, auth_headers
+
+# Harga kembar untuk menguji tie-break pada id
+PRICES = [30000, 10000, 20000, 10000, 50000, 20000, 40000]
+
+
+@pytest.fixture
+def catalog(app):
+    with app.app_context():
+        seller = create_user("seller@example.com", is_seller=True)
+        store = create_store(seller)
+        products = [
+            (create_product(store, nama_produk=f"Produk {chr(ord('G') - i)}", harga=price).id, price)
+            for i, price in enumerate(PRICES)
+        ]
+        return products, auth_headers(seller)
+
+
+def _walk(client, path, **headers):
+    """Follow next_cursor until the last page; return ids per page."""
+    pages, cursor = [], None
+    while True:
+        url = f"{path}&cursor={cursor}" if cursor else path
+        data = client.get(url, headers=headers).get_json()
+        pages.append([product["id"] for product in data["products"]])
+        cursor = data["next_cursor"]
+        if not cursor:
+            return pages
+
+
+def test_pages_cover_every_product_once(client, catalog):
+    products, _ = catalog
+
+    pages = _walk(client, "/products/?limit=3")
+
+    assert [len(page) for page in pages] == [3, 3, 1]
+    assert sum(pages, []) == sorted(product_id for product_id, _ in products)
+
+
+@pytest.mark.parametrize("order", ["asc", "desc"])
+def test_price_order_breaks_ties_on_id(client, catalog, order):
+    products, _ = catalog
+    expected = sorted(products, key=lambda product: (product[1], product[0]), reverse=order == "desc")
+
+    pages = _walk(client, f"/products?sort_by=harga&order={order}&limit=2")
+
+    assert sum(pages, []) == [product_id for product_id, _ in expected]
+
+
+def test_name_order_and_seller_listing(client, catalog):
+    products, headers = catalog
+    by_name = [product_id for product_id, _ in products][::-1]  # Nama dibuat menurun: G, F, E, ...
+
+    assert sum(_walk(client, "/products?sort_by=nama_produk&limit=4"), []) == by_name
+    assert sum(_walk(client, "/seller/products?limit=5", **headers), []) == sorted(by_name)
+
+
+def test_cursor_is_bound_to_its_sort_order(client, catalog):
+    cursor = client.get("/products?sort_by=harga&order=asc&limit=2").get_json()["next_cursor"]
+
+    assert client.get(f"/products?sort_by=harga&order=asc&limit=2&cursor={cursor}").status_code == 200
+    for query in ("sort_by=harga&order=desc", "sort_by=nama_produk&order=asc"):
+        response = client.get(f"/products?{query}&limit=2&cursor={cursor}")
+        assert response.status_code == 400
+        assert response.get_json()["msg"] == "Cursor does not match the requested sort order"
+
+
+@pytest.mark.parametrize("query", ["cursor=bukan-cursor", "limit=0", "limit=abc"])
+def test_bad_cursor_or_limit_is_rejected(client, catalog, query):
+    assert client.get(f"/products/?{query}").status_code == 400
@@ -0,0 +1,36 @@
+from datetime import datetime, timedelta
+from connectors.db import db
+from models.product import Product
+from models.promotion import Promotion
+from services.pricing import refresh_prices_command
+from tests.conftest import create_user, create_store, create_product
+
+
+def test_refresh_prices_evicts_price_sorted_listings(app):
+    with app.app_context():
+        store = create_store(create_user("seller@example.com", is_seller=True))
+        cheap = create_product(store, nama_produk="Murah", harga=20000)
+        discounted = create_product(store, nama_produk="Diskon", harga=100000)
+        now = datetime.utcnow()
+        db.session.add(Promotion(
+            product_id=discounted.id, store_id=store.id, promotion_name="Flash sale",
+            promotion_period_start=now - timedelta(hours=1), promotion_period_end=now + timedelta(hours=1),
+            max_quantity=10, discount_percent=90,
+        ))
+        db.session.commit()
+        ids = (cheap.id, discounted.id)
+
+    client = app.test_client()
+    # Halaman pertama hanya memuat produk termurah, jadi tag produk diskon tidak ada di dalamnya
+    page = client.get("/products/?sort_by=harga&limit=1")
+    assert [item["id"] for item in page.get_json()["products"]] == [ids[0]]
+    assert client.get("/products/?sort_by=harga&limit=1").headers["X-Cache"] == "HIT"
+
+    result = app.test_cli_runner().invoke(refresh_prices_command)
+    assert "1 product(s)" in result.output
+
+    page = client.get("/products/?sort_by=harga&limit=1")
+    assert page.headers["X-Cache"] == "MISS"
+    assert [item["id"] for item in page.get_json()["products"]] == [ids[1]]
+    with app.app_context():
+        assert db.session.get(Product, ids[1]).effective_price == 10000
@@ -0,0 +1,29 @@
+from tests.conftest import create_user, create_store, create_product
+
+
+def _seed(app):
+    with app.app_context():
+        store = create_store(create_user("seller@example.com", is_seller=True))
+        return [create_product(store, nama_produk=f"Produk {i}").id for i in range(2)]
+
+
+def test_get_batch_honours_if_none_match(app, client):
+    ids = _seed(app)
+    path = f"/products/batch?ids={ids[0]},{ids[1]},999"
+
+    response = client.get(path)
+    assert response.status_code == 200
+    assert response.get_json()["missing"] == [999]
+    etag = response.headers["ETag"]
+
+    assert client.get(path, headers={"If-None-Match": etag}).status_code == 304
+
+
+def test_post_batch_ignores_if_none_match(app, client):
+    ids = _seed(app)
+
+    response = client.post("/products/batch", json={"ids": ids}, headers={"If-None-Match": "*"})
+
+    assert response.status_code == 200
+    assert [product["id"] for product in response.get_json()["products"]] == ids
+    assert "ETag" not in response.headers
@@ -0,0 +1,119 @@
+import io
+import pytest
+import services.media
+from connectors.db import db
+from models.media_blob import MediaBlob
+from models.product import Product
+from models.product_image import ProductImage
+from services.media import get_uploader, _check_fetch_url
+from services.product_import import fetch_product_images
+from tests.conftest import create_user, create_store, create_product, auth_headers
+
+CSV_HEADER = "nama_produk,harga,stok,kategori,jenis_hewan,berat,image_urls\n"
+
+
+@pytest.fixture
+def seller(app):
+    with app.app_context():
+        user = create_user("seller@example.com", is_seller=True)
+        create_store(user)
+        return auth_headers(user)
+
+
+def _import(client, headers, body, filename="produk.csv"):
+    return client.post(
+        "/seller/products/import",
+        data={"file": (io.BytesIO(body.encode()), filename)},
+        headers=headers,
+        content_type="multipart/form-data",
+    )
+
+
+def _names_by_id(app, products):
+    with app.app_context():
+        return {item["id"]: db.session.get(Product, item["id"]).nama_produk for item in products}
+
+
+@pytest.mark.parametrize("returning", [True, False])
+def test_import_maps_ids_to_rows(app, client, seller, monkeypatch, returning):
+    if not returning:
+        # Seperti MySQL: tanpa RETURNING pada executemany
+        with app.app_context():
+            dialect = db.engine.dialect
+        monkeypatch.setattr(dialect, "insert_executemany_returning_sort_by_parameter_order", False)
+
+    body = CSV_HEADER + "".join(
+        f"Produk {i},{10000 + i},5,makanan,kucing,1,\n" for i in range(5)
+    ) + "Rusak,abc,5,makanan,kucing,1,\n"
+    app.config["PRODUCT_IMPORT_BATCH_SIZE"] = 2
+
+    response = _import(client, seller, body)
+    data = response.get_json()
+
+    assert response.status_code == 201
+    assert data["imported"] == 5
+    assert data["errors"] == [{"row": 6, "msg": "Invalid numeric value for harga, stok, or berat"}]
+    names = _names_by_id(app, data["products"])
+    assert [names[item["id"]] for item in data["products"]] == [f"Produk {i}" for i in range(5)]
+    assert [item["row"] for item in data["products"]] == [1, 2, 3, 4, 5]
+
+
+def test_rows_rejected_by_the_database_are_reported(app, client, seller):
+    with app.app_context():
+        if db.engine.dialect.name == "sqlite":
+            # SQLite tidak membatasi panjang VARCHAR; tiru batas kolom nama_produk
+            with db.engine.begin() as connection:
+                connection.exec_driver_sql(
+                    "CREATE TRIGGER products_name_length BEFORE INSERT ON products "
+                    "WHEN length(NEW.nama_produk) > 255 BEGIN SELECT RAISE(ABORT, 'value too long'); END"
+                )
+
+    body = CSV_HEADER + "Produk A,10000,5,makanan,kucing,1,\n" + f"{'X' * 300},10000,5,makanan,kucing,1,\n" \
+        + "Produk C,10000,5,makanan,kucing,1,\n"
+
+    response = _import(client, seller, body)
+    data = response.get_json()
+
+    assert response.status_code == 201
+    assert [item["row"] for item in data["products"]] == [1, 3]
+    assert [error["row"] for error in data["errors"]] == [2]
+    assert sorted(_names_by_id(app, data["products"]).values()) == ["Produk A", "Produk C"]
+    with app.app_context():
+        assert Product.query.count() == 2
+
+
+def test_imported_image_urls_are_deduplicated_through_media(app, monkeypatch):
+    downloads = {
+        "https://img.test/a.jpg": b"same image",
+        "https://img.test/b.jpg": b"same image",
+        "https://img.test/broken.jpg": None,
+    }
+
+    def download(url, timeout, max_bytes):
+        if downloads[url] is None:
+            raise OSError("connection reset")
+        return downloads[url]
+
+    monkeypatch.setattr(services.media, "_download", download)
+    with app.app_context():
+        store = create_store(create_user("seller@example.com", is_seller=True))
+        product = create_product(store)
+
+        fetch_product_images([(product.id, list(downloads))])
+
+        images = ProductImage.query.filter_by(product_id=product.id).all()
+        assert len(images) == 2
+        assert len({image.image_url for image in images}) == 1
+        assert MediaBlob.query.count() == 1
+        assert len(get_uploader().files) == 1
+
+
+@pytest.mark.parametrize("url", [
+    "file:///etc/passwd",
+    "http://127.0.0.1/admin.jpg",
+    "http://169.254.169.254/latest/meta-data",
+    "http://[::1]/x.jpg",
+])
+def test_image_urls_to_internal_addresses_are_refused(url):
+    with pytest.raises(ValueError):
+        _check_fetch_url(url)
@@ -0,0 +1,136 @@
+import itertools
+import fakeredis
+import pytest
+from sqlalchemy import event
+import connectors.db
+from connectors.cache import cache
+from connectors.db import db
+from models.product import Product
+from tests.conftest import create_user, create_store, create_product, auth_headers, count_queries
+
+
+@pytest.fixture
+def replicated(make_app, tmp_path):
+    """
+    App with a primary and SQLite replicas (one by default). The replicas hold
+    an older name and kategori for the product, so responses show which
+    database was read.
+    """
+    def build(replicas=1, **overrides):
+        binds = {f"replica_{i}": f"sqlite:///{tmp_path / f'replica_{i}.db'}" for i in range(replicas)}
+        app = make_app(SQLALCHEMY_BINDS=binds, **overrides)
+        with app.app_context():
+            seller = create_user("seller@example.com", is_seller=True)
+            product = create_product(create_store(seller), nama_produk="Nama Baru")
+            for bind_key in binds:
+                replica = db.engines[bind_key]
+                db.metadata.create_all(replica)
+                with replica.begin() as connection:
+                    for table in ("users", "stores", "products"):
+                        rows = [dict(row._mapping) for row in db.session.execute(db.metadata.tables[table].select())]
+                        connection.execute(db.metadata.tables[table].insert(), rows)
+                    connection.execute(
+                        db.metadata.tables["products"].update().values(nama_produk="Nama Lama", kategori="mainan")
+                    )
+            return app, product.id, auth_headers(seller)
+    return build
+
+
+def _seller_product_names(client, headers):
+    return [product["nama_produk"] for product in client.get("/seller/products", headers=headers).get_json()["products"]]
+
+
+def test_anonymous_reads_use_the_replica_but_cache_fills_use_the_primary(replicated):
+    app, product_id, _ = replicated()
+    client = app.test_client()
+
+    batch = client.get(f"/products/batch?ids={product_id}").get_json()
+    assert batch["products"][0]["nama_produk"] == "Nama Lama"
+
+    response = client.get(f"/products/{product_id}")
+    assert response.headers["X-Cache"] == "MISS"
+    assert response.get_json()["product"]["nama_produk"] == "Nama Baru"
+
+
+def test_cache_disabled_reads_stay_on_the_replica(replicated):
+    app, product_id, _ = replicated(CACHE_BACKEND="none")
+    client = app.test_client()
+
+    response = client.get(f"/products/{product_id}")
+
+    assert response.get_json()["product"]["nama_produk"] == "Nama Lama"
+    assert client.get("/products/facets").get_json()["facets"]["kategori"] == {"mainan": 1}
+
+
+def test_cached_facets_are_computed_on_the_primary(replicated):
+    app, _, _ = replicated()
+
+    facets = app.test_client().get("/products/facets").get_json()["facets"]
+
+    assert facets["kategori"] == {"makanan": 1}
+
+
+def test_logged_in_users_stay_on_the_primary_without_a_shared_cache(replicated):
+    app, _, headers = replicated(CACHE_BACKEND="memory")
+
+    assert _seller_product_names(app.test_client(), headers) == ["Nama Baru"]
+
+
+def test_writes_make_the_user_sticky_with_a_shared_cache(replicated):
+    app, product_id, headers = replicated(CACHE_BACKEND="redis", CACHE_REDIS_CLIENT=fakeredis.FakeRedis())
+    client = app.test_client()
+
+    assert _seller_product_names(client, headers) == ["Nama Lama"]
+
+    response = client.put(f"/seller/products/{product_id}", data={"stok": "7"}, headers=headers)
+    assert response.status_code == 200
+
+    assert _seller_product_names(client, headers) == ["Nama Baru"]
+
+
+def test_one_request_reads_from_a_single_replica(replicated, monkeypatch):
+    app, product_id, _ = replicated(replicas=2, CACHE_BACKEND="none")
+    # Pilihan bergantian: tanpa memilih sekali per request, query berikutnya pindah replika
+    turns = itertools.count()
+    monkeypatch.setattr(connectors.db.random, "choice", lambda options: options[next(turns) % len(options)])
+    used = []
+    with app.app_context():
+        for bind_key in ("replica_0", "replica_1"):
+            event.listen(
+                db.engines[bind_key], "before_cursor_execute",
+                lambda *args, bind_key=bind_key: used.append(bind_key),
+            )
+
+    response = app.test_client().get(f"/products/batch?ids={product_id}")
+
+    assert response.get_json()["products"][0]["nama_produk"] == "Nama Lama"
+    assert len(used) > 1
+    assert len(set(used)) == 1
+
+
+def test_detail_304_is_answered_by_the_replica_without_a_cache(replicated):
+    app, product_id, _ = replicated(CACHE_BACKEND="none")
+    client = app.test_client()
+    etag = client.get(f"/products/{product_id}").headers["ETag"]
+
+    with count_queries(app) as primary, count_queries(app, "replica_0") as replica:
+        response = client.get(f"/products/{product_id}", headers={"If-None-Match": etag})
+
+    assert response.status_code == 304
+    assert primary == []
+    assert len(replica) == 1
+
+
+def test_detail_304_on_a_cache_miss_checks_the_primary(replicated):
+    app, product_id, _ = replicated()
+    client = app.test_client()
+    etag = client.get(f"/products/{product_id}").headers["ETag"]
+    with app.app_context():
+        cache.clear()
+
+    with count_queries(app) as primary, count_queries(app, "replica_0") as replica:
+        response = client.get(f"/products/{product_id}", headers={"If-None-Match": etag})
+
+    assert response.status_code == 304
+    assert len(primary) == 1
+    assert replica == []
@@ -0,0 +1,93 @@
+import importlib.util
+import pathlib
+import pytest
+from alembic.migration import MigrationContext
+from alembic.operations import Operations
+from sqlalchemy.exc import DBAPIError
+from connectors.db import db
+from models.product import Product
+from tests.conftest import create_user, create_store, create_product, auth_headers
+
+MIGRATIONS = pathlib.Path(__file__).resolve().parent.parent / "migrations" / "versions"
+SEARCH_MIGRATION = next(MIGRATIONS.glob("7c4e2a91d5b3_*.py"))
+
+
+def _apply_search_migration():
+    """Postgres: add search_vector and the trigram index the way Alembic does (create_all skips them)."""
+    spec = importlib.util.spec_from_file_location("search_migration", SEARCH_MIGRATION)
+    migration = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(migration)
+    try:
+        with db.engine.begin() as connection:
+            with Operations.context(MigrationContext.configure(connection)):
+                migration.upgrade()
+    except DBAPIError as e:
+        pytest.skip(f"Search migration cannot run on this server: {e.orig}")
+
+
+@pytest.fixture
+def shop(app):
+    with app.app_context():
+        if db.engine.dialect.name == "postgresql":
+            _apply_search_migration()
+        seller = create_user("seller@example.com", is_seller=True)
+        store = create_store(seller)
+        ids = {
+            "pasir": create_product(
+                store, nama_produk="Pasir Kucing Wangi", deskripsi="Pasir gumpal, pasir wangi",
+                kategori="perlengkapan", harga=40000,
+            ).id,
+            "mangkuk": create_product(
+                store, nama_produk="Mangkuk Makan", deskripsi="Bisa untuk pasir juga",
+                kategori="perlengkapan", harga=20000,
+            ).id,
+            "anjing": create_product(
+                store, nama_produk="Pasir Anjing", deskripsi="Untuk anjing", jenis_hewan="anjing",
+                kategori="perlengkapan", harga=30000,
+            ).id,
+        }
+        return ids, auth_headers(seller)
+
+
+def _search(client, query):
+    response = client.get(f"/products?{query}")
+    if response.status_code == 404:
+        return []
+    return [product["id"] for product in response.get_json()["products"]]
+
+
+def test_results_are_ranked_by_relevance_and_match_prefixes(client, shop):
+    ids, _ = shop
+
+    results = _search(client, "search=pasir")
+    assert set(results) == {ids["pasir"], ids["mangkuk"], ids["anjing"]}
+    assert results[0] == ids["pasir"]
+    assert results[-1] == ids["mangkuk"]
+
+    assert _search(client, "search=wang") == [ids["pasir"]]
+
+
+def test_search_combines_with_filters(client, shop):
+    ids, _ = shop
+
+    assert _search(client, "search=pasir&jenis_hewan=anjing") == [ids["anjing"]]
+    assert _search(client, "search=pasir&max_price=25000") == [ids["mangkuk"]]
+    assert _search(client, "search=pasir&category=makanan") == []
+    assert _search(client, "search=pasir&sort_by=harga&order=asc") == [ids["mangkuk"], ids["anjing"], ids["pasir"]]
+
+
+def test_index_follows_insert_update_and_delete(client, shop):
+    ids, headers = shop
+    assert _search(client, "search=kalung") == []
+
+    with client.application.app_context():
+        kalung = create_product(Product.query.get(ids["pasir"]).store, nama_produk="Kalung Lonceng").id
+    assert _search(client, "search=kalung") == [kalung]
+
+    response = client.put(f"/seller/products/{ids['mangkuk']}", data={"nama_produk": "Tempat Minum"}, headers=headers)
+    assert response.status_code == 200
+    assert _search(client, "search=mangkuk") == []
+    assert _search(client, "search=minum") == [ids["mangkuk"]]
+
+    assert client.delete(f"/seller/products/{kalung}", headers=headers).status_code == 200
+    assert _search(client, "search=kalung") == []
@@ -0,0 +1,54 @@
+import pytest
+from tests.conftest import create_user, create_store, create_product, auth_headers
+
+
+@pytest.fixture
+def shop(app):
+    with app.app_context():
+        seller = create_user("seller@example.com", is_seller=True)
+        store = create_store(seller)
+        ids = {
+            "makanan": create_product(store, nama_produk="Makanan Kucing", stok=20).id,
+            "mangkuk": create_product(store, nama_produk="Mangkuk Kucing").id,
+        }
+        return ids, auth_headers(seller), auth_headers(create_user("buyer@example.com"))
+
+
+def _suggest(client, query):
+    response = client.get(f"/products/suggest?q={query}")
+    assert response.status_code == 200
+    return [(item["id"], item["nama_produk"]) for item in response.get_json()["suggestions"]]
+
+
+def test_matches_word_prefixes_best_sellers_first(client, shop):
+    ids, _, buyer = shop
+    body = {"products": [{"product_id": ids["mangkuk"], "quantity": 3}]}
+    assert client.post("/cart/checkout", json=body, headers=buyer).status_code == 201
+
+    assert _suggest(client, "kuc") == [(ids["mangkuk"], "Mangkuk Kucing"), (ids["makanan"], "Makanan Kucing")]
+    assert _suggest(client, "MAK") == [(ids["makanan"], "Makanan Kucing")]
+    assert _suggest(client, "ikan") == []
+    assert _suggest(client, "") == []
+
+
+def test_index_follows_create_rename_and_delete(client, shop):
+    ids, seller, _ = shop
+    assert _suggest(client, "kalung") == []  # Index dibangun di panggilan pertama
+
+    form = {
+        "nama_produk": "Kalung Lonceng", "harga": "15000", "stok": "5",
+        "kategori": "peralatan", "jenis_hewan": "kucing", "berat": "0.1",
+    }
+    response = client.post("/seller/create-products", data=form, headers=seller)
+    assert response.status_code == 201
+    kalung = response.get_json()["product"]["id"]
+    assert _suggest(client, "kal") == [(kalung, "Kalung Lonceng")]
+    assert _suggest(client, "lonc") == [(kalung, "Kalung Lonceng")]
+
+    response = client.put(f"/seller/products/{ids['mangkuk']}", data={"nama_produk": "Tempat Minum"}, headers=seller)
+    assert response.status_code == 200
+    assert _suggest(client, "mangkuk") == []
+    assert _suggest(client, "minum") == [(ids["mangkuk"], "Tempat Minum")]
+
+    assert client.delete(f"/seller/products/{kalung}", headers=seller).status_code == 200
+    assert _suggest(client, "kal") == []
@@ -0,0 +1,114 @@
+import importlib.util
+import pathlib
+import pytest
+import sqlalchemy as sa
+from alembic.migration import MigrationContext
+from alembic.operations import Operations
+from sqlalchemy.exc import IntegrityError
+from connectors.db import db
+from models.cart import Cart
+from models.wishlist import Wishlist
+from tests.conftest import create_user, create_store, create_product, auth_headers, send_in_parallel
+
+MIGRATIONS = pathlib.Path(__file__).resolve().parent.parent / "migrations" / "versions"
+UNIQUE_MIGRATION = next(MIGRATIONS.glob("5a9c3e7d2f14_*.py"))
+BUYERS = 6
+
+
+@pytest.fixture
+def shop(make_app):
+    app = make_app(SQLALCHEMY_ENGINE_OPTIONS={"pool_size": BUYERS, "max_overflow": 0})
+    with app.app_context():
+        product_id = create_product(create_store(create_user("seller@example.com", is_seller=True))).id
+        buyer = create_user("buyer@example.com")
+        return app, product_id, buyer.id, auth_headers(buyer)
+
+
+def test_adding_a_product_again_increments_its_row(shop):
+    app, product_id, user_id, headers = shop
+    client = app.test_client()
+
+    for quantity in (1, 2):
+        response = client.post("/cart/add", json={"product_id": product_id, "quantity": quantity}, headers=headers)
+        assert response.status_code == 201
+
+    with app.app_context():
+        assert db.session.query(Cart.quantity).filter_by(user_id=user_id, product_id=product_id).all() == [(3,)]
+
+
+def test_parallel_adds_keep_every_increment(shop):
+    app, product_id, user_id, headers = shop
+    requests = [("POST", "/cart/add", headers, {"product_id": product_id, "quantity": 1})] * BUYERS
+
+    assert send_in_parallel(app, requests) == [201] * BUYERS
+    with app.app_context():
+        assert db.session.query(Cart.quantity).filter_by(user_id=user_id).all() == [(BUYERS,)]
+
+
+def test_wishlist_keeps_one_row_per_product(shop):
+    app, product_id, user_id, headers = shop
+    client = app.test_client()
+
+    assert client.post("/wishlist/add", json={"product_id": product_id}, headers=headers).status_code == 201
+    response = client.post("/wishlist/add", json={"product_id": product_id}, headers=headers)
+
+    assert response.status_code == 400
+    assert response.get_json()["msg"] == "Product is already in the wishlist"
+    with app.app_context():
+        assert Wishlist.query.filter_by(user_id=user_id).count() == 1
+
+
+def _run_unique_migration():
+    spec = importlib.util.spec_from_file_location("unique_migration", UNIQUE_MIGRATION)
+    migration = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(migration)
+    with db.engine.begin() as connection:
+        with Operations.context(MigrationContext.configure(connection)):
+            migration.upgrade()
+
+
+def test_migration_merges_duplicates_before_adding_the_constraints(app):
+    with app.app_context():
+        # Tabel versi lama, tanpa unique (user_id, product_id)
+        Cart.__table__.drop(db.engine)
+        Wishlist.__table__.drop(db.engine)
+        legacy = sa.MetaData()
+        carts = sa.Table(
+            "carts", legacy,
+            sa.Column("id", sa.Integer, primary_key=True),
+            sa.Column("user_id", sa.Integer, nullable=False),
+            sa.Column("product_id", sa.Integer, nullable=False),
+            sa.Column("quantity", sa.Integer, nullable=False),
+        )
+        wishlist = sa.Table(
+            "wishlist", legacy,
+            sa.Column("id", sa.Integer, primary_key=True),
+            sa.Column("user_id", sa.Integer, nullable=False),
+            sa.Column("product_id", sa.Integer, nullable=False),
+        )
+        legacy.create_all(db.engine)
+        with db.engine.begin() as connection:
+            connection.execute(carts.insert(), [
+                {"id": 1, "user_id": 1, "product_id": 10, "quantity": 2},
+                {"id": 2, "user_id": 1, "product_id": 11, "quantity": 1},
+                {"id": 3, "user_id": 1, "product_id": 10, "quantity": 3},
+                {"id": 4, "user_id": 2, "product_id": 10, "quantity": 1},
+                {"id": 5, "user_id": 1, "product_id": 10, "quantity": 4},
+            ])
+            connection.execute(wishlist.insert(), [
+                {"id": 1, "user_id": 1, "product_id": 10},
+                {"id": 2, "user_id": 1, "product_id": 10},
+                {"id": 3, "user_id": 2, "product_id": 10},
+            ])
+
+        _run_unique_migration()
+
+        with db.engine.connect() as connection:
+            assert connection.execute(carts.select().order_by(carts.c.id)).fetchall() == [
+                (1, 1, 10, 9), (2, 1, 11, 1), (4, 2, 10, 1),
+            ]
+            assert connection.execute(wishlist.select().order_by(wishlist.c.id)).fetchall() == [(1, 1, 10), (3, 2, 10)]
+        for table, row in ((carts, {"user_id": 2, "product_id": 10, "quantity": 1}), (wishlist, {"user_id": 1, "product_id": 10})):
+            with pytest.raises(IntegrityError):
+                with db.engine.begin() as connection:
+                    connection.execute(table.insert(), row)